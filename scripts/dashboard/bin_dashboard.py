@@ -4,8 +4,11 @@ from __future__ import annotations
 
 This dashboard supports two data sources:
 
-1) MQTT subscription (live)
-2) JSONL log file produced by the simulator (playback/dry-run)
+1) MQTT subscription (live). One subscription per Streamlit server feeds a
+   shared event store; every browser session reads from it with its own
+   cursor, so many open tabs neither lose events nor add broker load.
+2) Log file produced by the simulator (playback/dry-run): JSONL, binary (.bin)
+   or Parquet (.parquet)
 
 The intent is to make it easy to demo a "renovation company" monitoring view:
 - Live graph of fill percentage per container over time
@@ -16,76 +19,55 @@ Run:
 - streamlit run scripts/dashboard/bin_dashboard.py
 """
 
-from datetime import datetime, timedelta, timezone
-import json
-import queue
-import threading
+import os
 import time
-import uuid
-from typing import Any
 
-import pandas as pd
 import streamlit as st
 import altair as alt
 
 from simulated_city.config import load_config
-from simulated_city.dashboard_data import event_from_payload, events_to_frame, read_jsonl_incremental
-def _drain_queue(q: queue.Queue[dict[str, Any]], max_items: int = 5_000) -> list[dict[str, Any]]:
-    items: list[dict[str, Any]] = []
-    for _ in range(max_items):
-        try:
-            items.append(q.get_nowait())
-        except queue.Empty:
-            break
-    return items
+from simulated_city.dashboard_data import (
+    EventStore,
+    IndexedJsonlLog,
+    downsample_series,
+    load_event_log_frame,
+    read_jsonl_incremental,
+    start_mqtt_ingest,
+)
+
+
+_HISTORY_DAY_OPTIONS = [1, 2, 7, 14]
+_MAX_HISTORY_DAYS = max(_HISTORY_DAY_OPTIONS)
+_NS_PER_DAY = 86_400 * 1_000_000_000
+
+
 @st.cache_resource
-def _start_mqtt_listener(topic_filter: str) -> queue.Queue[dict[str, Any]]:
-    """Start a background MQTT subscriber that pushes payload dicts into a queue."""
+def _shared_mqtt_store(topic_filter: str) -> EventStore:
+    """Start the process-wide MQTT ingest and return its event store.
+
+    Cached once per Streamlit server, so every browser session shares one
+    broker connection and one store. Sessions only read from it (each with its
+    own cursor), so no session can steal events from another.
+    """
 
     cfg = load_config()
+    store, _client = start_mqtt_ingest(cfg.mqtt, topic_filter, client_id_suffix="dashboard")
+    return store
+def _load_jsonl_tail(store: EventStore, log_path: str) -> None:
+    """Load the last `_MAX_HISTORY_DAYS` of a JSONL log via its sparse index.
 
-    try:
-        import paho.mqtt.client as mqtt
-    except ModuleNotFoundError as e:
-        raise ModuleNotFoundError("paho-mqtt is required. Install the project dependencies.") from e
+    Large logs are not scanned again once their `.idx` file exists; later
+    refreshes continue incrementally from the indexed end of the file.
+    """
 
-    q: queue.Queue[dict[str, Any]] = queue.Queue()
+    with IndexedJsonlLog(log_path) as log:
+        time_range = log.time_range
+        start_ns = None if time_range is None else time_range[1] - _MAX_HISTORY_DAYS * _NS_PER_DAY
+        for chunk in log.iter_chunks(start_ts=start_ns):
+            store.ingest_payloads(chunk)
+        st.session_state["log_offset"] = log.size
 
-    if cfg.mqtt.username is None or cfg.mqtt.password is None:
-        raise RuntimeError(
-            "MQTT credentials are not set. Create a .env with HIVEMQ_USERNAME and HIVEMQ_PASSWORD (or export them) and restart Streamlit."
-        )
 
-    def on_message(_client, _userdata, msg):
-        try:
-            payload_str = msg.payload.decode("utf-8", errors="replace")
-            payload = json.loads(payload_str)
-            if isinstance(payload, dict):
-                q.put(payload)
-        except Exception:
-            # Keep the dashboard robust for demos.
-            return
-
-    client = mqtt.Client(
-        mqtt.CallbackAPIVersion.VERSION2,
-        client_id=f"{cfg.mqtt.client_id_prefix}-dashboard-{uuid.uuid4().hex[:8]}",
-    )
-    if cfg.mqtt.username is not None:
-        client.username_pw_set(cfg.mqtt.username, password=cfg.mqtt.password)
-
-    if cfg.mqtt.tls:
-        import ssl
-
-        client.tls_set_context(ssl.create_default_context())
-
-    client.on_message = on_message
-    client.connect(cfg.mqtt.host, cfg.mqtt.port, keepalive=cfg.mqtt.keepalive_s)
-    client.subscribe(topic_filter, qos=1)
-
-    t = threading.Thread(target=client.loop_forever, name="mqtt-dashboard", daemon=True)
-    t.start()
-
-    return q
 def main() -> None:
     st.set_page_config(page_title="Rubbish Bin Dashboard", layout="wide")
 
@@ -101,105 +83,80 @@ def main() -> None:
         refresh_s = st.slider("Refresh interval (seconds)", min_value=1, max_value=10, value=2)
         auto_refresh = st.checkbox("Auto refresh", value=True)
         alert_threshold = st.slider("Alert threshold (%)", min_value=1, max_value=100, value=80)
-        history_days = st.selectbox("History window (days)", options=[1, 2, 7, 14], index=2)
+        history_days = st.selectbox("History window (days)", options=_HISTORY_DAY_OPTIONS, index=2)
+        max_points = st.selectbox("Chart points per container", options=[250, 500, 1000, 2000], index=1)
+        downsample_method = st.radio("Downsampling", options=["minmax", "lttb"], index=0, horizontal=True)
 
         if source == "MQTT":
             st.caption("Subscribes to the retained status topics from the broker.")
         else:
-            st.caption("Reads JSONL created via: python -m simulated_city --dry-run --log-file out.jsonl")
+            st.caption(
+                "Reads logs created via: python -m simulated_city --dry-run --log-file out.jsonl "
+                "(.parquet and .bin logs are reloaded when the file changes)"
+            )
             log_path = st.text_input("Log file path", value="sim_status.jsonl")
 
-    if "events_df" not in st.session_state:
-        st.session_state["events_df"] = pd.DataFrame(
-            {
-                "ts": pd.Series(dtype="datetime64[ns, UTC]"),
-                "series": pd.Series(dtype="string"),
-                "fill_pct": pd.Series(dtype="int64"),
-                "timestep_index": pd.Series(dtype="int64"),
-                "event": pd.Series(dtype="string"),
-            }
-        )
-
-    new_payloads: list[dict[str, Any]] = []
     if source == "MQTT":
         topic_filter = f"{base_topic}/bins/+/+/status"
         try:
-            q = _start_mqtt_listener(topic_filter)
+            store = _shared_mqtt_store(topic_filter)
         except Exception as e:
             st.error(str(e))
             st.stop()
-        new_payloads = _drain_queue(q)
     else:
-        if "log_offset" not in st.session_state:
+        # Log files are read into one incremental store per browser session.
+        if st.session_state.get("log_store_path") != log_path:
+            st.session_state["log_store"] = EventStore()
+            st.session_state["log_store_path"] = log_path
             st.session_state["log_offset"] = 0
-        try:
-            payloads, new_offset = read_jsonl_incremental(log_path, int(st.session_state["log_offset"]))
-            st.session_state["log_offset"] = new_offset
-            new_payloads = payloads
-        except FileNotFoundError:
-            st.warning(f"Log file not found: {log_path}")
-
-    new_events = []
-    for payload in new_payloads:
-        try:
-            new_events.append(event_from_payload(payload))
-        except Exception:
-            continue
-
-    if new_events:
-        new_df = events_to_frame(new_events)
-        combined = pd.concat([st.session_state["events_df"], new_df], ignore_index=True)
-        combined = combined.sort_values(["ts", "series"], kind="mergesort")
-        combined = combined.drop_duplicates(subset=["ts", "series", "fill_pct", "event"], keep="last")
-        st.session_state["events_df"] = combined.reset_index(drop=True)
-
-    # Keep the last N days.
-    # Important: simulation timestamps can advance much faster than wall-clock.
-    # Anchor the window to the latest *data* timestamp so the chart shows the
-    # last 24 hours of simulated time.
-    wall_now = datetime.now(timezone.utc)
-    df: pd.DataFrame = st.session_state["events_df"]
-    if not df.empty:
-        df = df.copy()
-        df["ts"] = pd.to_datetime(df["ts"], utc=True)
-
-        # If the log file was appended across multiple simulator runs, values
-        # will "reset" back to 0% at each run start. Keep only the latest run.
-        if "event" in df.columns:
-            init_ts = df.loc[df["event"] == "init", "ts"]
+            st.session_state.pop("log_mtime", None)
+
+        if log_path.lower().endswith((".parquet", ".bin")):
+            # Columnar logs are complete files: reload them when they change.
+            try:
+                mtime = os.path.getmtime(log_path)
+                if st.session_state.get("log_mtime") != mtime:
+                    log_store = EventStore()
+                    log_store.ingest_frame(load_event_log_frame(log_path))
+                    st.session_state["log_store"] = log_store
+                    st.session_state["log_mtime"] = mtime
+            except FileNotFoundError:
+                st.warning(f"Log file not found: {log_path}")
+            except ValueError as e:
+                st.warning(f"Log file not readable yet: {e}")
         else:
-            init_ts = pd.Series(dtype="datetime64[ns, UTC]")
-        if not init_ts.empty:
-            latest_start = init_ts.max()
-            df = df[df["ts"] >= latest_start]
-
-        # Fallback: if the log was appended across runs but lacks init markers
-        # (older logs), detect resets by looking for any fill decrease.
-        # Keep only the latest segment after the last decrease.
-        diffs = df.sort_values(["series", "ts"]).groupby("series")["fill_pct"].diff()
-        reset_rows = df.loc[diffs < 0, "ts"]
-        if not reset_rows.empty:
-            last_reset = reset_rows.max()
-            df = df[df["ts"] >= last_reset]
-
-        ts_max = df["ts"].max()
-        anchor = ts_max.to_pydatetime() if isinstance(ts_max, pd.Timestamp) else wall_now
-        cutoff = anchor - timedelta(days=int(history_days))
-
-        # Include each series' last-known value before the cutoff so lines don't
-        # jump at the left edge of the window.
-        before = df[df["ts"] < pd.Timestamp(cutoff)]
-        baseline = before.sort_values("ts").groupby("series").tail(1) if not before.empty else before
-        after = df[df["ts"] >= pd.Timestamp(cutoff)]
-        df = pd.concat([baseline, after], ignore_index=True)
-
-        st.session_state["events_df"] = df
+            try:
+                if st.session_state["log_offset"] == 0:
+                    _load_jsonl_tail(st.session_state["log_store"], log_path)
+                payloads, new_offset = read_jsonl_incremental(log_path, int(st.session_state["log_offset"]))
+                st.session_state["log_offset"] = new_offset
+                st.session_state["log_store"].ingest_payloads(payloads)
+            except FileNotFoundError:
+                st.warning(f"Log file not found: {log_path}")
+        store = st.session_state["log_store"]
+
+    # Each session remembers the store sequence number (cursor) it last
+    # rendered and only recomputes the window when new events arrived or the
+    # view settings changed.
+    view_key = (id(store), store.seq, int(history_days), int(max_points), downsample_method)
+    if st.session_state.get("view_key") != view_key:
+        # Keep the last N days of the latest run (see `EventStore.window`).
+        # Important: simulation timestamps can advance much faster than wall-clock,
+        # so the window is anchored to the latest *data* timestamp.
+        df = store.window(days=int(history_days))
+        long = (
+            downsample_series(df, max_points_per_series=int(max_points), method=downsample_method)
+            if not df.empty
+            else df
+        )
+        st.session_state["view"] = (df, long, store.latest())
+        st.session_state["view_key"] = view_key
+    df, long, latest = st.session_state["view"]
 
     if df.empty:
         st.info("No status events yet. Run the simulator to produce events.")
     else:
         # Latest per series for alerts.
-        latest = df.sort_values("ts").groupby("series").tail(1)
         active_alerts = latest[latest["fill_pct"] >= int(alert_threshold)]
 
         if not active_alerts.empty:
@@ -211,13 +168,9 @@ def main() -> None:
             st.success("All containers are below the alert threshold.")
 
         # Plot
-        # `pivot_table` introduces NaNs for series that didn't update at a given
-        # timestamp (because other series did). Vega-Lite breaks lines on NaNs,
-        # which makes points hoverable but lines appear missing.
-        wide = df.pivot_table(index="ts", columns="series", values="fill_pct", aggfunc="last").sort_index()
-        wide = wide.ffill().astype("float64")
-        long = wide.reset_index().melt(id_vars="ts", var_name="series", value_name="fill_pct").dropna()
-
+        # `long` is downsampled per series so the chart payload stays bounded
+        # however long the history is. Each series also gets a point at the
+        # latest timestamp so step lines reach the right edge.
         chart = (
             alt.Chart(long)
             .mark_line(interpolate="step-after")
@@ -235,7 +188,7 @@ def main() -> None:
         st.altair_chart(chart, width="stretch")
 
         with st.expander("Latest values"):
-            st.dataframe(latest[["ts", "series", "fill_pct"]].sort_values("series"), width="stretch")
+            st.dataframe(latest, width="stretch")
 
     if auto_refresh:
         time.sleep(float(refresh_s))
@@ -56,14 +56,13 @@ def main() -> None:
                 "import time",
                 "",
                 "import altair as alt",
-                "import pandas as pd",
                 "from IPython.display import clear_output, display",
                 "",
                 "from simulated_city.config import load_config",
                 "from simulated_city.dashboard_data import (",
+                "    EventStore,",
+                "    downsample_series,",
                 "    drain_queue,",
-                "    event_from_payload,",
-                "    events_to_frame,",
                 "    start_mqtt_listener,",
                 "    stop_mqtt_listener,",
                 ")",
@@ -79,6 +78,7 @@ def main() -> None:
                 "",
                 "ALERT_THRESHOLD = 80",
                 "HISTORY_DAYS = 7  # Set None to show all data",
+                "MAX_POINTS_PER_SERIES = 500  # Chart points per container (keeps rendering fast)",
                 "REFRESH_S = 2.0",
                 "RUN_FOR_S = 60",
                 "",
@@ -96,53 +96,21 @@ def main() -> None:
                 "",
                 "q, client = start_mqtt_listener(cfg.mqtt, TOPIC_FILTER)",
                 "",
-                "df = pd.DataFrame(",
-                "    {",
-                "        'ts': pd.Series(dtype='datetime64[ns, UTC]'),",
-                "        'series': pd.Series(dtype='string'),",
-                "        'fill_pct': pd.Series(dtype='int64'),",
-                "        'timestep_index': pd.Series(dtype='int64'),",
-                "        'event': pd.Series(dtype='string'),",
-                "    }",
-                ")",
+                "# The store ingests each event once and tracks run boundaries (init events or a",
+                "# fill reset), so every refresh only has to slice the current window.",
+                "store = EventStore()",
                 "",
                 "t_end = time.time() + float(RUN_FOR_S)",
                 "try:",
                 "    while time.time() < t_end:",
-                "        payloads = drain_queue(q)",
-                "        new_events = []",
-                "        for payload in payloads:",
-                "            try:",
-                "                new_events.append(event_from_payload(payload))",
-                "            except Exception:",
-                "                continue",
-                "",
-                "        if new_events:",
-                "            df = pd.concat([df, events_to_frame(new_events)], ignore_index=True)",
-                "            df = df.sort_values(['ts', 'series'], kind='mergesort')",
-                "            df = df.drop_duplicates(subset=['ts', 'series', 'fill_pct', 'event'], keep='last').reset_index(drop=True)",
-                "",
-                "        view = df",
-                "        if not view.empty:",
-                "            init_ts = view.loc[view['event'] == 'init', 'ts'] if 'event' in view.columns else pd.Series(dtype='datetime64[ns, UTC]')",
-                "            if not init_ts.empty:",
-                "                view = view[view['ts'] >= init_ts.max()]",
-                "",
-                "            diffs = view.sort_values(['series', 'ts']).groupby('series')['fill_pct'].diff()",
-                "            reset_rows = view.loc[diffs < 0, 'ts']",
-                "            if not reset_rows.empty:",
-                "                view = view[view['ts'] >= reset_rows.max()]",
-                "",
-                "            if HISTORY_DAYS is not None and not view.empty:",
-                "                anchor = view['ts'].max()",
-                "                cutoff = anchor - pd.Timedelta(days=int(HISTORY_DAYS))",
-                "                view = view[view['ts'] >= cutoff]",
+                "        store.ingest_payloads(drain_queue(q))",
+                "        view = store.window(days=HISTORY_DAYS)",
                 "",
                 "        clear_output(wait=True)",
                 "        if view.empty:",
                 "            print('Waiting for status events... (is the simulator running?)')",
                 "        else:",
-                "            latest = view.sort_values('ts').groupby('series').tail(1)",
+                "            latest = store.latest()",
                 "            alerts = latest[latest['fill_pct'] >= int(ALERT_THRESHOLD)]",
                 "            if not alerts.empty:",
                 "                print('ALERT: Containers at or above threshold:')",
@@ -151,9 +119,7 @@ def main() -> None:
                 "            else:",
                 "                print('All containers are below the alert threshold.')",
                 "",
-                "            wide = view.pivot_table(index='ts', columns='series', values='fill_pct', aggfunc='last').sort_index()",
-                "            wide = wide.ffill().astype('float64')",
-                "            long = wide.reset_index().melt(id_vars='ts', var_name='series', value_name='fill_pct').dropna()",
+                "            long = downsample_series(view, max_points_per_series=MAX_POINTS_PER_SERIES)",
                 "",
                 "            chart = (",
                 "                alt.Chart(long)",
@@ -171,7 +137,7 @@ def main() -> None:
                 "            ).properties(height=350)",
                 "",
                 "            display(chart)",
-                "            display(latest[['ts', 'series', 'fill_pct']].sort_values('series').reset_index(drop=True))",
+                "            display(latest)",
                 "",
                 "        time.sleep(float(REFRESH_S))",
                 "finally:",
@@ -191,13 +157,15 @@ def main() -> None:
             "source": [
                 "# Bin Dashboard — Log File Viewer",
                 "",
-                "This notebook reads a simulator JSONL log file and plots bin fill % over time.",
+                "This notebook reads a simulator log file (JSONL, binary or Parquet) and plots bin fill % over time.",
                 "",
                 "Generate the log file:",
                 "",
                 "```bash",
                 "python -m simulated_city --steps 500 --dry-run --log-file sim_status.jsonl",
                 "```",
+                "",
+                "For long runs, `--log-format parquet --log-file sim_status.parquet` loads much faster.",
             ],
         },
         {
@@ -210,9 +178,8 @@ def main() -> None:
                 "from pathlib import Path",
                 "",
                 "import altair as alt",
-                "import pandas as pd",
                 "",
-                "from simulated_city.dashboard_data import event_from_payload, events_to_frame, read_jsonl_all",
+                "from simulated_city.dashboard_data import EventStore, downsample_series, load_event_log_frame",
             ],
         },
         {
@@ -228,6 +195,8 @@ def main() -> None:
                 "",
                 "ALERT_THRESHOLD = 80",
                 "HISTORY_DAYS = 7  # Set None to show all",
+                "MAX_POINTS_PER_SERIES = 500  # Chart points per container (keeps rendering fast)",
+                "WORKERS = None  # Processes used to parse JSONL logs (None = all CPU cores)",
                 "LOG_PATH",
             ],
         },
@@ -242,31 +211,17 @@ def main() -> None:
                 "        'Create it with: python -m simulated_city --steps 500 --dry-run --log-file sim_status.jsonl'",
                 "    )",
                 "",
-                "payloads = read_jsonl_all(str(LOG_PATH))",
-                "events = []",
-                "for payload in payloads:",
-                "    try:",
-                "        events.append(event_from_payload(payload))",
-                "    except Exception:",
-                "        continue",
-                "",
-                "df = events_to_frame(events)",
-                "df = df.sort_values(['ts', 'series'], kind='mergesort').reset_index(drop=True)",
-                "",
-                "if not df.empty and 'event' in df.columns:",
-                "    init_ts = df.loc[df['event'] == 'init', 'ts']",
-                "    if not init_ts.empty:",
-                "        df = df[df['ts'] >= init_ts.max()].copy()",
+                "# JSONL, binary (.bin) and Parquet (.parquet) logs are all supported.",
+                "store = EventStore()",
+                "store.ingest_frame(load_event_log_frame(str(LOG_PATH), workers=WORKERS))",
                 "",
-                "if not df.empty and HISTORY_DAYS is not None:",
-                "    anchor = df['ts'].max()",
-                "    cutoff = anchor - pd.Timedelta(days=int(HISTORY_DAYS))",
-                "    df = df[df['ts'] >= cutoff].copy()",
+                "# Latest run only (init events or a fill reset start a new run).",
+                "df = store.window(days=HISTORY_DAYS)",
                 "",
                 "if df.empty:",
                 "    print('No status events in the selected window.')",
                 "else:",
-                "    latest = df.sort_values('ts').groupby('series').tail(1)",
+                "    latest = store.latest()",
                 "    alerts = latest[latest['fill_pct'] >= int(ALERT_THRESHOLD)]",
                 "    if not alerts.empty:",
                 "        print('ALERT: Containers at or above threshold:')",
@@ -275,9 +230,7 @@ def main() -> None:
                 "    else:",
                 "        print('All containers are below the alert threshold.')",
                 "",
-                "    wide = df.pivot_table(index='ts', columns='series', values='fill_pct', aggfunc='last').sort_index()",
-                "    wide = wide.ffill().astype('float64')",
-                "    long = wide.reset_index().melt(id_vars='ts', var_name='series', value_name='fill_pct').dropna()",
+                "    long = downsample_series(df, max_points_per_series=MAX_POINTS_PER_SERIES)",
                 "",
                 "    chart = (",
                 "        alt.Chart(long)",
@@ -2,15 +2,19 @@ from __future__ import annotations
 
 import argparse
 
+from . import benchmarks, ensemble
 from .config import load_config
-from .rubbish_sim import run_simulation
+from .rubbish_sim import ENGINE_NAMES, LOG_FORMATS, run_simulation
 
 
 def main() -> None:
-    """Small CLI smoke for the template.
+    """Command-line entry point.
 
-    This template library intentionally does *not* ship simulation code.
-    Running this module just verifies configuration loading.
+    With `--steps N` it runs the rubbish-bin simulation (see the run flags
+    for engine, logging, metrics, pacing and checkpoints). The `bench` and
+    `ensemble` subcommands run the benchmark suite and Monte Carlo
+    ensembles. Without either it only loads the configuration and prints a
+    short overview.
     """
 
     parser = argparse.ArgumentParser(prog="python -m simulated_city")
@@ -27,11 +31,97 @@ def main() -> None:
         default=None,
         help="Optional path to write status events as JSONL (useful for dashboard playback)",
     )
+    parser.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        default="jsonl",
+        help=(
+            "Format of --log-file: 'jsonl' (text), 'binary' (compact, memory-mappable) "
+            "or 'parquet' (columnar, needs the 'parquet' extra)"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINE_NAMES,
+        default="python",
+        help=(
+            "Simulation engine: 'python' (reference), 'numpy' (vectorized, needs the 'fast' extra) "
+            "or 'event' (next-arrival sampling, fast for long runs)"
+        ),
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Shard locations across N worker processes (same events for any N with a fixed seed)",
+    )
+
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=None,
+        help="Pace the run at this many times real time (1 = real time; overrides step_delay_s)",
+    )
+    parser.add_argument(
+        "--catch-up",
+        action="store_true",
+        default=None,
+        help="After a slow step, run the next steps back to back until the run is on schedule again",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Record counters and per-stage timings and print a summary at the end",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="Write the metrics as JSON to this path, refreshed periodically (implies --metrics)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live metrics in Prometheus text format on this local port (implies --metrics)",
+    )
+    parser.add_argument(
+        "--checkpoint-file",
+        type=str,
+        default=None,
+        help="Save a checkpoint here periodically and at the end (overrides simulation.checkpoint_file)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the checkpoint file up to --steps, appending to the JSONL --log-file",
+    )
+
+    subcommands = parser.add_subparsers(dest="command", metavar="{bench,ensemble}")
+    bench_parser = subcommands.add_parser(
+        "bench",
+        help="Run the benchmark suite (see simulated_city.benchmarks)",
+        description="Benchmark simulation, status encoding, log I/O and dashboard ingest.",
+    )
+    benchmarks.add_arguments(bench_parser)
+    ensemble_parser = subcommands.add_parser(
+        "ensemble",
+        help="Run many replicates and print aggregate statistics (see simulated_city.ensemble)",
+        description="Monte Carlo ensemble: time-to-80%%/full, fill quantiles and P(all full) per location.",
+    )
+    ensemble.add_arguments(ensemble_parser)
 
     args = parser.parse_args()
 
+    if args.command == "bench":
+        raise SystemExit(benchmarks.run_cli(args))
+
     cfg = load_config()
 
+    if args.command == "ensemble":
+        raise SystemExit(ensemble.run_cli(args, cfg.simulation))
+
     if args.steps and args.steps > 0:
         run_simulation(
             cfg,
@@ -39,6 +129,16 @@ def main() -> None:
             dry_run=bool(args.dry_run),
             seed_override=args.seed,
             log_file=args.log_file,
+            engine=args.engine,
+            workers=args.workers,
+            log_format=args.log_format,
+            metrics=bool(args.metrics),
+            metrics_file=args.metrics_file,
+            metrics_port=args.metrics_port,
+            speed=args.speed,
+            catch_up=args.catch_up,
+            checkpoint_file=args.checkpoint_file,
+            resume=bool(args.resume),
         )
         return
 
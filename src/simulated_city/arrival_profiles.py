@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+"""Time-varying arrival probabilities.
+
+By default every location has the same constant `arrival_prob`. With
+`simulation.arrival_profiles`, deposits follow daily and weekly cycles:
+
+- a profile holds a factor per hour of the week (7 x 24, Monday first)
+- each location uses its `profile` (or the profile named "default") and its
+  own `arrival_scale`
+- a timestep's probability is ``arrival_prob * factor * arrival_scale``
+  (capped at 1), using the local hour in `profile_timezone` at the start of
+  the timestep; dates listed in `holidays` use the Sunday factors
+- with ``arrival_model: poisson`` the table holds mean arrivals per timestep
+  instead, ``arrival_rate * factor * arrival_scale`` (not capped)
+
+The date math is done once per timestep, not per location: `ArrivalTable`
+precomputes a 168-entry probability table for each distinct (profile,
+arrival_scale) pair, and maps each timestep to its hour of the week. An
+engine's hot loop then reads one probability per location from the row of
+the current hour, which is built once and reused for every timestep in that
+hour.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from zoneinfo import ZoneInfo
+
+from .config import MAX_ARRIVAL_RATE, SimulationConfig
+
+
+_SUNDAY = 6
+
+# Timesteps mapped to hours of the week per extension of the table.
+_SLOT_BLOCK = 4096
+
+
+def base_arrival_rate(sim_cfg: SimulationConfig) -> float:
+    """Arrival probability, or mean arrivals per timestep with the "poisson" model."""
+
+    if sim_cfg.arrival_model == "poisson" and sim_cfg.arrival_rate is not None:
+        return sim_cfg.arrival_rate
+    return sim_cfg.arrival_prob
+
+
+def uses_arrival_profiles(sim_cfg: SimulationConfig) -> bool:
+    """True if arrival probabilities vary by time or location."""
+
+    return bool(sim_cfg.arrival_profiles) or any(loc.arrival_scale != 1.0 for loc in sim_cfg.locations)
+
+
+class ArrivalTable:
+    """Per-timestep, per-location arrival probabilities for one run.
+
+    `group_probs[group][hour_of_week]` holds the probabilities of each
+    (profile, arrival_scale) group and `location_groups[location_index]` the
+    group of each location. `step_probs(timestep_index)` returns the row of
+    all locations for a timestep. `max_probs` is each location's highest
+    probability over the week. With the "poisson" arrival model the entries
+    are mean arrivals per timestep rather than probabilities.
+    """
+
+    def __init__(self, sim_cfg: SimulationConfig, start_ts: datetime) -> None:
+        profiles = {p.profile_id: p.factors for p in sim_cfg.arrival_profiles}
+        flat = ((1.0,) * 24,) * 7
+        default = profiles.get("default", flat)
+
+        poisson = sim_cfg.arrival_model == "poisson"
+        rate = base_arrival_rate(sim_cfg)
+        groups: dict[tuple[str | None, float], int] = {}
+        self.group_probs: list[list[float]] = []
+        self.location_groups: list[int] = []
+        for loc in sim_cfg.locations:
+            key = (loc.profile, loc.arrival_scale)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = len(self.group_probs)
+                factors = profiles[loc.profile] if loc.profile is not None else default
+                base = rate * loc.arrival_scale
+                if poisson:
+                    self.group_probs.append([base * f for day in factors for f in day])
+                else:
+                    self.group_probs.append([min(1.0, base * f) for day in factors for f in day])
+            self.location_groups.append(group)
+
+        group_max = [max(probs) for probs in self.group_probs]
+        if poisson and group_max and max(group_max) > MAX_ARRIVAL_RATE:
+            raise ValueError(
+                f"arrival profiles give up to {max(group_max):g} arrivals per timestep "
+                f"(at most {MAX_ARRIVAL_RATE:g}); use a shorter timestep_minutes"
+            )
+        self.max_probs: list[float] = [group_max[g] for g in self.location_groups]
+
+        self._start_ts = start_ts if start_ts.tzinfo is not None else start_ts.replace(tzinfo=timezone.utc)
+        self._step = timedelta(minutes=sim_cfg.timestep_minutes)
+        self._tz = ZoneInfo(sim_cfg.profile_timezone)
+        self._holidays = frozenset(sim_cfg.holidays)
+        self._slots: list[int] = []
+        self._row_slot = -1
+        self._row: list[float] = []
+
+    @classmethod
+    def for_config(cls, sim_cfg: SimulationConfig, start_ts: datetime | None = None) -> "ArrivalTable | None":
+        """Table for `sim_cfg`, or None if every location uses the constant `arrival_prob`.
+
+        `start_ts` defaults to `simulation.start_time`, then to the current time.
+        """
+
+        if not uses_arrival_profiles(sim_cfg):
+            return None
+        return cls(sim_cfg, start_ts or sim_cfg.start_time or datetime.now(timezone.utc))
+
+    def _extend(self, timestep_index: int) -> None:
+        slots = self._slots
+        end = (timestep_index // _SLOT_BLOCK + 1) * _SLOT_BLOCK
+        for step in range(len(slots), end):
+            local = (self._start_ts + step * self._step).astimezone(self._tz)
+            day = _SUNDAY if local.date() in self._holidays else local.weekday()
+            slots.append(day * 24 + local.hour)
+
+    def slot(self, timestep_index: int) -> int:
+        """Hour of the week (0 = Monday 00:00) of a timestep."""
+
+        if timestep_index >= len(self._slots):
+            self._extend(timestep_index)
+        return self._slots[timestep_index]
+
+    def step_probs(self, timestep_index: int) -> Sequence[float]:
+        """Arrival probability of every location in timestep `timestep_index`."""
+
+        slot = self.slot(timestep_index)
+        if slot != self._row_slot:
+            by_group = [probs[slot] for probs in self.group_probs]
+            self._row = [by_group[g] for g in self.location_groups]
+            self._row_slot = slot
+        return self._row
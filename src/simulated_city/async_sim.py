@@ -0,0 +1,488 @@
+from __future__ import annotations
+
+"""Asyncio variant of the simulation loop and publishers.
+
+`run_simulation` blocks its thread and drives MQTT through paho's network
+thread. This module offers the same loop as coroutines, so one event loop can
+run several simulations, dashboard feeds and publishers side by side:
+
+- `AsyncStatusPublisher` mirrors `StatusPublisher` with awaitable hooks.
+- `AsyncMqttStatusPublisher` pipelines QoS 1 messages over an
+  `AsyncMqttClient` (see :mod:`simulated_city.mqtt`): up to `window` messages
+  are in flight and their acknowledgements are awaited concurrently.
+- `AsyncJsonlFileStatusPublisher` buffers JSONL lines and writes full chunks
+  from a worker thread, so disk latency does not stall the loop.
+- `AsyncQueueStatusPublisher` feeds encoded messages to an `asyncio.Queue`
+  (for example a dashboard task).
+- `SyncStatusPublisherAdapter` wraps an existing non-network publisher.
+
+Engine steps still run on the loop's thread: every timestep yields to the
+loop, but a single large step blocks it for as long as it takes.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import io
+import sys
+import time
+from typing import Sequence
+
+from .collection import CollectionScheduler
+from .config import AppConfig, MqttConfig, SimulationConfig
+from .mqtt import AsyncMqttClient, connect_mqtt_async, raise_inflight_limit
+from .pacing import PacingScheduler, pacer_for_config
+from .rubbish_sim import (
+    ContainerName,
+    LocationState,
+    SimulationEngine,
+    StatusEncoder,
+    StatusPublisher,
+    StdoutStatusPublisher,
+    make_engine,
+    step_events,
+)
+
+
+class AsyncStatusPublisher:
+    """Awaitable counterpart of `StatusPublisher`.
+
+    Only `publish_status` is required; `end_step` and `close` default to
+    doing nothing. Implementations should return without suspending unless
+    they need to (a full buffer or window), since every event is awaited.
+    """
+
+    async def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        raise NotImplementedError
+
+    async def end_step(self, timestep_index: int) -> None:
+        """Called by `run_steps_async` after all events of a timestep."""
+
+        return
+
+    async def close(self) -> None:
+        """Deliver anything still buffered. Called once at the end of a run."""
+
+        return
+
+
+@dataclass(frozen=True, slots=True)
+class SyncStatusPublisherAdapter(AsyncStatusPublisher):
+    """Use a blocking `StatusPublisher` from the event loop.
+
+    The wrapped calls run on the loop's thread, so only wrap publishers that
+    do not wait on the network (stdout, binary or Parquet logs).
+    """
+
+    inner: StatusPublisher
+
+    async def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        self.inner.publish_status(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+
+    async def end_step(self, timestep_index: int) -> None:
+        self.inner.end_step(timestep_index)
+
+    async def close(self) -> None:
+        self.inner.close()
+
+
+@dataclass(frozen=True, slots=True)
+class AsyncTeeStatusPublisher(AsyncStatusPublisher):
+    """Fan-out publisher that forwards to multiple async publishers."""
+
+    publishers: tuple[AsyncStatusPublisher, ...]
+
+    async def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        # Awaited in turn: publishers rarely suspend, and a task per event
+        # would cost more than it saves.
+        for p in self.publishers:
+            await p.publish_status(
+                ts=ts,
+                location=location,
+                container=container,
+                fill_pct=fill_pct,
+                timestep_index=timestep_index,
+                event=event,
+            )
+
+    async def end_step(self, timestep_index: int) -> None:
+        for p in self.publishers:
+            await p.end_step(timestep_index)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(p.close() for p in self.publishers))
+
+
+@dataclass(slots=True)
+class AsyncJsonlFileStatusPublisher(AsyncStatusPublisher):
+    """Async counterpart of `BufferedJsonlFileStatusPublisher`.
+
+    Writes the same lines with the same flush policy, but each chunk is
+    written and flushed by a worker thread. Chunks are written one at a time
+    and in order, so several simulations may share one instance (and file).
+    The file itself is not closed.
+    """
+
+    mqtt_cfg: MqttConfig
+    fp: io.TextIOBase
+    flush_every_events: int = 1000
+    flush_every_bytes: int = 1 << 20
+    flush_interval_s: float = 1.0
+    _lines: list[str] = field(default_factory=list, repr=False)
+    _buffered_chars: int = field(default=0, repr=False)
+    _last_flush: float = field(default_factory=time.monotonic, repr=False)
+    _write_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    _encoder: StatusEncoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._encoder = StatusEncoder.for_mqtt(self.mqtt_cfg)
+
+    async def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        line = self._encoder.jsonl_line(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+        self._lines.append(line)
+        self._buffered_chars += len(line)
+
+        if len(self._lines) >= self.flush_every_events or self._buffered_chars >= self.flush_every_bytes:
+            await self.flush()
+
+    async def end_step(self, timestep_index: int) -> None:
+        if self._lines and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered lines and flush the file."""
+
+        # Take the buffer before suspending; events published meanwhile
+        # start the next chunk.
+        chunk = "".join(self._lines)
+        self._lines = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+        async with self._write_lock:
+            await asyncio.to_thread(_write_chunk, self.fp, chunk)
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+def _write_chunk(fp: io.TextIOBase, chunk: str) -> None:
+    if chunk:
+        fp.write(chunk)
+    fp.flush()
+
+
+@dataclass(slots=True)
+class AsyncQueueStatusPublisher(AsyncStatusPublisher):
+    """Put ``(topic, payload)`` pairs on an `asyncio.Queue`.
+
+    The items match what an MQTT subscriber would receive. A bounded queue
+    makes the simulation wait for a slow consumer.
+    """
+
+    mqtt_cfg: MqttConfig
+    queue: asyncio.Queue[tuple[str, str]]
+    _encoder: StatusEncoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._encoder = StatusEncoder.for_mqtt(self.mqtt_cfg)
+
+    async def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        item = self._encoder.encode(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+        if self.queue.full():
+            await self.queue.put(item)
+        else:
+            self.queue.put_nowait(item)
+
+
+@dataclass(slots=True)
+class AsyncMqttStatusPublisher(AsyncStatusPublisher):
+    """Publish retained QoS 1 status messages with a sliding window of acks.
+
+    `publish_status` only suspends while `window` messages are unacknowledged,
+    and then only until the next acknowledgement arrives. `close()` waits up
+    to `ack_timeout_s` for the rest.
+
+    Counters (as on `WindowedMqttStatusPublisher`):
+    - `published`: messages handed to the MQTT client
+    - `acked`: messages confirmed by the broker
+    - `dropped`: messages the client refused or that failed while in flight
+    - `unacked`: messages still unconfirmed when `close()` gave up waiting
+    """
+
+    client: AsyncMqttClient
+    mqtt_cfg: MqttConfig
+    window: int = 1000
+    ack_timeout_s: float = 10.0
+    published: int = 0
+    acked: int = 0
+    dropped: int = 0
+    unacked: int = 0
+    _in_flight: set[asyncio.Future[None]] = field(default_factory=set, repr=False)
+    _encoder: StatusEncoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.window <= 0:
+            raise ValueError("window must be > 0")
+        self._encoder = StatusEncoder.for_mqtt(self.mqtt_cfg)
+        # paho only sends 20 QoS>0 messages concurrently by default.
+        raise_inflight_limit(self.client.client, self.window)
+
+    async def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        full_topic, payload = self._encoder.encode(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+        ack = self.client.publish(full_topic, payload, qos=1, retain=True)
+        self.published += 1
+        self._in_flight.add(ack)
+        ack.add_done_callback(self._on_ack)
+
+        while len(self._in_flight) >= self.window:
+            await asyncio.wait(tuple(self._in_flight), return_when=asyncio.FIRST_COMPLETED)
+
+    @property
+    def in_flight(self) -> int:
+        """Messages handed to the client and not yet acknowledged."""
+
+        return len(self._in_flight)
+
+    async def close(self) -> None:
+        if self._in_flight:
+            await asyncio.wait(tuple(self._in_flight), timeout=self.ack_timeout_s)
+            # Let the done callbacks of the last acknowledgements run.
+            await asyncio.sleep(0)
+        for ack in self._in_flight:
+            ack.remove_done_callback(self._on_ack)
+        self.unacked += len(self._in_flight)
+        self._in_flight.clear()
+
+    def _on_ack(self, ack: asyncio.Future[None]) -> None:
+        self._in_flight.discard(ack)
+        if ack.cancelled() or ack.exception() is not None:
+            self.dropped += 1
+        else:
+            self.acked += 1
+
+
+async def run_steps_async(
+    sim_engine: SimulationEngine,
+    publisher: AsyncStatusPublisher,
+    *,
+    sim_cfg: SimulationConfig,
+    steps: int,
+    start_ts: datetime,
+    pacer: PacingScheduler | None = None,
+    collector: CollectionScheduler | None = None,
+) -> None:
+    """Async counterpart of `run_steps`; publishes the same events in the same order.
+
+    Yields to the event loop after every timestep. With `pacer`, each
+    timestep awaits its wall-clock deadline instead of blocking in `sleep`.
+    """
+
+    for location_index in range(sim_engine.location_count):
+        loc_state = sim_engine.location_state(location_index)
+        for container_name in ("left", "center", "right"):
+            await publisher.publish_status(
+                ts=start_ts,
+                location=loc_state,
+                container=container_name,
+                fill_pct=getattr(loc_state, container_name).fill_pct,
+                timestep_index=-1,
+                event="init",
+            )
+
+    if pacer is not None:
+        pacer.start()
+
+    for timestep_index in range(steps):
+        ts = start_ts + timedelta(minutes=sim_cfg.timestep_minutes * timestep_index)
+        events = step_events(sim_engine, sim_cfg=sim_cfg, timestep_index=timestep_index, collector=collector)
+        for location, container, fill_pct, event in events:
+            await publisher.publish_status(
+                ts=ts,
+                location=location,
+                container=container,
+                fill_pct=fill_pct,
+                timestep_index=timestep_index,
+                event=event,
+            )
+        await publisher.end_step(timestep_index)
+
+        # sleep(0) still lets other simulations and publishers run.
+        await asyncio.sleep(pacer.next_delay() if pacer is not None else 0)
+
+
+async def run_simulation_async(
+    cfg: AppConfig,
+    *,
+    steps: int,
+    dry_run: bool = False,
+    seed_override: int | None = None,
+    log_file: str | None = None,
+    engine: str = "python",
+    speed: float | None = None,
+    catch_up: bool | None = None,
+    mqtt_client: AsyncMqttClient | None = None,
+    publishers: Sequence[AsyncStatusPublisher] = (),
+) -> None:
+    """Async counterpart of `run_simulation`.
+
+    `log_file` is written as JSONL. Unless `dry_run`, events are published
+    over MQTT through `mqtt_client`, or through a client connected (and
+    disconnected) by this run; pass one client to share its connection
+    between concurrent runs. `publishers` are added to the run's own sinks
+    and closed with them.
+    """
+
+    if steps <= 0:
+        raise ValueError("steps must be > 0")
+
+    sim_cfg = cfg.simulation
+    if sim_cfg is None or not sim_cfg.locations:
+        raise ValueError("No simulation configured. Add a 'simulation.locations' section in config.yaml.")
+
+    seed = seed_override if seed_override is not None else sim_cfg.seed
+    pacer = pacer_for_config(sim_cfg, speed=speed, catch_up=catch_up)
+    start_ts = sim_cfg.start_time or datetime.now(timezone.utc)
+    sim_engine = make_engine(engine, sim_cfg, seed=seed, start_ts=start_ts)
+    collector = CollectionScheduler(sim_cfg) if sim_cfg.collection is not None else None
+
+    sinks: list[AsyncStatusPublisher] = list(publishers)
+    own_client: AsyncMqttClient | None = None
+    log_fp: io.TextIOWrapper | None = None
+    mqtt_publisher: AsyncMqttStatusPublisher | None = None
+
+    try:
+        if log_file:
+            log_fp = open(log_file, "w", encoding="utf-8", buffering=sim_cfg.log_flush_every_bytes)
+            sinks.append(
+                AsyncJsonlFileStatusPublisher(
+                    mqtt_cfg=cfg.mqtt,
+                    fp=log_fp,
+                    flush_every_events=sim_cfg.log_flush_every_events,
+                    flush_every_bytes=sim_cfg.log_flush_every_bytes,
+                    flush_interval_s=sim_cfg.log_flush_interval_s,
+                )
+            )
+
+        # A window of 1 waits for every acknowledgement, like MqttStatusPublisher.
+        window = max(sim_cfg.mqtt_publish_window, 1)
+        if dry_run:
+            sinks.append(SyncStatusPublisherAdapter(StdoutStatusPublisher(mqtt_cfg=cfg.mqtt)))
+        else:
+            if mqtt_client is None:
+                mqtt_client = own_client = await connect_mqtt_async(
+                    cfg.mqtt,
+                    client_id_suffix="rubbish-sim",
+                    max_inflight_messages=window,
+                )
+            mqtt_publisher = AsyncMqttStatusPublisher(client=mqtt_client, mqtt_cfg=cfg.mqtt, window=window)
+            sinks.append(mqtt_publisher)
+
+        publisher = AsyncTeeStatusPublisher(publishers=tuple(sinks)) if len(sinks) > 1 else sinks[0]
+        try:
+            await run_steps_async(
+                sim_engine,
+                publisher,
+                sim_cfg=sim_cfg,
+                steps=steps,
+                start_ts=start_ts,
+                pacer=pacer,
+                collector=collector,
+            )
+        finally:
+            await publisher.close()
+            if pacer is not None:
+                print(pacer.format_summary(), file=sys.stderr)
+            if mqtt_publisher is not None and (mqtt_publisher.dropped or mqtt_publisher.unacked):
+                print(
+                    f"WARNING: MQTT published={mqtt_publisher.published} acked={mqtt_publisher.acked} "
+                    f"dropped={mqtt_publisher.dropped} unacked={mqtt_publisher.unacked}",
+                    file=sys.stderr,
+                )
+    finally:
+        sim_engine.close()
+        if log_fp is not None:
+            log_fp.close()
+        if own_client is not None:
+            await own_client.disconnect()
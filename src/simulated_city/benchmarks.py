@@ -0,0 +1,517 @@
+from __future__ import annotations
+
+"""Benchmark suite for the simulator, status encoding, log I/O and dashboard ingest.
+
+Run from the command line:
+
+    python -m simulated_city bench --quick
+    python -m simulated_city bench --output bench.json
+    python -m simulated_city bench --baseline bench.json --group simulate
+
+or through pytest (the ``benchmark`` marker is deselected by default):
+
+    python -m pytest -m benchmark
+
+Each scenario reports wall time, steps/s, events/s and peak RSS. Results are
+stored as JSON keyed by scenario name, so a later run can be compared against
+a saved baseline (`compare_results`).
+
+Scenario groups:
+
+- ``simulate``: `run_steps` for 1/100/10k/100k locations, boundary vs
+  every-deposit publishing, into a no-op or JSONL file sink
+- ``encode``: `make_status_payload` + `mqtt.topic` vs `StatusEncoder`
+- ``publish``: `JsonlFileStatusPublisher` vs `BufferedJsonlFileStatusPublisher`
+- ``ingest``: loading JSONL logs of several sizes into a DataFrame or an
+  `EventStore` (requires NumPy + pandas; skipped otherwise)
+
+By default every scenario runs in a fresh process so peak RSS belongs to that
+scenario alone. With ``--no-isolate`` (and under pytest) scenarios share the
+current process and peak RSS is the process peak so far.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import platform
+import sys
+import tempfile
+import time
+from typing import Any
+
+from .config import MqttConfig, SimulationConfig, SimulationLocationConfig
+from .mqtt import topic
+from .rubbish_sim import (
+    BufferedJsonlFileStatusPublisher,
+    ContainerName,
+    ContainerState,
+    JsonlFileStatusPublisher,
+    LocationState,
+    StatusEncoder,
+    StatusPublisher,
+    make_engine,
+    make_status_payload,
+    run_steps,
+)
+
+
+BENCHMARK_GROUPS = ("simulate", "encode", "publish", "ingest")
+RESULTS_VERSION = 1
+
+BENCH_SEED = 12345
+BENCH_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+BENCH_MQTT = MqttConfig(
+    host="localhost",
+    port=1883,
+    tls=False,
+    username=None,
+    password=None,
+    client_id_prefix="bench",
+    keepalive_s=60,
+    base_topic="simulated-city",
+)
+
+_CONTAINERS: tuple[ContainerName, ...] = ("left", "center", "right")
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkScenario:
+    group: str
+    params: dict[str, Any]
+
+    @property
+    def name(self) -> str:
+        args = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.group}[{args}]"
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    """Measurements for one scenario (best wall time of `repeat` runs)."""
+
+    name: str
+    group: str
+    params: dict[str, Any]
+    wall_s: float
+    steps: int
+    events: int
+    peak_rss_mib: float | None
+    skipped: str | None = None
+
+    @property
+    def steps_per_s(self) -> float | None:
+        return self.steps / self.wall_s if self.steps and self.wall_s > 0 else None
+
+    @property
+    def events_per_s(self) -> float | None:
+        return self.events / self.wall_s if self.events and self.wall_s > 0 else None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "steps_per_s": self.steps_per_s, "events_per_s": self.events_per_s}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "BenchmarkResult":
+        return cls(
+            name=str(data["name"]),
+            group=str(data["group"]),
+            params=dict(data.get("params") or {}),
+            wall_s=float(data["wall_s"]),
+            steps=int(data["steps"]),
+            events=int(data["events"]),
+            peak_rss_mib=None if data.get("peak_rss_mib") is None else float(data["peak_rss_mib"]),
+            skipped=data.get("skipped"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative change (current / baseline - 1)."""
+
+        return self.current / self.baseline - 1.0
+
+
+def default_scenarios(*, quick: bool = False, groups: tuple[str, ...] = BENCHMARK_GROUPS) -> list[BenchmarkScenario]:
+    """Return the standard scenario matrix.
+
+    `quick` shrinks every scenario (and drops the 100k-location runs) so the
+    whole suite finishes in seconds, e.g. under pytest.
+    """
+
+    unknown = set(groups) - set(BENCHMARK_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark group(s): {', '.join(sorted(unknown))}")
+
+    # Simulated work per scenario, in location-timesteps.
+    budget, max_steps = (20_000, 2_000) if quick else (1_000_000, 100_000)
+    location_counts = (1, 100, 10_000) if quick else (1, 100, 10_000, 100_000)
+    event_count = 20_000 if quick else 500_000
+    log_lines = (10_000,) if quick else (10_000, 100_000, 1_000_000)
+
+    scenarios: list[BenchmarkScenario] = []
+    if "simulate" in groups:
+        for locations in location_counts:
+            steps = min(max_steps, max(2, budget // locations))
+            for publish in ("boundary", "every-deposit"):
+                for sink in ("noop", "file"):
+                    scenarios.append(
+                        BenchmarkScenario(
+                            "simulate",
+                            {"engine": "python", "locations": locations, "steps": steps, "publish": publish, "sink": sink},
+                        )
+                    )
+    if "encode" in groups:
+        for method in ("make_status_payload", "status_encoder"):
+            scenarios.append(BenchmarkScenario("encode", {"method": method, "events": event_count}))
+    if "publish" in groups:
+        for publisher in ("jsonl", "jsonl_buffered"):
+            scenarios.append(BenchmarkScenario("publish", {"publisher": publisher, "events": event_count // 4}))
+    if "ingest" in groups:
+        for lines in log_lines:
+            for method in ("events_to_frame", "read_jsonl_frame", "event_store"):
+                scenarios.append(BenchmarkScenario("ingest", {"method": method, "lines": lines}))
+    return scenarios
+
+
+def peak_rss_mib() -> float | None:
+    """Peak resident set size of the current process in MiB (None if unknown)."""
+
+    try:
+        import resource
+    except ModuleNotFoundError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---------------------------------------------------------------------------
+# Scenario bodies. Each returns (wall_s, steps, events) and times only the
+# measured section, not the setup.
+
+
+@dataclass(slots=True)
+class _CountingPublisher(StatusPublisher):
+    """No-op sink that only counts events."""
+
+    events: int = 0
+
+    def publish_status(self, **kwargs: Any) -> None:
+        self.events += 1
+
+
+def _bench_locations(count: int) -> tuple[SimulationLocationConfig, ...]:
+    return tuple(
+        SimulationLocationConfig(location_id=f"bin-{i:06d}", lat=55.6 + (i % 1000) * 1e-4, lon=12.5 + (i // 1000) * 1e-4)
+        for i in range(count)
+    )
+
+
+def _bench_location_states(count: int) -> list[LocationState]:
+    empty = ContainerState(fill_pct=0)
+    return [
+        LocationState(location_id=loc.location_id, lat=loc.lat, lon=loc.lon, left=empty, center=empty, right=empty)
+        for loc in _bench_locations(count)
+    ]
+
+
+def _bench_simulate(params: dict[str, Any], workdir: Path) -> tuple[float, int, int]:
+    sim_cfg = SimulationConfig(
+        publish_every_deposit=params["publish"] == "every-deposit",
+        seed=BENCH_SEED,
+        locations=_bench_locations(int(params["locations"])),
+    )
+    steps = int(params["steps"])
+    engine = make_engine(str(params["engine"]), sim_cfg, seed=BENCH_SEED)
+    try:
+        if params["sink"] == "noop":
+            counter = _CountingPublisher()
+            t0 = time.perf_counter()
+            run_steps(engine, counter, sim_cfg=sim_cfg, steps=steps, start_ts=BENCH_START)
+            counter.close()
+            return time.perf_counter() - t0, steps, counter.events
+
+        # Same file setup as `run_simulation` uses for --log-file.
+        path = workdir / "simulate.jsonl"
+        with open(path, "w", encoding="utf-8", buffering=sim_cfg.log_flush_every_bytes) as fp:
+            publisher = BufferedJsonlFileStatusPublisher(
+                mqtt_cfg=BENCH_MQTT,
+                fp=fp,
+                flush_every_events=sim_cfg.log_flush_every_events,
+                flush_every_bytes=sim_cfg.log_flush_every_bytes,
+                flush_interval_s=sim_cfg.log_flush_interval_s,
+            )
+            t0 = time.perf_counter()
+            run_steps(engine, publisher, sim_cfg=sim_cfg, steps=steps, start_ts=BENCH_START)
+            publisher.close()
+            fp.flush()
+            wall = time.perf_counter() - t0
+        with open(path, "rb") as f:
+            events = sum(1 for _ in f)
+        return wall, steps, events
+    finally:
+        engine.close()
+
+
+def _synthetic_events(count: int, *, locations: int = 200):
+    """Yield `count` (ts, location, container, fill_pct, step) status events."""
+
+    states = _bench_location_states(locations)
+    for n in range(count):
+        step, i = divmod(n, locations)
+        yield (
+            BENCH_START + timedelta(minutes=15 * step),
+            states[i],
+            _CONTAINERS[(i + step) % 3],
+            (step * 2) % 101,
+            step,
+        )
+
+
+def _bench_encode(params: dict[str, Any], workdir: Path) -> tuple[float, int, int]:
+    events = list(_synthetic_events(int(params["events"])))
+    t0 = time.perf_counter()
+    if params["method"] == "make_status_payload":
+        for ts, loc, container, fill_pct, step in events:
+            make_status_payload(ts=ts, location=loc, container=container, fill_pct=fill_pct, timestep_index=step)
+            topic(BENCH_MQTT, f"bins/{loc.location_id}/{container}/status")
+    else:
+        encoder = StatusEncoder.for_mqtt(BENCH_MQTT)
+        for ts, loc, container, fill_pct, step in events:
+            encoder.encode(ts=ts, location=loc, container=container, fill_pct=fill_pct, timestep_index=step)
+    return time.perf_counter() - t0, 0, len(events)
+
+
+def _bench_publish(params: dict[str, Any], workdir: Path) -> tuple[float, int, int]:
+    events = list(_synthetic_events(int(params["events"])))
+    path = workdir / "publish.jsonl"
+    with open(path, "w", encoding="utf-8") as fp:
+        publisher: StatusPublisher
+        if params["publisher"] == "jsonl":
+            publisher = JsonlFileStatusPublisher(mqtt_cfg=BENCH_MQTT, fp=fp)
+        else:
+            publisher = BufferedJsonlFileStatusPublisher(mqtt_cfg=BENCH_MQTT, fp=fp)
+        t0 = time.perf_counter()
+        for ts, loc, container, fill_pct, step in events:
+            publisher.publish_status(ts=ts, location=loc, container=container, fill_pct=fill_pct, timestep_index=step)
+        publisher.close()
+        fp.flush()
+        wall = time.perf_counter() - t0
+    return wall, 0, len(events)
+
+
+def _write_bench_log(path: Path, lines: int) -> None:
+    with open(path, "w", encoding="utf-8") as fp:
+        publisher = BufferedJsonlFileStatusPublisher(mqtt_cfg=BENCH_MQTT, fp=fp)
+        for ts, loc, container, fill_pct, step in _synthetic_events(lines):
+            publisher.publish_status(ts=ts, location=loc, container=container, fill_pct=fill_pct, timestep_index=step)
+        publisher.close()
+
+
+def _bench_ingest(params: dict[str, Any], workdir: Path) -> tuple[float, int, int]:
+    # NumPy + pandas are optional; a missing one skips the scenario.
+    from .dashboard_data import (
+        EventStore,
+        event_from_payload,
+        events_to_frame,
+        read_jsonl_all,
+        read_jsonl_frame,
+        read_jsonl_incremental,
+    )
+
+    lines = int(params["lines"])
+    path = workdir / f"ingest-{lines}.jsonl"
+    if not path.exists():
+        _write_bench_log(path, lines)
+
+    t0 = time.perf_counter()
+    if params["method"] == "events_to_frame":
+        rows = len(events_to_frame([event_from_payload(p) for p in read_jsonl_all(str(path))]))
+    elif params["method"] == "read_jsonl_frame":
+        rows = len(read_jsonl_frame(str(path), workers=1))
+    else:
+        # What the dashboard does for a JSONL log source.
+        store = EventStore()
+        payloads, _ = read_jsonl_incremental(str(path), 0)
+        store.ingest_payloads(payloads)
+        rows = len(store)
+    return time.perf_counter() - t0, 0, rows
+
+
+_BENCHMARKS = {
+    "simulate": _bench_simulate,
+    "encode": _bench_encode,
+    "publish": _bench_publish,
+    "ingest": _bench_ingest,
+}
+
+
+def _run_in_process(scenario: BenchmarkScenario, repeat: int, workdir: str | None) -> BenchmarkResult:
+    body = _BENCHMARKS[scenario.group]
+    with tempfile.TemporaryDirectory(prefix="simcity-bench-", dir=workdir) as tmp:
+        try:
+            runs = [body(scenario.params, Path(tmp)) for _ in range(repeat)]
+        except ModuleNotFoundError as e:
+            return BenchmarkResult(scenario.name, scenario.group, scenario.params, 0.0, 0, 0, None, skipped=str(e))
+    wall, steps, events = min(runs)
+    return BenchmarkResult(scenario.name, scenario.group, scenario.params, wall, steps, events, peak_rss_mib())
+
+
+def run_scenario(
+    scenario: BenchmarkScenario,
+    *,
+    repeat: int = 1,
+    isolate: bool = False,
+    workdir: str | None = None,
+) -> BenchmarkResult:
+    """Run one scenario `repeat` times and keep the fastest run.
+
+    With `isolate` the scenario runs in a freshly spawned process, so
+    `peak_rss_mib` is not inflated by earlier scenarios.
+    """
+
+    if repeat <= 0:
+        raise ValueError("repeat must be > 0")
+    if not isolate:
+        return _run_in_process(scenario, repeat, workdir)
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(_run_in_process, scenario, repeat, workdir).result()
+
+
+def write_results(path: str, results: list[BenchmarkResult], *, quick: bool = False) -> None:
+    """Write results (plus machine info) as JSON."""
+
+    data = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": quick,
+        "results": [r.to_dict() for r in results],
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def load_results(path: str) -> list[BenchmarkResult]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version in {path}: {data.get('version')!r}")
+    return [BenchmarkResult.from_dict(r) for r in data["results"]]
+
+
+def compare_results(
+    current: list[BenchmarkResult],
+    baseline: list[BenchmarkResult],
+    *,
+    tolerance: float = 0.10,
+) -> list[Regression]:
+    """Return the scenarios that got slower (or used more memory) than `baseline`.
+
+    A regression is a throughput drop, or a peak RSS increase, of more than
+    `tolerance` (relative). Scenarios missing from either side, or skipped,
+    are ignored.
+    """
+
+    by_name = {r.name: r for r in baseline if r.skipped is None}
+    regressions: list[Regression] = []
+    for result in current:
+        base = by_name.get(result.name)
+        if base is None or result.skipped is not None:
+            continue
+        for metric in ("events_per_s", "steps_per_s"):
+            before, after = getattr(base, metric), getattr(result, metric)
+            if before and after is not None and after < before * (1.0 - tolerance):
+                regressions.append(Regression(result.name, metric, before, after))
+        if base.peak_rss_mib and result.peak_rss_mib is not None:
+            if result.peak_rss_mib > base.peak_rss_mib * (1.0 + tolerance):
+                regressions.append(Regression(result.name, "peak_rss_mib", base.peak_rss_mib, result.peak_rss_mib))
+    return regressions
+
+
+def _fmt_rate(value: float | None) -> str:
+    return "-" if value is None else f"{value:,.0f}"
+
+
+def format_result(result: BenchmarkResult) -> str:
+    if result.skipped is not None:
+        return f"{result.name:<78} skipped: {result.skipped}"
+    rss = "-" if result.peak_rss_mib is None else f"{result.peak_rss_mib:.0f}"
+    return (
+        f"{result.name:<78} {result.wall_s:>9.3f}s {_fmt_rate(result.steps_per_s):>12} steps/s "
+        f"{_fmt_rate(result.events_per_s):>12} events/s {rss:>6} MiB"
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the `bench` subcommand options to `parser`."""
+
+    parser.add_argument("--quick", action="store_true", help="Small scenarios only (seconds instead of minutes)")
+    parser.add_argument(
+        "--group",
+        action="append",
+        choices=BENCHMARK_GROUPS,
+        default=None,
+        help="Only run this scenario group (repeatable)",
+    )
+    parser.add_argument("--filter", default=None, help="Only run scenarios whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the fastest is kept")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--baseline", default=None, help="Compare against a results JSON from an earlier run")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Relative slowdown/RSS growth reported as a regression (default 0.10)",
+    )
+    parser.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="Run every scenario in this process (faster; peak RSS becomes cumulative)",
+    )
+
+
+def run_cli(args: argparse.Namespace) -> int:
+    """Run the benchmarks selected by `args`. Returns the process exit code."""
+
+    scenarios = default_scenarios(quick=args.quick, groups=tuple(args.group or BENCHMARK_GROUPS))
+    if args.filter:
+        scenarios = [s for s in scenarios if args.filter in s.name]
+
+    results: list[BenchmarkResult] = []
+    for scenario in scenarios:
+        result = run_scenario(scenario, repeat=args.repeat, isolate=not args.no_isolate)
+        print(format_result(result), flush=True)
+        results.append(result)
+
+    if args.output:
+        write_results(args.output, results, quick=args.quick)
+        print(f"wrote {args.output}")
+
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), tolerance=args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r.name} {r.metric}: {r.baseline:,.1f} -> {r.current:,.1f} ({r.change:+.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline}")
+    return 0
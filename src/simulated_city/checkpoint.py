@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+"""Checkpoints for resuming long simulation runs.
+
+A checkpoint holds everything a run needs to continue exactly where it
+stopped:
+
+- the next timestep index, the run's start timestamp and its seed
+- the engine state: every container's fill level, the position of every
+  location's random stream and the engine counters
+  (see `SimulationEngine.get_state`)
+- the collection scheduler's due locations, planned stops and trucks, if
+  `simulation.collection` is configured
+- the output position of publishers that can be rewound (the JSONL log)
+
+`run_simulation(checkpoint_file=...)` takes a checkpoint every
+`checkpoint_interval_s` seconds and at the end of the run, and
+`run_simulation(resume=True)` continues from it. The JSONL log is cut back
+to the checkpoint's offset before appending, so it ends up identical to the
+log of an uninterrupted run. MQTT cannot be rewound: events published after
+the last checkpoint are published again (they are retained, so subscribers
+end up with the same state).
+
+The engine state is copied on the simulation thread, but serializing and
+writing happen on a background thread. Files are replaced atomically, so a
+crash mid-write leaves the previous checkpoint intact.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Mapping
+
+from .arrival_profiles import uses_arrival_profiles
+from .config import SimulationConfig
+from .rubbish_sim import SimulationEngine, StatusPublisher, format_status_ts
+
+if TYPE_CHECKING:
+    from .collection import CollectionScheduler
+
+
+CHECKPOINT_VERSION = 1
+
+
+def config_digest(sim_cfg: SimulationConfig) -> str:
+    """Digest of the settings that shape a run's events.
+
+    A checkpoint only resumes a run whose configuration has the same digest;
+    pacing, logging and metrics settings may change between runs.
+    """
+
+    parts = (
+        sim_cfg.timestep_minutes,
+        sim_cfg.arrival_prob,
+        sim_cfg.bag_fill_delta_pct,
+        sim_cfg.status_boundary_pct,
+        sim_cfg.publish_every_deposit,
+        tuple((loc.location_id, loc.lat, loc.lon) for loc in sim_cfg.locations),
+    )
+    if uses_arrival_profiles(sim_cfg):
+        parts += (
+            sim_cfg.arrival_profiles,
+            sim_cfg.holidays,
+            sim_cfg.profile_timezone,
+            tuple((loc.profile, loc.arrival_scale) for loc in sim_cfg.locations),
+        )
+    if sim_cfg.arrival_model != "bernoulli":
+        parts += (sim_cfg.arrival_model, sim_cfg.arrival_rate)
+    if sim_cfg.collection is not None:
+        parts += (sim_cfg.collection,)
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class Checkpoint:
+    engine: str
+    seed: int
+    next_step: int
+    start_ts: datetime
+    config_digest: str
+    engine_state: dict[str, Any]
+    publisher_offsets: dict[str, int] = field(default_factory=dict)
+    collection_state: dict[str, Any] | None = None
+
+    def check_compatible(self, sim_cfg: SimulationConfig, *, engine: str) -> None:
+        """Raise ValueError unless this checkpoint can resume `engine` with `sim_cfg`."""
+
+        if engine != self.engine:
+            raise ValueError(f"checkpoint was written by the '{self.engine}' engine, not '{engine}'")
+        if config_digest(sim_cfg) != self.config_digest:
+            raise ValueError(
+                "checkpoint was written with different simulation settings or locations; "
+                "restore them or start a new run"
+            )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "engine": self.engine,
+            "seed": self.seed,
+            "next_step": self.next_step,
+            "start_ts": format_status_ts(self.start_ts),
+            "config_digest": self.config_digest,
+            "publisher_offsets": self.publisher_offsets,
+            "engine_state": self.engine_state,
+            "collection_state": self.collection_state,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Checkpoint":
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported checkpoint version {data.get('version')!r}")
+        start_ts = str(data["start_ts"])
+        if start_ts.endswith("Z"):
+            start_ts = start_ts[:-1] + "+00:00"
+        return cls(
+            engine=str(data["engine"]),
+            seed=int(data["seed"]),
+            next_step=int(data["next_step"]),
+            start_ts=datetime.fromisoformat(start_ts),
+            config_digest=str(data["config_digest"]),
+            engine_state=dict(data["engine_state"]),
+            publisher_offsets={str(k): int(v) for k, v in data.get("publisher_offsets", {}).items()},
+            collection_state=data.get("collection_state"),
+        )
+
+
+def write_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    """Write `checkpoint` as JSON, atomically replacing `path`."""
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint.to_dict(), f, separators=(",", ":"))
+        f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    with open(path, "r", encoding="utf-8") as f:
+        return Checkpoint.from_dict(json.load(f))
+
+
+def rewind_log(path: str, offset: int) -> None:
+    """Cut the log at `path` back to `offset` bytes, its size at the checkpoint."""
+
+    size = os.path.getsize(path)
+    if size < offset:
+        raise ValueError(f"{path} is shorter ({size} bytes) than at the checkpoint ({offset} bytes)")
+    os.truncate(path, offset)
+
+
+class Checkpointer:
+    """Take checkpoints during `run_steps` and write them on a background thread.
+
+    `maybe_checkpoint` is called after every timestep and snapshots the run
+    when `interval_s` has passed. If the engine cannot be captured at that
+    step (see `SimulationEngine.get_state`), the attempt is counted in
+    `skipped` and retried at the engine's `next_state_step()`. Only the
+    newest snapshot waiting to be written is kept.
+
+    `publishers` maps labels to publishers whose `checkpoint_offset` is
+    recorded, and `collector` is the run's collection scheduler, if any. Call
+    `close()` at the end of the run to wait for the last write;
+    a failed write is kept in `error` instead of interrupting the run.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        engine: str,
+        seed: int,
+        start_ts: datetime,
+        sim_cfg: SimulationConfig,
+        interval_s: float = 60.0,
+        publishers: Mapping[str, StatusPublisher] | None = None,
+        collector: CollectionScheduler | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.engine = engine
+        self.seed = seed
+        self.start_ts = start_ts
+        self.interval_s = interval_s
+        self.publishers = dict(publishers or {})
+        self.collector = collector
+        self.clock = clock
+        self.written = 0
+        self.skipped = 0
+        self.error: Exception | None = None
+
+        self._digest = config_digest(sim_cfg)
+        self._last = clock()
+        self._pending: Checkpoint | None = None
+        self._retry_at: int | None = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def maybe_checkpoint(self, sim_engine: SimulationEngine, next_step: int) -> None:
+        if self.clock() - self._last >= self.interval_s:
+            if self._retry_at is not None and next_step < self._retry_at:
+                return
+            self.checkpoint(sim_engine, next_step)
+
+    def checkpoint(self, sim_engine: SimulationEngine, next_step: int) -> bool:
+        """Snapshot the run before timestep `next_step` and queue it for writing.
+
+        Returns False if the engine state cannot be captured at this step.
+        """
+
+        state = sim_engine.get_state()
+        if state is None:
+            self.skipped += 1
+            self._retry_at = sim_engine.next_state_step()
+            return False
+        self._retry_at = None
+        offsets = {}
+        for label, publisher in self.publishers.items():
+            offset = publisher.checkpoint_offset()
+            if offset is not None:
+                offsets[label] = offset
+
+        checkpoint = Checkpoint(
+            engine=self.engine,
+            seed=self.seed,
+            next_step=next_step,
+            start_ts=self.start_ts,
+            config_digest=self._digest,
+            engine_state=state,
+            publisher_offsets=offsets,
+            collection_state=None if self.collector is None else self.collector.get_state(),
+        )
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+                self._thread.start()
+            self._pending = checkpoint
+            self._cond.notify()
+        self._last = self.clock()
+        return True
+
+    def close(self) -> None:
+        """Write the pending checkpoint (if any) and stop the writer thread."""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                checkpoint, self._pending = self._pending, None
+                if checkpoint is None:
+                    return
+            try:
+                write_checkpoint(self.path, checkpoint)
+                self.written += 1
+            except Exception as e:  # reported by the caller; the run goes on
+                self.error = e
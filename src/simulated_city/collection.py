@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+"""Collection trucks that empty the rubbish bins.
+
+Enabled by a `simulation.collection` section (see `CollectionConfig`). The
+`CollectionScheduler` runs next to an engine in `run_steps`:
+
+- A location is *due* once one of its containers reaches `threshold_pct`.
+  Due locations are found from the deposits the engine returns each step and
+  kept in a spatial grid index, so no step scans all locations.
+- Every `dispatch_every_steps` timesteps, each truck that is back at its depot
+  gets a route: starting at the depot it repeatedly drives to the nearest due
+  location, as long as the location's total fill still fits into the truck.
+- Travel time (straight-line distance / `speed_kmh`) plus `stop_minutes` per
+  stop decides the timestep at which each stop is emptied. The truck is busy
+  until it has driven back to its depot, where it is unloaded.
+- At a stop every non-empty container is emptied (fill 0) while the load fits,
+  and a `collected` status event is published for it.
+
+Distances use an equirectangular projection around the mean location
+latitude, which is accurate to well under 1% at city scale.
+"""
+
+from dataclasses import dataclass
+import heapq
+import math
+from typing import Any, Iterable
+
+from .config import CollectionConfig, SimulationConfig
+from .rubbish_sim import ContainerName, LocationDeposit, SimulationEngine
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+@dataclass(frozen=True, slots=True)
+class Collection:
+    """One container emptied by a truck."""
+
+    location_index: int
+    container: ContainerName
+    old_fill_pct: int
+    truck_id: str
+
+
+def local_xy_km(lats: Iterable[float], lons: Iterable[float], *, lat0: float) -> list[tuple[float, float]]:
+    """Project lat/lon to kilometres east/north of (lat0, 0) (equirectangular)."""
+
+    kx = EARTH_RADIUS_KM * math.cos(math.radians(lat0)) * math.pi / 180.0
+    ky = EARTH_RADIUS_KM * math.pi / 180.0
+    return [(lon * kx, lat * ky) for lat, lon in zip(lats, lons)]
+
+
+class _DueIndex:
+    """Due locations bucketed into square grid cells for nearest-neighbour search."""
+
+    def __init__(self, points: list[tuple[float, float]], cell_km: float) -> None:
+        self.points = points
+        self.cell_km = cell_km
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._members: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, location_index: int) -> bool:
+        return location_index in self._members
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_km), math.floor(y / self.cell_km)
+
+    def add(self, location_index: int) -> None:
+        if location_index not in self._members:
+            self._members.add(location_index)
+            self._cells.setdefault(self._cell(*self.points[location_index]), set()).add(location_index)
+
+    def remove(self, location_index: int) -> None:
+        self._members.discard(location_index)
+        cell = self._cell(*self.points[location_index])
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(location_index)
+            if not bucket:
+                del self._cells[cell]
+
+    def sorted(self) -> list[int]:
+        return sorted(self._members)
+
+    def nearest(self, x: float, y: float) -> int | None:
+        """Closest member to (x, y); ties go to the lowest index."""
+
+        if not self._members:
+            return None
+        cx, cy = self._cell(x, y)
+        best: tuple[float, int] | None = None
+        ring = 0
+        while True:
+            if 8 * ring > len(self._cells):
+                # Sparse index: checking every occupied cell is cheaper.
+                cells: Iterable[tuple[int, int]] = self._cells
+            else:
+                cells = [
+                    (i, j)
+                    for i in range(cx - ring, cx + ring + 1)
+                    for j in range(cy - ring, cy + ring + 1)
+                    if max(abs(i - cx), abs(j - cy)) == ring
+                ]
+            for cell in cells:
+                for index in self._cells.get(cell, ()):
+                    px, py = self.points[index]
+                    candidate = (math.hypot(px - x, py - y), index)
+                    if best is None or candidate < best:
+                        best = candidate
+            if cells is self._cells:
+                break
+            # Anything beyond this ring is at least `ring` cells away.
+            if best is not None and best[0] <= ring * self.cell_km:
+                break
+            ring += 1
+        return None if best is None else best[1]
+
+
+@dataclass(slots=True)
+class _Truck:
+    truck_id: str
+    depot: tuple[float, float]
+    capacity_pct: int
+    # Timestep from which the truck is back at its depot.
+    available_at: int = 0
+    load_pct: int = 0
+
+
+class CollectionScheduler:
+    """Threshold-based dispatch of collection trucks (see the module docstring).
+
+    Call `collect` before the engine advances a timestep and `observe` with
+    the deposits it returned; `run_steps` does both when given a scheduler.
+    `routes` counts the routes dispatched so far.
+    """
+
+    def __init__(self, sim_cfg: SimulationConfig, *, cell_km: float = 0.5) -> None:
+        if sim_cfg.collection is None:
+            raise ValueError("simulation.collection is not configured")
+        self.sim_cfg = sim_cfg
+        self.cfg: CollectionConfig = sim_cfg.collection
+
+        lats = [loc.lat for loc in sim_cfg.locations]
+        lat0 = sum(lats) / len(lats) if lats else 0.0
+        self.points = local_xy_km(lats, [loc.lon for loc in sim_cfg.locations], lat0=lat0)
+        depots = dict(
+            zip(
+                (d.depot_id for d in self.cfg.depots),
+                local_xy_km([d.lat for d in self.cfg.depots], [d.lon for d in self.cfg.depots], lat0=lat0),
+            )
+        )
+        self.trucks = [
+            _Truck(truck_id=t.truck_id, depot=depots[t.depot_id], capacity_pct=t.capacity_pct)
+            for t in self.cfg.trucks
+        ]
+
+        self._due = _DueIndex(self.points, cell_km)
+        # Locations on a route, until their stop.
+        self._assigned: set[int] = set()
+        # Heap of (timestep_index, sequence, location_index, truck_index).
+        self._stops: list[tuple[int, int, int, int]] = []
+        self._seq = 0
+        self.routes = 0
+
+    @property
+    def due_count(self) -> int:
+        return len(self._due)
+
+    def _minutes(self, a: tuple[float, float], b: tuple[float, float]) -> float:
+        return math.hypot(a[0] - b[0], a[1] - b[1]) / self.cfg.speed_kmh * 60.0
+
+    def _is_due(self, fills: Iterable[int]) -> bool:
+        return any(fill >= self.cfg.threshold_pct for fill in fills)
+
+    def collect(self, sim_engine: SimulationEngine, timestep_index: int) -> list[Collection]:
+        """Empty the containers at every stop scheduled up to `timestep_index`."""
+
+        collections: list[Collection] = []
+        stops = self._stops
+        while stops and stops[0][0] <= timestep_index:
+            _, _, location_index, truck_index = heapq.heappop(stops)
+            truck = self.trucks[truck_index]
+            self._assigned.discard(location_index)
+
+            # Fills may have grown since dispatch; stop once the truck is full.
+            state = sim_engine.location_state(location_index)
+            take: list[ContainerName] = []
+            remaining: list[int] = []
+            for container in ("left", "center", "right"):
+                fill = getattr(state, container).fill_pct
+                if fill > 0 and truck.load_pct + fill <= truck.capacity_pct:
+                    truck.load_pct += fill
+                    take.append(container)
+                else:
+                    remaining.append(fill)
+
+            for container, old_fill in sim_engine.empty_location(location_index, timestep_index, take):
+                collections.append(
+                    Collection(
+                        location_index=location_index,
+                        container=container,
+                        old_fill_pct=old_fill,
+                        truck_id=truck.truck_id,
+                    )
+                )
+            if self._is_due(remaining):
+                self._due.add(location_index)
+        return collections
+
+    def observe(
+        self,
+        sim_engine: SimulationEngine,
+        deposits: Iterable[LocationDeposit],
+        timestep_index: int,
+    ) -> None:
+        """Index locations that became due, and dispatch idle trucks on dispatch steps."""
+
+        threshold = self.cfg.threshold_pct
+        for deposit in deposits:
+            i = deposit.location_index
+            if deposit.new_fill_pct >= threshold and i not in self._assigned:
+                self._due.add(i)
+
+        if (timestep_index + 1) % self.cfg.dispatch_every_steps == 0:
+            self.dispatch(sim_engine, timestep_index)
+
+    def dispatch(self, sim_engine: SimulationEngine, timestep_index: int) -> None:
+        """Send every idle truck on a route through the nearest due locations."""
+
+        timestep_minutes = self.sim_cfg.timestep_minutes
+        for truck_index, truck in enumerate(self.trucks):
+            if not self._due:
+                return
+            if truck.available_at > timestep_index:
+                continue
+
+            truck.load_pct = 0
+            planned = 0
+            position = truck.depot
+            minutes = 0.0
+            while True:
+                i = self._due.nearest(*position)
+                if i is None:
+                    break
+                state = sim_engine.location_state(i)
+                load = state.left.fill_pct + state.center.fill_pct + state.right.fill_pct
+                if planned + load > truck.capacity_pct:
+                    break
+                planned += load
+                self._due.remove(i)
+                self._assigned.add(i)
+
+                minutes += self._minutes(position, self.points[i])
+                position = self.points[i]
+                # The truck leaves at the end of this timestep.
+                stop_step = timestep_index + 1 + int(minutes // timestep_minutes)
+                heapq.heappush(self._stops, (stop_step, self._seq, i, truck_index))
+                self._seq += 1
+                minutes += self.cfg.stop_minutes
+
+            if planned:
+                minutes += self._minutes(position, truck.depot)
+                truck.available_at = timestep_index + 1 + math.ceil(minutes / timestep_minutes)
+                self.routes += 1
+
+    def get_state(self) -> dict[str, Any]:
+        return {
+            "due": self._due.sorted(),
+            "stops": [list(stop) for stop in sorted(self._stops)],
+            "trucks": [[truck.available_at, truck.load_pct] for truck in self.trucks],
+            "seq": self._seq,
+            "routes": self.routes,
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        self._due = _DueIndex(self.points, self._due.cell_km)
+        for i in state["due"]:
+            self._due.add(int(i))
+        # A sorted list is a valid heap.
+        self._stops = [(int(step), int(seq), int(i), int(t)) for step, seq, i, t in state["stops"]]
+        self._assigned = {i for _, _, i, _ in self._stops}
+        for truck, (available_at, load_pct) in zip(self.trucks, state["trucks"], strict=True):
+            truck.available_at = int(available_at)
+            truck.load_pct = int(load_pct)
+        self._seq = int(state["seq"])
+        self.routes = int(state["routes"])
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import csv
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import os
 from pathlib import Path
 from typing import Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from dotenv import load_dotenv
 import yaml
@@ -33,6 +35,57 @@ class SimulationLocationConfig:
     location_id: str
     lat: float
     lon: float
+    # Name of an arrival profile (None = the "default" profile, if any).
+    profile: str | None = None
+    # Multiplies the location's arrival probability.
+    arrival_scale: float = 1.0
+
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+ARRIVAL_MODELS = ("bernoulli", "poisson")
+# Highest mean number of arrivals per location and timestep with the
+# "poisson" model; use a shorter timestep for busier locations.
+MAX_ARRIVAL_RATE = 200.0
+
+
+@dataclass(frozen=True, slots=True)
+class ArrivalProfileConfig:
+    """Arrival-rate factors by day of week (Monday first) and hour of day."""
+
+    profile_id: str
+    # 7 rows of 24 factors that multiply `arrival_prob`.
+    factors: tuple[tuple[float, ...], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class DepotConfig:
+    depot_id: str
+    lat: float
+    lon: float
+
+
+@dataclass(frozen=True, slots=True)
+class TruckConfig:
+    truck_id: str
+    depot_id: str
+    # Load per trip, in container fill percentage points (3000 = 30 full containers).
+    capacity_pct: int = 3000
+
+
+@dataclass(frozen=True, slots=True)
+class CollectionConfig:
+    """Trucks that empty containers (see `simulated_city.collection`)."""
+
+    # A location is due for collection once any of its containers reaches this.
+    threshold_pct: int = 80
+    # Idle trucks are sent out on a route every N timesteps.
+    dispatch_every_steps: int = 4
+    speed_kmh: float = 25.0
+    # Time spent at each stop.
+    stop_minutes: float = 2.0
+    depots: tuple[DepotConfig, ...] = ()
+    trucks: tuple[TruckConfig, ...] = ()
 
 
 @dataclass(frozen=True, slots=True)
@@ -47,12 +100,50 @@ class SimulationConfig:
 
     timestep_minutes: int = 15
     arrival_prob: float = 0.25
+    # "bernoulli": at most one arrival per location and timestep, with
+    # probability arrival_prob. "poisson": a Poisson number of arrivals with
+    # mean arrival_rate (default arrival_prob), placed in one batch.
+    arrival_model: str = "bernoulli"
+    arrival_rate: float | None = None
     bag_fill_delta_pct: int = 2
     status_boundary_pct: int = 10
     # If true, emit a status event on every successful deposit (more frequent).
     # If false, emit only when crossing each N% boundary.
     publish_every_deposit: bool = False
+    # Daily/weekly arrival cycles (see simulated_city.arrival_profiles):
+    # arrival_prob is multiplied by the location's profile factor for the
+    # local hour of the week. Holidays use the Sunday factors.
+    arrival_profiles: tuple[ArrivalProfileConfig, ...] = ()
+    holidays: tuple[date, ...] = ()
+    profile_timezone: str = "UTC"
+    # Wall-clock time per timestep (0 = as fast as possible). Steps are paced
+    # to absolute deadlines, see simulated_city.pacing.
     step_delay_s: float = 0.0
+    # Alternative to step_delay_s: simulated time per wall-clock time
+    # (1.0 = real time, 60 = one simulated hour per minute).
+    pacing_speed: float | None = None
+    # After an overrun, run the next steps back to back until on schedule.
+    pacing_catch_up: bool = False
+    # Max unacknowledged MQTT messages in flight. 0 waits for every message.
+    mqtt_publish_window: int = 0
+    # JSONL log buffering: flush after N events, N characters or N seconds.
+    log_flush_every_events: int = 1000
+    log_flush_every_bytes: int = 1 << 20
+    log_flush_interval_s: float = 1.0
+    # Instrumentation (see simulated_city.metrics): print a summary at the end
+    # and/or refresh a JSON snapshot every `metrics_interval_s` seconds.
+    metrics: bool = False
+    metrics_file: str | None = None
+    metrics_interval_s: float = 10.0
+    # Serve live metrics in Prometheus text format on this port (None = off).
+    metrics_port: int | None = None
+    metrics_host: str = "127.0.0.1"
+    # Checkpoints for resuming long runs (see simulated_city.checkpoint):
+    # written every `checkpoint_interval_s` seconds and at the end of a run.
+    checkpoint_file: str | None = None
+    checkpoint_interval_s: float = 60.0
+    # Optional collection trucks; None keeps the fill-only model.
+    collection: CollectionConfig | None = None
     # Optional: fixed simulation start timestamp (UTC) for deterministic logs.
     # If None, the simulator uses the current wall-clock time.
     start_time: datetime | None = None
@@ -99,7 +190,7 @@ def load_config(path: str | Path = "config.yaml") -> AppConfig:
     keepalive_s = int(mqtt.get("keepalive_s") or 60)
     base_topic = str(mqtt.get("base_topic") or "simulated-city")
 
-    sim_cfg = _parse_simulation_config(simulation)
+    sim_cfg = _parse_simulation_config(simulation, base_dir=resolved_path.parent)
 
     return AppConfig(
         mqtt=MqttConfig(
@@ -173,10 +264,12 @@ def _select_mqtt_config(data: dict[str, Any]) -> dict[str, Any]:
     return {**common, **selected}
 
 
-def _parse_simulation_config(raw: Any) -> SimulationConfig | None:
+def _parse_simulation_config(raw: Any, *, base_dir: Path | None = None) -> SimulationConfig | None:
     """Parse the optional `simulation:` section from config.yaml.
 
     We keep this tolerant: missing or empty simulation config returns None.
+    Relative profile CSV paths are resolved against `base_dir` (the directory
+    of config.yaml).
     """
 
     if raw is None:
@@ -186,17 +279,76 @@ def _parse_simulation_config(raw: Any) -> SimulationConfig | None:
 
     timestep_minutes = int(raw.get("timestep_minutes") or 15)
     arrival_prob = float(raw.get("arrival_prob") or 0.25)
+    arrival_model = str(raw.get("arrival_model") or "bernoulli")
+    if arrival_model not in ARRIVAL_MODELS:
+        raise ValueError(f"simulation.arrival_model must be one of: {', '.join(ARRIVAL_MODELS)}")
+    arrival_rate_raw = raw.get("arrival_rate")
+    arrival_rate = float(arrival_rate_raw) if arrival_rate_raw is not None else None
+    if arrival_rate is not None and not 0 <= arrival_rate <= MAX_ARRIVAL_RATE:
+        raise ValueError(f"simulation.arrival_rate must be between 0 and {MAX_ARRIVAL_RATE:g}")
+    if arrival_rate is not None and arrival_model != "poisson":
+        raise ValueError("simulation.arrival_rate requires arrival_model: poisson")
     bag_fill_delta_pct = int(raw.get("bag_fill_delta_pct") or 2)
     status_boundary_pct = int(raw.get("status_boundary_pct") or 10)
 
     publish_every_deposit = bool(raw.get("publish_every_deposit") or False)
 
+    arrival_profiles = _parse_arrival_profiles(raw.get("arrival_profiles"), base_dir=base_dir)
+    holidays_raw = raw.get("holidays") or []
+    if not isinstance(holidays_raw, list):
+        raise ValueError("Config key 'simulation.holidays' must be a list of dates")
+    holidays = tuple(sorted({_parse_date(h) for h in holidays_raw}))
+    profile_timezone = str(raw.get("profile_timezone") or "UTC")
+    try:
+        ZoneInfo(profile_timezone)
+    except (ValueError, ZoneInfoNotFoundError):
+        raise ValueError(f"Unknown simulation.profile_timezone '{profile_timezone}'") from None
+
     # Optional wall-clock delay between timesteps (useful for MQTT testing).
     step_delay_raw = raw.get("step_delay_s")
     if step_delay_raw is None:
         step_delay_raw = raw.get("step_delay_seconds")
     step_delay_s = float(step_delay_raw) if step_delay_raw is not None else 0.0
 
+    pacing_speed_raw = raw.get("pacing_speed")
+    pacing_speed = float(pacing_speed_raw) if pacing_speed_raw is not None else None
+    if pacing_speed is not None and pacing_speed <= 0:
+        raise ValueError("simulation.pacing_speed must be > 0")
+    pacing_catch_up = bool(raw.get("pacing_catch_up") or False)
+
+    mqtt_publish_window = int(raw.get("mqtt_publish_window") or 0)
+    if mqtt_publish_window < 0:
+        raise ValueError("simulation.mqtt_publish_window must be >= 0")
+
+    log_flush_every_events = int(raw.get("log_flush_every_events") or 1000)
+    log_flush_every_bytes = int(raw.get("log_flush_every_bytes") or (1 << 20))
+    log_flush_interval_raw = raw.get("log_flush_interval_s")
+    log_flush_interval_s = float(log_flush_interval_raw) if log_flush_interval_raw is not None else 1.0
+    if log_flush_every_events <= 0 or log_flush_every_bytes <= 0 or log_flush_interval_s < 0:
+        raise ValueError("simulation.log_flush_* settings must be positive")
+
+    metrics = bool(raw.get("metrics") or False)
+    metrics_file_raw = raw.get("metrics_file")
+    metrics_file = str(metrics_file_raw) if metrics_file_raw else None
+    metrics_interval_raw = raw.get("metrics_interval_s")
+    metrics_interval_s = float(metrics_interval_raw) if metrics_interval_raw is not None else 10.0
+    if metrics_interval_s <= 0:
+        raise ValueError("simulation.metrics_interval_s must be > 0")
+    metrics_port_raw = raw.get("metrics_port")
+    metrics_port = int(metrics_port_raw) if metrics_port_raw is not None else None
+    if metrics_port is not None and not 0 <= metrics_port <= 65535:
+        raise ValueError("simulation.metrics_port must be between 0 and 65535")
+    metrics_host = str(raw.get("metrics_host") or "127.0.0.1")
+
+    checkpoint_file_raw = raw.get("checkpoint_file")
+    checkpoint_file = str(checkpoint_file_raw) if checkpoint_file_raw else None
+    checkpoint_interval_raw = raw.get("checkpoint_interval_s")
+    checkpoint_interval_s = float(checkpoint_interval_raw) if checkpoint_interval_raw is not None else 60.0
+    if checkpoint_interval_s <= 0:
+        raise ValueError("simulation.checkpoint_interval_s must be > 0")
+
+    collection = _parse_collection_config(raw.get("collection"))
+
     start_time_raw = raw.get("start_time")
     start_time = _parse_utc_datetime(start_time_raw) if start_time_raw is not None else None
 
@@ -208,6 +360,7 @@ def _parse_simulation_config(raw: Any) -> SimulationConfig | None:
         raise ValueError("Config key 'simulation.locations' must be a list")
 
     locations: list[SimulationLocationConfig] = []
+    seen_ids: set[str] = set()
     for item in locations_raw:
         if not isinstance(item, dict):
             raise ValueError("Each item in 'simulation.locations' must be a mapping")
@@ -215,27 +368,218 @@ def _parse_simulation_config(raw: Any) -> SimulationConfig | None:
         location_id = str(item.get("id") or item.get("location_id") or "").strip()
         if not location_id:
             raise ValueError("Each simulation location must have an 'id'")
+        # Ids name MQTT topics and seed each location's random stream.
+        if location_id in seen_ids:
+            raise ValueError(f"Duplicate simulation location id '{location_id}'")
+        seen_ids.add(location_id)
 
         if "lat" not in item or "lon" not in item:
             raise ValueError(f"Simulation location '{location_id}' must define 'lat' and 'lon'")
         lat = float(item["lat"])
         lon = float(item["lon"])
 
-        locations.append(SimulationLocationConfig(location_id=location_id, lat=lat, lon=lon))
+        profile_raw = item.get("profile")
+        profile = str(profile_raw) if profile_raw else None
+        if profile is not None and profile not in {p.profile_id for p in arrival_profiles}:
+            raise ValueError(f"Simulation location '{location_id}' refers to unknown arrival profile '{profile}'")
+        arrival_scale_raw = item.get("arrival_scale")
+        arrival_scale = float(arrival_scale_raw) if arrival_scale_raw is not None else 1.0
+        if arrival_scale < 0:
+            raise ValueError(f"Simulation location '{location_id}' arrival_scale must be >= 0")
+
+        locations.append(
+            SimulationLocationConfig(
+                location_id=location_id,
+                lat=lat,
+                lon=lon,
+                profile=profile,
+                arrival_scale=arrival_scale,
+            )
+        )
 
     return SimulationConfig(
         timestep_minutes=timestep_minutes,
         arrival_prob=arrival_prob,
+        arrival_model=arrival_model,
+        arrival_rate=arrival_rate,
         bag_fill_delta_pct=bag_fill_delta_pct,
         status_boundary_pct=status_boundary_pct,
         publish_every_deposit=publish_every_deposit,
+        arrival_profiles=arrival_profiles,
+        holidays=holidays,
+        profile_timezone=profile_timezone,
         step_delay_s=step_delay_s,
+        pacing_speed=pacing_speed,
+        pacing_catch_up=pacing_catch_up,
+        mqtt_publish_window=mqtt_publish_window,
+        log_flush_every_events=log_flush_every_events,
+        log_flush_every_bytes=log_flush_every_bytes,
+        log_flush_interval_s=log_flush_interval_s,
+        metrics=metrics,
+        metrics_file=metrics_file,
+        metrics_interval_s=metrics_interval_s,
+        metrics_port=metrics_port,
+        metrics_host=metrics_host,
+        checkpoint_file=checkpoint_file,
+        checkpoint_interval_s=checkpoint_interval_s,
+        collection=collection,
         start_time=start_time,
         seed=seed,
         locations=tuple(locations),
     )
 
 
+def _parse_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r} in 'simulation.holidays' (expected YYYY-MM-DD)") from None
+
+
+def _parse_weekday(value: Any) -> int:
+    s = str(value).strip().lower()
+    if s[:3] in WEEKDAYS:
+        return WEEKDAYS.index(s[:3])
+    day = int(s)
+    if not 0 <= day <= 6:
+        raise ValueError(f"Invalid day {value!r} (expected mon..sun or 0..6, Monday = 0)")
+    return day
+
+
+def _read_profile_csv(path: Path) -> tuple[tuple[float, ...], ...]:
+    """Read `day,hour,factor` rows; `day` may be `*` for every day of the week."""
+
+    factors: list[list[float | None]] = [[None] * 24 for _ in WEEKDAYS]
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                days = range(7) if row["day"].strip() == "*" else [_parse_weekday(row["day"])]
+                hour = int(row["hour"])
+                factor = float(row["factor"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{path}: rows need day, hour and factor columns ({e})") from None
+            if not 0 <= hour <= 23 or factor < 0:
+                raise ValueError(f"{path}: hour must be 0..23 and factor >= 0")
+            for day in days:
+                factors[day][hour] = factor
+
+    missing = [f"{WEEKDAYS[d]} {h:02d}" for d in range(7) for h in range(24) if factors[d][h] is None]
+    if missing:
+        raise ValueError(f"{path}: no factor for {', '.join(missing[:3])}{' ...' if len(missing) > 3 else ''}")
+    return tuple(tuple(float(f) for f in day) for day in factors)  # type: ignore[arg-type]
+
+
+def _parse_arrival_profiles(raw: Any, *, base_dir: Path | None) -> tuple[ArrivalProfileConfig, ...]:
+    """Parse `simulation.arrival_profiles`, a mapping of profile name to factors.
+
+    A profile has either `hourly` (24 factors, every day) with optional
+    `daily` (7 factors, Monday first, multiplied in), or `csv` (a file of
+    `day,hour,factor` rows).
+    """
+
+    if raw is None:
+        return ()
+    if not isinstance(raw, dict):
+        raise ValueError("Config key 'simulation.arrival_profiles' must be a mapping of profile name to factors")
+
+    profiles: list[ArrivalProfileConfig] = []
+    for name, item in raw.items():
+        key = f"simulation.arrival_profiles.{name}"
+        if not isinstance(item, dict):
+            raise ValueError(f"Config key '{key}' must be a mapping")
+        if item.get("csv"):
+            path = Path(str(item["csv"]))
+            if not path.is_absolute() and base_dir is not None:
+                path = base_dir / path
+            factors = _read_profile_csv(path)
+        else:
+            hourly = item.get("hourly")
+            daily = item.get("daily") or [1.0] * 7
+            if not isinstance(hourly, list) or len(hourly) != 24:
+                raise ValueError(f"Config key '{key}' needs 'hourly' (24 factors) or 'csv'")
+            if not isinstance(daily, list) or len(daily) != 7:
+                raise ValueError(f"Config key '{key}.daily' must list 7 factors (Monday first)")
+            factors = tuple(tuple(float(d) * float(h) for h in hourly) for d in daily)
+        if any(f < 0 for day in factors for f in day):
+            raise ValueError(f"Config key '{key}' has negative factors")
+        profiles.append(ArrivalProfileConfig(profile_id=str(name), factors=factors))
+    return tuple(profiles)
+
+
+def _parse_collection_config(raw: Any) -> CollectionConfig | None:
+    """Parse the optional `simulation.collection:` section."""
+
+    if raw is None:
+        return None
+    if not isinstance(raw, dict):
+        raise ValueError("Config key 'simulation.collection' must be a mapping")
+
+    threshold_pct = int(raw.get("threshold_pct") or 80)
+    if not 0 < threshold_pct <= 100:
+        raise ValueError("simulation.collection.threshold_pct must be between 1 and 100")
+    dispatch_every_steps = int(raw.get("dispatch_every_steps") or 4)
+    if dispatch_every_steps <= 0:
+        raise ValueError("simulation.collection.dispatch_every_steps must be > 0")
+    speed_kmh = float(raw.get("speed_kmh") or 25.0)
+    if speed_kmh <= 0:
+        raise ValueError("simulation.collection.speed_kmh must be > 0")
+    stop_minutes_raw = raw.get("stop_minutes")
+    stop_minutes = float(stop_minutes_raw) if stop_minutes_raw is not None else 2.0
+    if stop_minutes < 0:
+        raise ValueError("simulation.collection.stop_minutes must be >= 0")
+
+    depots_raw = raw.get("depots") or []
+    trucks_raw = raw.get("trucks") or []
+    if not isinstance(depots_raw, list) or not isinstance(trucks_raw, list):
+        raise ValueError("Config keys 'simulation.collection.depots' and '.trucks' must be lists")
+
+    depots: list[DepotConfig] = []
+    for item in depots_raw:
+        if not isinstance(item, dict):
+            raise ValueError("Each item in 'simulation.collection.depots' must be a mapping")
+        depot_id = str(item.get("id") or "").strip()
+        if not depot_id:
+            raise ValueError("Each depot must have an 'id'")
+        if "lat" not in item or "lon" not in item:
+            raise ValueError(f"Depot '{depot_id}' must define 'lat' and 'lon'")
+        depots.append(DepotConfig(depot_id=depot_id, lat=float(item["lat"]), lon=float(item["lon"])))
+    depot_ids = {d.depot_id for d in depots}
+    if len(depot_ids) != len(depots):
+        raise ValueError("Depot ids in 'simulation.collection.depots' must be unique")
+
+    trucks: list[TruckConfig] = []
+    for item in trucks_raw:
+        if not isinstance(item, dict):
+            raise ValueError("Each item in 'simulation.collection.trucks' must be a mapping")
+        truck_id = str(item.get("id") or "").strip()
+        if not truck_id:
+            raise ValueError("Each truck must have an 'id'")
+        depot_id = str(item.get("depot") or "").strip()
+        if depot_id not in depot_ids:
+            raise ValueError(f"Truck '{truck_id}' refers to unknown depot '{depot_id}'")
+        capacity_pct = int(item.get("capacity_pct") or 3000)
+        if capacity_pct < 300:
+            raise ValueError(f"Truck '{truck_id}' capacity_pct must be >= 300 (one full location)")
+        trucks.append(TruckConfig(truck_id=truck_id, depot_id=depot_id, capacity_pct=capacity_pct))
+    if not trucks:
+        raise ValueError("simulation.collection needs at least one truck")
+    if len({t.truck_id for t in trucks}) != len(trucks):
+        raise ValueError("Truck ids in 'simulation.collection.trucks' must be unique")
+
+    return CollectionConfig(
+        threshold_pct=threshold_pct,
+        dispatch_every_steps=dispatch_every_steps,
+        speed_kmh=speed_kmh,
+        stop_minutes=stop_minutes,
+        depots=tuple(depots),
+        trucks=tuple(trucks),
+    )
+
+
 def _load_yaml_dict(path: str | Path) -> dict[str, Any]:
     p = Path(path)
     if not p.exists():
@@ -8,15 +8,22 @@ from Streamlit scripts and Jupyter notebooks.
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
+import hashlib
 import json
+import mmap
+import os
 import queue
+import re
 import ssl
+import threading
 import uuid
-from typing import Any
+from typing import Any, Iterable, Iterator
 
+import numpy as np
 import pandas as pd
 
 from .config import MqttConfig
+from . import event_log
 
 
 @dataclass(frozen=True, slots=True)
@@ -43,6 +50,110 @@ def parse_ts(value: Any) -> datetime:
     return datetime.fromisoformat(value).astimezone(timezone.utc)
 
 
+# int64 sentinel for unparsable timestamps (same value as pandas NaT).
+NAT_NS = np.iinfo(np.int64).min
+
+# Fixed-width layouts written by the simulator (`datetime.isoformat()` drops
+# the fraction when microseconds are 0): "2026-02-18T18:26:17.155154Z" and
+# "2026-02-18T18:26:17Z". Digit positions and separators per width.
+_TS_SEPARATORS = {4: ord("-"), 7: ord("-"), 10: ord("T"), 13: ord(":"), 16: ord(":")}
+_TS_LAYOUTS = {
+    27: {**_TS_SEPARATORS, 19: ord("."), 26: ord("Z")},
+    20: {**_TS_SEPARATORS, 19: ord("Z")},
+}
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+
+def _digits_to_int(d: np.ndarray, start: int, stop: int) -> np.ndarray:
+    value = d[:, start].astype(np.int64)
+    for col in range(start + 1, stop):
+        value *= 10
+        value += d[:, col]
+    return value
+
+
+def _parse_fixed_width_ts(buf: bytes, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized parse of same-width UTC timestamps. Returns (ns, ok mask)."""
+
+    layout = _TS_LAYOUTS[width]
+    chars = np.frombuffer(buf, dtype=np.uint8).reshape(-1, width)
+    # uint8 wraps around for characters below "0", so one `<= 9` test per
+    # column checks for a digit.
+    d = chars - np.uint8(ord("0"))
+
+    ok = np.ones(chars.shape[0], dtype=bool)
+    for col in range(width):
+        if col in layout:
+            ok &= chars[:, col] == layout[col]
+        else:
+            ok &= d[:, col] <= 9
+
+    year = _digits_to_int(d, 0, 4)
+    month = _digits_to_int(d, 5, 7)
+    day = _digits_to_int(d, 8, 10)
+    hour = _digits_to_int(d, 11, 13)
+    minute = _digits_to_int(d, 14, 16)
+    second = _digits_to_int(d, 17, 19)
+
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_ok = (month >= 1) & (month <= 12)
+    days_in_month = _DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + ((month == 2) & leap)
+    # Years outside 1678..2261 do not fit int64 nanoseconds; leave them to the
+    # fallback, which reports them as invalid.
+    ok &= (year >= 1678) & (year <= 2261) & month_ok & (day >= 1) & (day <= days_in_month)
+    ok &= (hour <= 23) & (minute <= 59) & (second <= 59)
+
+    # Days since 1970-01-01 for the proleptic Gregorian calendar.
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    days = era * 146_097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719_468
+
+    ns = (days * 86_400 + hour * 3_600 + minute * 60 + second) * 1_000_000_000
+    if width == 27:
+        ns += _digits_to_int(d, 20, 26) * 1_000
+    return ns, ok
+
+
+def parse_ts_ns_many(values: Any, *, errors: str = "raise") -> np.ndarray:
+    """Parse many timestamps into int64 nanoseconds since the Unix epoch (UTC).
+
+    The simulator's fixed `YYYY-MM-DDTHH:MM:SS[.ffffff]Z` strings are decoded
+    with NumPy array arithmetic; anything else falls back to `parse_ts`.
+    Unparsable values raise ValueError, or become `NAT_NS` with
+    `errors="coerce"`.
+    """
+
+    if errors not in ("raise", "coerce"):
+        raise ValueError('errors must be "raise" or "coerce"')
+
+    values = list(values)
+    out = np.full(len(values), NAT_NS, dtype=np.int64)
+    lengths = np.fromiter((len(v) if isinstance(v, str) else -1 for v in values), dtype=np.int64, count=len(values))
+    pending = np.ones(len(values), dtype=bool)
+
+    for width in _TS_LAYOUTS:
+        sel = np.flatnonzero(lengths == width)
+        if not sel.size:
+            continue
+        try:
+            buf = "".join([values[i] for i in sel]).encode("ascii")
+        except UnicodeEncodeError:
+            continue
+        ns, ok = _parse_fixed_width_ts(buf, width)
+        out[sel[ok]] = ns[ok]
+        pending[sel[ok]] = False
+
+    for i in np.flatnonzero(pending):
+        try:
+            out[i] = event_log.datetime_to_ns(parse_ts(values[i]))
+        except (TypeError, ValueError, OverflowError):
+            if errors == "raise":
+                raise ValueError(f"Invalid timestamp: {values[i]!r}") from None
+    return out
+
+
 def series_key(location_id: str, container: str) -> str:
     return f"{location_id}.{container}"
 
@@ -68,6 +179,23 @@ def event_from_payload(payload: dict[str, Any]) -> StatusEvent:
     )
 
 
+def _payload_fields(payload: dict[str, Any]) -> tuple[Any, str, int, int, str]:
+    """(raw ts, series, fill_pct, timestep_index, event) of a status payload.
+
+    Same rules as `event_from_payload`, except that `ts` is returned as-is so
+    callers can parse many at once with `parse_ts_ns_many`.
+    """
+
+    raw_ts = payload["ts"]
+    series = series_key(str(payload["location_id"]), str(payload["container"]))
+    fill_pct = int(payload["fill_pct"])
+    try:
+        timestep_index = int(payload.get("timestep_index", 0))
+    except (TypeError, ValueError):
+        timestep_index = 0
+    return raw_ts, series, fill_pct, timestep_index, str(payload.get("event") or "status")
+
+
 def events_to_frame(events: list[StatusEvent]) -> pd.DataFrame:
     if not events:
         return pd.DataFrame(columns=["ts", "series", "fill_pct", "timestep_index", "event"])
@@ -87,19 +215,33 @@ def events_to_frame(events: list[StatusEvent]) -> pd.DataFrame:
     return df
 
 
-def read_jsonl_incremental(path: str, offset: int) -> tuple[list[dict[str, Any]], int]:
+def read_jsonl_incremental(
+    path: str,
+    offset: int,
+    *,
+    include_partial: bool = False,
+) -> tuple[list[dict[str, Any]], int]:
     """Read new JSONL lines from `path` starting at byte offset.
 
     Expected JSONL lines are objects that contain a dict field named "payload".
+
+    The simulator writes its log in buffered chunks, so the last line may still
+    be incomplete while it is being written. By default only complete
+    (newline-terminated) lines are consumed and the returned offset points at
+    the start of the incomplete line, so the next call picks it up. Pass
+    `include_partial=True` to also parse a trailing line without a newline
+    (useful when the file is known to be complete).
     """
 
-    with open(path, "r", encoding="utf-8") as f:
+    with open(path, "rb") as f:
         f.seek(offset)
-        new_lines = f.readlines()
-        new_offset = f.tell()
+        data = f.read()
+
+    end = len(data) if include_partial else data.rfind(b"\n") + 1
+    new_offset = offset + end
 
     payloads: list[dict[str, Any]] = []
-    for line in new_lines:
+    for line in data[:end].splitlines():
         line = line.strip()
         if not line:
             continue
@@ -116,10 +258,1005 @@ def read_jsonl_incremental(path: str, offset: int) -> tuple[list[dict[str, Any]]
 def read_jsonl_all(path: str) -> list[dict[str, Any]]:
     """Read all payloads from a simulator JSONL log file."""
 
-    payloads, _ = read_jsonl_incremental(path, 0)
+    payloads, _ = read_jsonl_incremental(path, 0, include_partial=True)
     return payloads
 
 
+_TS_FIELD = re.compile(rb'"ts"\s*:\s*"([^"]+)"')
+_INDEX_VERSION = 1
+_I64_MAX = 2**63 - 1
+_I64_MIN = -(2**63)
+
+
+def _parse_jsonl_payload(line: bytes) -> dict[str, Any] | None:
+    try:
+        obj = json.loads(line)
+    except Exception:
+        return None
+    if isinstance(obj, dict) and isinstance(obj.get("payload"), dict):
+        return obj["payload"]
+    return None
+
+
+class IndexedJsonlLog:
+    """Random-access reader for large simulator JSONL logs.
+
+    The log is memory-mapped and described by a sparse index: one block entry
+    per `lines_per_block` lines with the block's byte offset, first line
+    number and min/max timestamp. The index is saved next to the log as
+    ``<log>.idx`` and reused (and extended, if the log grew) on the next open,
+    so only the first open of a log scans it.
+
+    Only complete (newline-terminated) lines are indexed; call `refresh()` to
+    pick up lines appended while the log is open.
+    """
+
+    def __init__(self, path: str, *, lines_per_block: int = 4096) -> None:
+        if lines_per_block <= 0:
+            raise ValueError("lines_per_block must be > 0")
+        self.path = str(path)
+        self.index_path = self.path + ".idx"
+        self.lines_per_block = lines_per_block
+
+        self._fp: Any = None
+        self._mm: Any = None
+        self._mapped_size = 0
+
+        # Blocks: [offset, first_line, min_ts_ns, max_ts_ns]; `size` is the
+        # byte length of the indexed (complete-line) prefix of the log.
+        self.blocks: list[list[int]] = []
+        self.size = 0
+        self.line_count = 0
+        self._head = ""
+
+        self._load_index()
+        self.refresh()
+
+    def __enter__(self) -> "IndexedJsonlLog":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    @property
+    def time_range(self) -> tuple[int, int] | None:
+        """(min_ts_ns, max_ts_ns) over all indexed lines, or None if empty."""
+
+        stamped = [b for b in self.blocks if b[2] <= b[3]]
+        if not stamped:
+            return None
+        return min(b[2] for b in stamped), max(b[3] for b in stamped)
+
+    def _map(self) -> Any:
+        file_size = os.path.getsize(self.path)
+        if self._mm is None or file_size != self._mapped_size:
+            self.close()
+            if file_size == 0:
+                self._mapped_size = 0
+                return b""
+            self._fp = open(self.path, "rb")
+            self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = file_size
+        return self._mm
+
+    def _head_digest(self, data: Any, size: int) -> str:
+        # Fingerprint of the start of the indexed prefix, to detect a log that
+        # was rewritten (new run) rather than appended to.
+        return hashlib.blake2b(data[: min(size, 4096)], digest_size=8).hexdigest()
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if saved.get("version") != _INDEX_VERSION or saved.get("lines_per_block") != self.lines_per_block:
+            return
+        self.blocks = [list(b) for b in saved["blocks"]]
+        self.size = int(saved["size"])
+        self.line_count = int(saved["line_count"])
+        self._head = str(saved["head"])
+
+    def _save_index(self) -> None:
+        state = {
+            "version": _INDEX_VERSION,
+            "lines_per_block": self.lines_per_block,
+            "size": self.size,
+            "line_count": self.line_count,
+            "head": self._head,
+            "blocks": self.blocks,
+        }
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, self.index_path)
+        except OSError:
+            # A read-only log directory just means no persisted index.
+            pass
+
+    def refresh(self) -> bool:
+        """Index lines appended since the last refresh. Returns True if any were."""
+
+        data = self._map()
+        file_size = len(data)
+
+        if file_size < self.size or self._head_digest(data, self.size) != self._head:
+            # The log was truncated or rewritten (e.g. a new run): start over.
+            self.blocks, self.size, self.line_count = [], 0, 0
+
+        end = data.rfind(b"\n", self.size) + 1 if file_size > self.size else 0
+        if end <= self.size:
+            return False
+
+        # Re-scan the last (possibly partial) block so it can fill up.
+        if self.blocks and self.line_count - self.blocks[-1][1] < self.lines_per_block:
+            offset, line_no = self.blocks[-1][0], self.blocks[-1][1]
+            self.blocks.pop()
+        else:
+            offset, line_no = self.size, self.line_count
+
+        while offset < end:
+            block_offset, block_line = offset, line_no
+            raw_ts: list[str] = []
+            for _ in range(self.lines_per_block):
+                if offset >= end:
+                    break
+                nl = data.find(b"\n", offset, end)
+                m = _TS_FIELD.search(data, offset, nl)
+                offset = nl + 1
+                line_no += 1
+                if m is not None:
+                    raw_ts.append(m.group(1).decode("latin-1"))
+
+            ts_ns = parse_ts_ns_many(raw_ts, errors="coerce")
+            ts_ns = ts_ns[ts_ns != NAT_NS]
+            if ts_ns.size:
+                self.blocks.append([block_offset, block_line, int(ts_ns.min()), int(ts_ns.max())])
+            else:
+                self.blocks.append([block_offset, block_line, _I64_MAX, _I64_MIN])
+
+        self.size = end
+        self.line_count = line_no
+        self._head = self._head_digest(data, end)
+        self._save_index()
+        return True
+
+    def _blocks_for(self, start_ns: int | None, end_ns: int | None) -> list[tuple[int, int]]:
+        ranges: list[tuple[int, int]] = []
+        for i, (offset, _line, lo, hi) in enumerate(self.blocks):
+            if lo > hi:
+                continue  # no timestamps in this block
+            if (start_ns is not None and hi < start_ns) or (end_ns is not None and lo >= end_ns):
+                continue
+            stop = self.blocks[i + 1][0] if i + 1 < len(self.blocks) else self.size
+            ranges.append((offset, stop))
+        return ranges
+
+    def iter_chunks(
+        self,
+        *,
+        start_ts: Any = None,
+        end_ts: Any = None,
+        chunk_lines: int = 10_000,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield lists of at most `chunk_lines` payloads with start_ts <= ts < end_ts.
+
+        Only index blocks overlapping the time range are touched, and at most
+        one chunk of parsed payloads is held in memory at a time.
+        """
+
+        start_ns = None if start_ts is None else int(pd.Timestamp(start_ts).value)
+        end_ns = None if end_ts is None else int(pd.Timestamp(end_ts).value)
+        data = self._map()
+
+        chunk: list[dict[str, Any]] = []
+        for lo, hi in self._blocks_for(start_ns, end_ns):
+            payloads = [
+                payload
+                for line in data[lo:hi].splitlines()
+                if (payload := _parse_jsonl_payload(line)) is not None
+            ]
+            if start_ns is not None or end_ns is not None:
+                ts_ns = parse_ts_ns_many([p.get("ts") for p in payloads], errors="coerce")
+                keep = ts_ns != NAT_NS
+                if start_ns is not None:
+                    keep &= ts_ns >= start_ns
+                if end_ns is not None:
+                    keep &= ts_ns < end_ns
+                payloads = [p for p, k in zip(payloads, keep.tolist()) if k]
+
+            for payload in payloads:
+                chunk.append(payload)
+                if len(chunk) >= chunk_lines:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def read_range(self, start_ts: Any = None, end_ts: Any = None) -> list[dict[str, Any]]:
+        """Payloads with start_ts <= ts < end_ts (either bound may be None)."""
+
+        return [p for chunk in self.iter_chunks(start_ts=start_ts, end_ts=end_ts) for p in chunk]
+
+
+@dataclass(frozen=True, slots=True)
+class BinaryEventLog:
+    """Columns of a binary event log (see :mod:`simulated_city.event_log`).
+
+    The array fields are views into a read-only memory map of the file: no
+    data is copied or parsed until you index them.
+    """
+
+    ts_ns: Any
+    timestep_index: Any
+    location: Any
+    fill_pct: Any
+    container: Any
+    event: Any
+    location_ids: tuple[str, ...]
+    location_lats: tuple[float, ...]
+    location_lons: tuple[float, ...]
+    containers: tuple[str, ...]
+    events: tuple[str, ...]
+
+    def __len__(self) -> int:
+        return int(self.ts_ns.shape[0])
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the same columns as `events_to_frame`.
+
+        `series` and `event` are categoricals built from the integer codes, and
+        `ts` reinterprets the int64 nanoseconds without parsing.
+        """
+
+        series_names = [series_key(loc, c) for loc in self.location_ids for c in self.containers]
+        series_codes = self.location.astype("int64") * len(self.containers) + self.container
+        ts = pd.DatetimeIndex(self.ts_ns.view("datetime64[ns]")).tz_localize("UTC")
+        return pd.DataFrame(
+            {
+                "ts": ts,
+                "series": pd.Categorical.from_codes(series_codes, categories=series_names),
+                "fill_pct": self.fill_pct.astype("int64"),
+                "timestep_index": self.timestep_index.astype("int64"),
+                "event": pd.Categorical.from_codes(self.event, categories=list(self.events)),
+            }
+        )
+
+
+def read_binary_event_log(path: str) -> BinaryEventLog:
+    """Memory-map a binary event log written with `--log-format binary`."""
+
+    with open(path, "rb") as f:
+        _version, record_count, footer_offset = event_log.read_header(f)
+        f.seek(footer_offset)
+        footer = json.loads(f.read().decode("utf-8"))
+
+    dtype = event_log.record_dtype()
+    if record_count:
+        records = np.memmap(path, dtype=dtype, mode="r", offset=event_log.HEADER.size, shape=(record_count,))
+    else:
+        records = np.zeros(0, dtype=dtype)
+
+    locations = footer.get("locations", [])
+    return BinaryEventLog(
+        ts_ns=records["ts_ns"],
+        timestep_index=records["timestep_index"],
+        location=records["location"],
+        fill_pct=records["fill_pct"],
+        container=records["container"],
+        event=records["event"],
+        location_ids=tuple(str(loc["id"]) for loc in locations),
+        location_lats=tuple(float(loc["lat"]) for loc in locations),
+        location_lons=tuple(float(loc["lon"]) for loc in locations),
+        containers=tuple(footer.get("containers", [])),
+        events=tuple(footer.get("events", [])),
+    )
+
+
+def read_parquet_events(
+    path: str,
+    *,
+    columns: list[str] | None = None,
+    start_ts: Any = None,
+    end_ts: Any = None,
+    location_ids: list[str] | None = None,
+    containers: list[str] | None = None,
+) -> pd.DataFrame:
+    """Load status events from a Parquet log written with `--log-format parquet`.
+
+    Parameters
+    - columns: stored columns to load (default: everything needed for charts).
+      Only these columns are read from disk.
+    - start_ts, end_ts: optional inclusive/exclusive time window
+    - location_ids, containers: optional value filters
+
+    Filters are pushed down to the Parquet reader, which skips row groups whose
+    statistics cannot match (cheap for `ts` because the log is time ordered).
+
+    When both `location_id` and `container` are loaded, a `series` column is
+    added so the frame can be used like the output of `events_to_frame`.
+    """
+
+    try:
+        import pyarrow.parquet as pq  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("pyarrow is required to read Parquet logs. Install the 'parquet' extra.") from e
+
+    if columns is None:
+        columns = ["ts", "location_id", "container", "fill_pct", "timestep_index", "event"]
+
+    filters: list[tuple[str, str, Any]] = []
+    if start_ts is not None:
+        filters.append(("ts", ">=", pd.Timestamp(parse_ts(start_ts))))
+    if end_ts is not None:
+        filters.append(("ts", "<", pd.Timestamp(parse_ts(end_ts))))
+    if location_ids is not None:
+        filters.append(("location_id", "in", list(location_ids)))
+    if containers is not None:
+        filters.append(("container", "in", list(containers)))
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    df = table.to_pandas()
+    if "ts" in df.columns:
+        df["ts"] = pd.to_datetime(df["ts"], utc=True)
+    if "location_id" in df.columns and "container" in df.columns:
+        df["series"] = df["location_id"].astype(str) + "." + df["container"].astype(str)
+    return df
+
+
+def load_event_log_frame(path: str, *, workers: int | None = None) -> pd.DataFrame:
+    """Load a whole simulator log into an `events_to_frame`-style DataFrame.
+
+    The format is picked from the file extension: `.parquet`, `.bin`
+    (binary event log) or anything else as JSONL. `workers` is the number of
+    processes used to parse JSONL (see `read_jsonl_frame`).
+    """
+
+    suffix = str(path).lower().rsplit(".", 1)[-1]
+    if suffix == "parquet":
+        df = read_parquet_events(path)
+        return df[["ts", "series", "fill_pct", "timestep_index", "event"]]
+    if suffix == "bin":
+        return read_binary_event_log(path).to_frame()
+
+    return read_jsonl_frame(path, workers=workers)
+
+
+# Byte range size parsed per task by `read_jsonl_frame`.
+DEFAULT_JSONL_CHUNK_BYTES = 32 * 1024 * 1024
+_MIN_JSONL_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class _JsonlColumns:
+    ts_ns: np.ndarray
+    series: np.ndarray  # codes into series_names
+    series_names: list[str]
+    fill_pct: np.ndarray
+    timestep_index: np.ndarray
+    event: np.ndarray  # codes into event_names
+    event_names: list[str]
+
+
+def _jsonl_chunk_bounds(path: str, chunk_bytes: int) -> list[tuple[int, int]]:
+    """Split a file into byte ranges that start right after a newline."""
+
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        pos = chunk_bytes
+        while pos < size:
+            f.seek(pos - 1)
+            f.readline()
+            start = f.tell()
+            if start >= size:
+                break
+            if start > bounds[-1]:
+                bounds.append(start)
+            pos = max(start, pos) + chunk_bytes
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_jsonl_range(path: str, start: int, end: int) -> _JsonlColumns:
+    """Parse one byte range of a JSONL log into columns (runs in a worker process).
+
+    Applies the same rules as `read_jsonl_all` followed by
+    `event_from_payload`: lines that are not JSON objects with a dict
+    "payload", or whose payload is not a valid status event, are skipped.
+    """
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    raw_ts: list[Any] = []
+    series: list[int] = []
+    series_codes: dict[str, int] = {}
+    fill_pct: list[int] = []
+    timestep_index: list[int] = []
+    event: list[int] = []
+    event_codes: dict[str, int] = {}
+
+    for line in data.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+            payload = obj["payload"] if isinstance(obj, dict) else None
+            if not isinstance(payload, dict):
+                continue
+            ts, key, fill, step, event_name = _payload_fields(payload)
+        except Exception:
+            continue
+
+        raw_ts.append(ts)
+        series.append(series_codes.setdefault(key, len(series_codes)))
+        fill_pct.append(fill)
+        timestep_index.append(step)
+        event.append(event_codes.setdefault(event_name, len(event_codes)))
+
+    # Timestamps are decoded in one batch; rows with an invalid ts are dropped.
+    ts_ns = parse_ts_ns_many(raw_ts, errors="coerce")
+    valid = ts_ns != NAT_NS
+
+    return _JsonlColumns(
+        ts_ns=ts_ns[valid],
+        series=np.array(series, dtype=np.int32)[valid],
+        series_names=list(series_codes),
+        fill_pct=np.array(fill_pct, dtype=np.int64)[valid],
+        timestep_index=np.array(timestep_index, dtype=np.int64)[valid],
+        event=np.array(event, dtype=np.int32)[valid],
+        event_names=list(event_codes),
+    )
+
+
+def _merge_codes(parts: list[tuple[np.ndarray, list[str]]]) -> np.ndarray:
+    """Concatenate per-chunk (codes, names) pairs into one array of names."""
+
+    names: dict[str, int] = {}
+    remapped = []
+    for codes, chunk_names in parts:
+        mapping = np.array([names.setdefault(n, len(names)) for n in chunk_names], dtype=np.int32)
+        remapped.append(mapping[codes] if len(chunk_names) else codes)
+    all_names = np.array(list(names), dtype=object)
+    return all_names[np.concatenate(remapped)] if names else np.array([], dtype=object)
+
+
+def read_jsonl_frame(
+    path: str,
+    *,
+    workers: int | None = None,
+    chunk_bytes: int = DEFAULT_JSONL_CHUNK_BYTES,
+) -> pd.DataFrame:
+    """Load a JSONL log into an `events_to_frame`-style DataFrame, in parallel.
+
+    The file is split into newline-aligned byte ranges that are parsed in a
+    process pool straight into column arrays; rows keep file order. The result
+    matches `read_jsonl_all` + `event_from_payload` + `events_to_frame`
+    (malformed lines are skipped).
+
+    `workers=None` uses every CPU core; `workers=1` (or a file smaller than
+    one chunk) parses in the current process.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError("workers must be > 0")
+
+    size = os.path.getsize(path)
+    # Give every worker at least one chunk on mid-sized files.
+    chunk_bytes = max(1, min(chunk_bytes, max(_MIN_JSONL_CHUNK_BYTES, -(-size // workers))))
+    bounds = _jsonl_chunk_bounds(path, chunk_bytes)
+
+    if workers == 1 or len(bounds) <= 1:
+        parts = [_parse_jsonl_range(path, start, end) for start, end in bounds]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds))) as pool:
+            parts = list(pool.map(_parse_jsonl_range, *zip(*[(path, s, e) for s, e in bounds])))
+
+    if not parts or not any(len(p.ts_ns) for p in parts):
+        return events_to_frame([])
+
+    return pd.DataFrame(
+        {
+            "ts": pd.to_datetime(np.concatenate([p.ts_ns for p in parts]), unit="ns", utc=True),
+            "series": _merge_codes([(p.series, p.series_names) for p in parts]),
+            "fill_pct": np.concatenate([p.fill_pct for p in parts]),
+            "timestep_index": np.concatenate([p.timestep_index for p in parts]),
+            "event": _merge_codes([(p.event, p.event_names) for p in parts]),
+        }
+    )
+
+
+class _GrowableArray:
+    """Append-mostly NumPy array with amortized O(1) appends."""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype: Any, capacity: int = 256) -> None:
+        self.data = np.empty(max(1, capacity), dtype=dtype)
+        self.size = 0
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed > self.data.shape[0]:
+            grown = np.empty(max(needed, 2 * self.data.shape[0]), dtype=self.data.dtype)
+            grown[: self.size] = self.data[: self.size]
+            self.data = grown
+
+    def append(self, value: Any) -> None:
+        self._reserve(1)
+        self.data[self.size] = value
+        self.size += 1
+
+    def insert(self, pos: int, value: Any) -> None:
+        self._reserve(1)
+        self.data[pos + 1 : self.size + 1] = self.data[pos : self.size]
+        self.data[pos] = value
+        self.size += 1
+
+    def view(self) -> np.ndarray:
+        return self.data[: self.size]
+
+
+_NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+class EventStore:
+    """Append-only, columnar store of status events for dashboards.
+
+    Re-building a DataFrame from the whole history on every refresh is
+    O(history). This store does the bookkeeping once per new event instead:
+
+    - columns live in pre-allocated, growable NumPy arrays
+    - each series keeps its own timestamp-sorted index (appends are O(1);
+      out-of-order events are inserted with a binary search)
+    - duplicates (same ts, series, fill_pct and event) are dropped on ingest
+    - the start of the latest run is tracked incrementally: an `init` event or
+      a fill decrease within a series starts a new run (a `collected` event,
+      which empties a container, does not)
+    - the latest value per series is always available
+
+    `window()` and `latest()` then return small DataFrames for the current run
+    without touching older history.
+
+    The store is thread-safe, so one ingest thread can feed it while several
+    dashboard sessions read from it. Rows are never removed: `seq` is the
+    number of rows so far and works as a per-reader cursor (see `since`).
+
+    `enqueue_payload` only buffers a payload (cheap enough for an MQTT
+    callback); buffered payloads are ingested as one `ingest_payloads` batch
+    before the next read, or once `ingest_batch_size` are waiting.
+    """
+
+    ingest_batch_size = 2_000
+
+    def __init__(self, initial_capacity: int = 4096) -> None:
+        self._ts = _GrowableArray(np.int64, initial_capacity)
+        self._series = _GrowableArray(np.int32, initial_capacity)
+        self._fill = _GrowableArray(np.int16, initial_capacity)
+        self._timestep = _GrowableArray(np.int32, initial_capacity)
+        self._event = _GrowableArray(np.int16, initial_capacity)
+
+        self._series_names: list[str] = []
+        self._series_codes: dict[str, int] = {}
+        self._event_names: list[str] = []
+        self._event_codes: dict[str, int] = {}
+
+        # Per series: timestamps (sorted) and the matching row numbers.
+        self._series_ts: list[_GrowableArray] = []
+        self._series_rows: list[_GrowableArray] = []
+
+        self.run_start_ns: int | None = None
+        self.max_ts_ns: int | None = None
+
+        self._lock = threading.RLock()
+        self._pending: list[dict[str, Any]] = []
+        self._pending_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self.flush_pending()
+        return self._ts.size
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the next row; increases with every added event."""
+
+        self.flush_pending()
+        return self._ts.size
+
+    @property
+    def series_names(self) -> tuple[str, ...]:
+        self.flush_pending()
+        return tuple(self._series_names)
+
+    def enqueue_payload(self, payload: dict[str, Any]) -> None:
+        """Buffer a simulator payload for the next batched ingest (see the class docstring)."""
+
+        with self._pending_lock:
+            self._pending.append(payload)
+            full = len(self._pending) >= self.ingest_batch_size
+        if full:
+            self.flush_pending()
+
+    def flush_pending(self) -> int:
+        """Ingest the buffered payloads in one batch. Returns the number added."""
+
+        with self._pending_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+        return self.ingest_payloads(batch)
+
+    def _series_code(self, name: str) -> int:
+        code = self._series_codes.get(name)
+        if code is None:
+            code = self._series_codes[name] = len(self._series_names)
+            self._series_names.append(name)
+            self._series_ts.append(_GrowableArray(np.int64, 64))
+            self._series_rows.append(_GrowableArray(np.int64, 64))
+        return code
+
+    def _event_code(self, name: str) -> int:
+        code = self._event_codes.get(name)
+        if code is None:
+            code = self._event_codes[name] = len(self._event_names)
+            self._event_names.append(name)
+        return code
+
+    def _mark_run_start(self, ts_ns: int) -> None:
+        if self.run_start_ns is None or ts_ns > self.run_start_ns:
+            self.run_start_ns = ts_ns
+
+    def add(
+        self,
+        *,
+        ts_ns: int,
+        series: str,
+        fill_pct: int,
+        timestep_index: int = 0,
+        event: str = "status",
+    ) -> bool:
+        """Add one event. Returns False if it was a duplicate."""
+
+        with self._lock:
+            return self._add(ts_ns, series, fill_pct, timestep_index, event)
+
+    def _add(self, ts_ns: int, series: str, fill_pct: int, timestep_index: int, event: str) -> bool:
+        code = self._series_code(series)
+        event_code = self._event_code(event)
+        series_ts = self._series_ts[code]
+        series_rows = self._series_rows[code]
+        ts_view = series_ts.view()
+        fills = self._fill.data
+        events = self._event.data
+
+        if series_ts.size == 0 or ts_view[-1] <= ts_ns:
+            pos = series_ts.size
+        else:
+            pos = int(np.searchsorted(ts_view, ts_ns, side="right"))
+
+        # Duplicates share the timestamp, so they sit right before `pos`.
+        j = pos - 1
+        while j >= 0 and ts_view[j] == ts_ns:
+            row = series_rows.data[j]
+            if fills[row] == fill_pct and events[row] == event_code:
+                return False
+            j -= 1
+
+        row = self._ts.size
+        self._ts.append(ts_ns)
+        self._series.append(code)
+        self._fill.append(fill_pct)
+        self._timestep.append(timestep_index)
+        self._event.append(event_code)
+        fills = self._fill.data
+
+        if pos == series_ts.size:
+            series_ts.append(ts_ns)
+            series_rows.append(row)
+        else:
+            series_ts.insert(pos, ts_ns)
+            series_rows.insert(pos, row)
+
+        # Run-start detection: init markers, or a fill decrease in time order
+        # (older logs without init markers that were appended across runs).
+        # Decreases to a `collected` event are emptied containers, not new runs.
+        if event == "init":
+            self._mark_run_start(ts_ns)
+        if pos > 0 and event != "collected" and fill_pct < fills[series_rows.data[pos - 1]]:
+            self._mark_run_start(ts_ns)
+        if pos + 1 < series_rows.size:
+            next_row = series_rows.data[pos + 1]
+            if fills[next_row] < fill_pct and self._event_names[self._event.data[next_row]] != "collected":
+                self._mark_run_start(int(series_ts.data[pos + 1]))
+
+        if self.max_ts_ns is None or ts_ns > self.max_ts_ns:
+            self.max_ts_ns = ts_ns
+        return True
+
+    def add_event(self, e: StatusEvent) -> bool:
+        with self._lock:
+            return self._add_event(e)
+
+    def _add_event(self, e: StatusEvent) -> bool:
+        return self._add(
+            event_log.datetime_to_ns(e.ts),
+            series_key(e.location_id, e.container),
+            e.fill_pct,
+            e.timestep_index,
+            e.event,
+        )
+
+    def ingest_payloads(self, payloads: Iterable[dict[str, Any]]) -> int:
+        """Add simulator payload dicts, skipping malformed ones. Returns the number added."""
+
+        raw_ts: list[Any] = []
+        rows: list[tuple[str, int, int, str]] = []
+        for payload in payloads:
+            try:
+                ts, *row = _payload_fields(payload)
+            except Exception:
+                continue
+            raw_ts.append(ts)
+            rows.append(tuple(row))
+
+        ts_ns = parse_ts_ns_many(raw_ts, errors="coerce")
+        added = 0
+        with self._lock:
+            for ts, (series, fill_pct, timestep_index, event) in zip(ts_ns.tolist(), rows):
+                if ts != NAT_NS:
+                    added += self._add(ts, series, fill_pct, timestep_index, event)
+        return added
+
+    def ingest_frame(self, df: pd.DataFrame) -> int:
+        """Add rows of an `events_to_frame`-style DataFrame. Returns the number added."""
+
+        if df.empty:
+            return 0
+        # `.astype("int64")` would return the column's own unit (pandas may use µs).
+        ts_ns = pd.to_datetime(df["ts"], utc=True).astype("datetime64[ns, UTC]").astype("int64").to_numpy()
+        rows = zip(
+            ts_ns,
+            df["series"].astype(str),
+            df["fill_pct"].to_numpy(),
+            df["timestep_index"].to_numpy(),
+            df["event"].astype(str),
+        )
+        added = 0
+        with self._lock:
+            for ts, series, fill_pct, timestep_index, event in rows:
+                added += self._add(int(ts), series, int(fill_pct), int(timestep_index), event)
+        return added
+
+    def _frame(self, rows: np.ndarray) -> pd.DataFrame:
+        # Present rows in (ts, series) order, like the dashboards always did.
+        ts = self._ts.data[rows]
+        series = self._series.data[rows]
+        order = np.lexsort((series, ts))
+        rows = rows[order]
+
+        series_names = np.array(self._series_names, dtype=object)
+        event_names = np.array(self._event_names, dtype=object)
+        return pd.DataFrame(
+            {
+                "ts": pd.to_datetime(self._ts.data[rows], unit="ns", utc=True),
+                "series": series_names[self._series.data[rows]] if rows.size else np.array([], dtype=object),
+                "fill_pct": self._fill.data[rows].astype(np.int64),
+                "timestep_index": self._timestep.data[rows].astype(np.int64),
+                "event": event_names[self._event.data[rows]] if rows.size else np.array([], dtype=object),
+            }
+        )
+
+    def window(self, days: float | None = None) -> pd.DataFrame:
+        """Events of the current run within `days` of the latest timestamp.
+
+        Each series also keeps its last value before the cutoff, so step
+        charts do not jump at the left edge. `days=None` returns the whole run.
+        """
+
+        self.flush_pending()
+        with self._lock:
+            return self._window(days)
+
+    def _window(self, days: float | None) -> pd.DataFrame:
+        if self.max_ts_ns is None:
+            return self._frame(np.empty(0, dtype=np.int64))
+
+        run_start = self.run_start_ns if self.run_start_ns is not None else np.iinfo(np.int64).min
+        cutoff = run_start
+        if days is not None:
+            cutoff = max(run_start, self.max_ts_ns - int(days * _NS_PER_DAY))
+
+        parts: list[np.ndarray] = []
+        for series_ts, series_rows in zip(self._series_ts, self._series_rows):
+            ts_view = series_ts.view()
+            first_in_run = int(np.searchsorted(ts_view, run_start, side="left"))
+            first_in_window = int(np.searchsorted(ts_view, cutoff, side="left"))
+            start = first_in_window - 1 if first_in_window > first_in_run else first_in_window
+            if start < series_rows.size:
+                parts.append(series_rows.view()[start:])
+
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return self._frame(rows)
+
+    def latest(self) -> pd.DataFrame:
+        """Latest value per series in the current run (columns: ts, series, fill_pct)."""
+
+        self.flush_pending()
+        with self._lock:
+            return self._latest()
+
+    def since(self, cursor: int) -> tuple[pd.DataFrame, int]:
+        """Events added after `cursor` (a previous `seq`), and the new cursor.
+
+        Rows come in (ts, series) order regardless of arrival order.
+        """
+
+        self.flush_pending()
+        with self._lock:
+            end = self._ts.size
+            return self._frame(np.arange(min(cursor, end), end, dtype=np.int64)), end
+
+    def _latest(self) -> pd.DataFrame:
+        run_start = self.run_start_ns if self.run_start_ns is not None else np.iinfo(np.int64).min
+        rows = [
+            series_rows.data[series_rows.size - 1]
+            for series_ts, series_rows in zip(self._series_ts, self._series_rows)
+            if series_rows.size and series_ts.data[series_ts.size - 1] >= run_start
+        ]
+        df = self._frame(np.array(rows, dtype=np.int64))
+        return df[["ts", "series", "fill_pct"]].sort_values("series").reset_index(drop=True)
+
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb", "none")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-triangle-three-buckets: indices of `n_out` representative points.
+
+    `x` must be sorted. The first and last points are always kept; each bucket
+    in between contributes the point forming the largest triangle with the
+    previously kept point and the average of the next bucket.
+    """
+
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs n_out >= 3")
+
+    # Relative float coordinates keep ns timestamps precise.
+    x = np.asarray(x, dtype=np.float64) - float(x[0])
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        next_lo = hi
+        next_hi = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    out[-1] = n - 1
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the first, last, and min/max point of each bucket (sorted).
+
+    Peaks and dips survive, so threshold crossings stay visible. Returns at
+    most `n_out` indices.
+    """
+
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 4:
+        raise ValueError("min/max downsampling needs n_out >= 4")
+
+    buckets = (n_out - 2) // 2
+    interior = np.arange(1, n - 1)
+    bucket = ((interior - 1) * buckets) // (n - 2)
+
+    # Sort by (bucket, value): the first row of each bucket is its minimum and
+    # the last its maximum. lexsort is stable, so ties keep time order.
+    order = np.lexsort((np.asarray(y)[interior], bucket))
+    sorted_bucket = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+
+    picked = np.concatenate(([0], interior[order[starts]], interior[order[ends]], [n - 1]))
+    return np.unique(picked)
+
+
+def downsample_series(
+    df: pd.DataFrame,
+    *,
+    max_points_per_series: int = 500,
+    method: str = "minmax",
+    end_ts: Any = None,
+) -> pd.DataFrame:
+    """Reduce a long (ts, series, fill_pct) frame to a bounded chart frame.
+
+    Each series keeps at most `max_points_per_series` points, chosen with
+    `method` ("minmax", "lttb" or "none" to keep everything). Series whose last
+    event is before `end_ts` (default: the latest ts in `df`) get one extra
+    point there with their last value, so step-after lines reach the right
+    edge without the dense pivot/ffill of every series at every timestamp.
+    """
+
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"method must be one of {DOWNSAMPLE_METHODS}")
+    if max_points_per_series < 4:
+        raise ValueError("max_points_per_series must be >= 4")
+
+    if df.empty:
+        return pd.DataFrame({"ts": df["ts"], "series": df["series"], "fill_pct": df["fill_pct"]})
+
+    # Group by integer series codes; sorting millions of strings is slow.
+    codes, names = pd.factorize(df["series"].astype(str), sort=True)
+    ts_ns = pd.to_datetime(df["ts"], utc=True).astype("datetime64[ns, UTC]").astype("int64").to_numpy()
+    order = np.lexsort((ts_ns, codes))
+    codes = codes[order]
+    ts_ns = ts_ns[order]
+    fill = df["fill_pct"].to_numpy()[order]
+
+    end_ns = int(ts_ns.max()) if end_ts is None else int(pd.Timestamp(end_ts).value)
+    # Reserve one point for the right-edge extension.
+    budget = max_points_per_series - 1
+
+    bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+    keep: list[np.ndarray] = []
+    tail_rows: list[int] = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if method == "none" or stop - start <= budget:
+            idx = np.arange(stop - start)
+        elif method == "lttb":
+            idx = lttb_indices(ts_ns[start:stop], fill[start:stop], budget)
+        else:
+            idx = minmax_indices(fill[start:stop], budget)
+        keep.append(start + idx)
+        if ts_ns[stop - 1] < end_ns:
+            tail_rows.append(stop - 1)
+
+    rows = np.concatenate(keep)
+    tail = np.array(tail_rows, dtype=np.int64)
+    out_ts = np.concatenate((ts_ns[rows], np.full(len(tail), end_ns, dtype=np.int64)))
+    out_codes = np.concatenate((codes[rows], codes[tail]))
+    out_fill = np.concatenate((fill[rows], fill[tail]))
+
+    order = np.lexsort((out_ts, out_codes))
+    return pd.DataFrame(
+        {
+            "ts": pd.to_datetime(out_ts[order], unit="ns", utc=True),
+            "series": np.asarray(names, dtype=object)[out_codes[order]],
+            "fill_pct": out_fill[order],
+        }
+    )
+
+
 def drain_queue(q: queue.Queue[dict[str, Any]], max_items: int = 5_000) -> list[dict[str, Any]]:
     items: list[dict[str, Any]] = []
     for _ in range(max_items):
@@ -141,6 +1278,41 @@ def start_mqtt_listener(
     Returns (queue, client). Stop with `stop_mqtt_listener(client)`.
     """
 
+    q: queue.Queue[dict[str, Any]] = queue.Queue()
+    client = _start_mqtt_client(mqtt_cfg, topic_filter, q.put, client_id_suffix=client_id_suffix)
+    return q, client
+
+
+def start_mqtt_ingest(
+    mqtt_cfg: MqttConfig,
+    topic_filter: str,
+    store: EventStore | None = None,
+    *,
+    client_id_suffix: str = "ingest",
+) -> tuple[EventStore, Any]:
+    """Start one MQTT subscriber that feeds a shared `EventStore`.
+
+    Unlike `start_mqtt_listener` (one queue, one consumer), any number of
+    readers can use the returned store: each keeps its own `store.seq` cursor
+    and reads windows or `store.since(cursor)` without draining anything.
+    Messages are buffered on the network thread and decoded in batches (see
+    `EventStore.enqueue_payload`).
+
+    Returns (store, client). Stop with `stop_mqtt_listener(client)`.
+    """
+
+    store = EventStore() if store is None else store
+    client = _start_mqtt_client(mqtt_cfg, topic_filter, store.enqueue_payload, client_id_suffix=client_id_suffix)
+    return store, client
+
+
+def _start_mqtt_client(
+    mqtt_cfg: MqttConfig,
+    topic_filter: str,
+    on_payload: Any,
+    *,
+    client_id_suffix: str,
+) -> Any:
     try:
         import paho.mqtt.client as mqtt
     except ModuleNotFoundError as e:
@@ -151,14 +1323,12 @@ def start_mqtt_listener(
             "MQTT credentials are not set. Create a .env with HIVEMQ_USERNAME and HIVEMQ_PASSWORD (or export them)."
         )
 
-    q: queue.Queue[dict[str, Any]] = queue.Queue()
-
     def on_message(_client, _userdata, msg):
         try:
             payload_str = msg.payload.decode("utf-8", errors="replace")
             payload = json.loads(payload_str)
             if isinstance(payload, dict):
-                q.put(payload)
+                on_payload(payload)
         except Exception:
             # Keep subscriber robust for workshops.
             return
@@ -188,11 +1358,11 @@ def start_mqtt_listener(
     # Run network loop in background thread.
     client.loop_start()
 
-    return q, client
+    return client
 
 
 def stop_mqtt_listener(client: Any) -> None:
-    """Best-effort stop for a client returned by `start_mqtt_listener`."""
+    """Best-effort stop for a client returned by `start_mqtt_listener` or `start_mqtt_ingest`."""
 
     try:
         client.loop_stop()
@@ -0,0 +1,436 @@
+from __future__ import annotations
+
+"""Monte Carlo ensembles: many replicate runs of one configuration.
+
+`run_ensemble` runs `replicates` copies of the simulation with seeds derived
+from one base seed. Nothing is published; each replicate is folded into an
+`EnsembleStats` as it runs and then discarded, so memory depends on the
+number of locations and timesteps but not on the number of replicates:
+
+- fill levels are integers 0..100, so a 101-bin histogram per
+  (timestep, location, container) gives exact fill quantiles;
+- the first timestep a container reaches 80% / 100% is counted in a
+  histogram over timesteps (plus one bin for "not within the run");
+- the number of replicates with all three containers of a location full is
+  counted per timestep.
+
+Trucks configured in `simulation.collection` empty containers in every
+replicate, just as in a single run.
+
+Partial statistics merge by adding counts, so replicates can be spread over
+worker processes. `summary_rows` and `timestep_rows` return long-format
+tables (one dict per row) that load straight into a DataFrame; `write_csv`
+saves them.
+"""
+
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import math
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Sequence
+
+from .collection import CollectionScheduler
+from .config import SimulationConfig
+from .rng_streams import derive_seed, resolve_seed
+from .rubbish_sim import ENGINE_NAMES, SimulationEngine, make_engine
+
+
+CONTAINERS = ("left", "center", "right")
+THRESHOLDS_PCT = (80, 100)
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+_FILL_BINS = 101
+
+
+def replicate_seed(seed: int, replicate: int) -> int:
+    """Seed of replicate number `replicate` in an ensemble with base `seed`."""
+
+    return derive_seed(seed, "replicate", replicate)
+
+
+def _zeros(n: int) -> array:
+    return array("Q", [0]) * n
+
+
+@dataclass(slots=True)
+class EnsembleStats:
+    """Streaming statistics over replicate runs of one configuration.
+
+    Fill statistics are kept for every `stride`-th timestep (`sampled_steps`);
+    time-to-threshold statistics use every timestep.
+    """
+
+    location_ids: tuple[str, ...]
+    steps: int
+    timestep_minutes: int
+    stride: int = 1
+    replicates: int = 0
+    fill_counts: array = field(init=False, repr=False)
+    reach_counts: array = field(init=False, repr=False)
+    all_full_counts: array = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.steps <= 0:
+            raise ValueError("steps must be > 0")
+        if self.stride <= 0:
+            raise ValueError("stride must be > 0")
+        cells = len(self.location_ids) * len(CONTAINERS)
+        samples = len(self.sampled_steps)
+        # [sample][location][container][fill_pct]
+        self.fill_counts = _zeros(samples * cells * _FILL_BINS)
+        # [threshold][location][container][first step]; bin `steps` = never
+        self.reach_counts = _zeros(len(THRESHOLDS_PCT) * cells * (self.steps + 1))
+        # [sample][location]
+        self.all_full_counts = _zeros(samples * len(self.location_ids))
+
+    @classmethod
+    def for_config(cls, sim_cfg: SimulationConfig, *, steps: int, stride: int = 1) -> "EnsembleStats":
+        return cls(
+            location_ids=tuple(loc.location_id for loc in sim_cfg.locations),
+            steps=steps,
+            timestep_minutes=sim_cfg.timestep_minutes,
+            stride=stride,
+        )
+
+    @property
+    def sampled_steps(self) -> range:
+        return range(self.stride - 1, self.steps, self.stride)
+
+    def add_replicate(self, engine: SimulationEngine, collector: CollectionScheduler | None = None) -> None:
+        """Run `engine` for `steps` timesteps and add its trajectory.
+
+        With `collector`, trucks empty containers as in `run_steps`.
+        """
+
+        n_locations = len(self.location_ids)
+        if engine.location_count != n_locations:
+            raise ValueError("engine and statistics have different locations")
+        cells = n_locations * len(CONTAINERS)
+        never = self.steps
+        first_reach = [[never] * cells for _ in THRESHOLDS_PCT]
+        fill_counts = self.fill_counts
+        all_full_counts = self.all_full_counts
+
+        for step in range(self.steps):
+            if collector is None:
+                engine.step(step)
+            else:
+                collector.collect(engine, step)
+                collector.observe(engine, engine.step(step), step)
+            fills = _current_fills(engine)
+
+            for t, threshold in enumerate(THRESHOLDS_PCT):
+                reached = first_reach[t]
+                for cell, fill in enumerate(fills):
+                    if fill >= threshold and reached[cell] == never:
+                        reached[cell] = step
+
+            if (step + 1) % self.stride == 0:
+                sample = step // self.stride
+                base = sample * cells * _FILL_BINS
+                for cell, fill in enumerate(fills):
+                    fill_counts[base + cell * _FILL_BINS + fill] += 1
+                full_base = sample * n_locations
+                for location_index in range(n_locations):
+                    if min(fills[3 * location_index : 3 * location_index + 3]) >= 100:
+                        all_full_counts[full_base + location_index] += 1
+
+        for t, reached in enumerate(first_reach):
+            base = t * cells * (self.steps + 1)
+            for cell, step in enumerate(reached):
+                self.reach_counts[base + cell * (self.steps + 1) + step] += 1
+        self.replicates += 1
+
+    def merge(self, other: "EnsembleStats") -> None:
+        """Add the replicates counted in `other` (same locations, steps and stride)."""
+
+        if (other.location_ids, other.steps, other.stride) != (self.location_ids, self.steps, self.stride):
+            raise ValueError("cannot merge statistics of different ensembles")
+        for mine, theirs in (
+            (self.fill_counts, other.fill_counts),
+            (self.reach_counts, other.reach_counts),
+            (self.all_full_counts, other.all_full_counts),
+        ):
+            for i, count in enumerate(theirs):
+                if count:
+                    mine[i] += count
+        self.replicates += other.replicates
+
+    def _hours(self, step: int) -> float:
+        """Simulated hours from the start until the end of timestep `step`."""
+
+        return (step + 1) * self.timestep_minutes / 60.0
+
+    def summary_rows(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> list[dict[str, Any]]:
+        """One row per location and container: time-to-threshold statistics.
+
+        ``p_reach_<pct>`` is the fraction of replicates that reached the
+        threshold within the run; ``t<pct>_p<q>_h`` is the q-quantile of the
+        time to reach it in hours, empty when more than ``1 - q`` of the
+        replicates never got there. ``p_all_full_end`` is the probability
+        that the whole location is full at the last sampled timestep.
+        """
+
+        cells = len(self.location_ids) * len(CONTAINERS)
+        last_sample = len(self.sampled_steps) - 1
+        rows: list[dict[str, Any]] = []
+        for location_index, location_id in enumerate(self.location_ids):
+            p_all_full_end = (
+                self._fraction(self.all_full_counts[last_sample * len(self.location_ids) + location_index])
+                if last_sample >= 0
+                else None
+            )
+            for c, container in enumerate(CONTAINERS):
+                cell = location_index * len(CONTAINERS) + c
+                row: dict[str, Any] = {"location_id": location_id, "container": container}
+                for t, threshold in enumerate(THRESHOLDS_PCT):
+                    start = (t * cells + cell) * (self.steps + 1)
+                    counts = self.reach_counts[start : start + self.steps + 1]
+                    row[f"p_reach_{threshold}"] = self._fraction(self.replicates - counts[self.steps])
+                    for q in quantiles:
+                        step = _histogram_quantile(counts, q)
+                        row[f"t{threshold}_p{_pct(q)}_h"] = (
+                            None if step is None or step == self.steps else self._hours(step)
+                        )
+                row["p_all_full_end"] = p_all_full_end
+                rows.append(row)
+        return rows
+
+    def timestep_rows(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> list[dict[str, Any]]:
+        """One row per sampled timestep, location and container: fill level statistics.
+
+        ``p_all_full`` (per location, repeated for its three containers) is
+        the probability that all of the location's containers are full.
+        """
+
+        n_locations = len(self.location_ids)
+        cells = n_locations * len(CONTAINERS)
+        rows: list[dict[str, Any]] = []
+        for sample, step in enumerate(self.sampled_steps):
+            for location_index, location_id in enumerate(self.location_ids):
+                p_all_full = self._fraction(self.all_full_counts[sample * n_locations + location_index])
+                for c, container in enumerate(CONTAINERS):
+                    start = ((sample * cells) + location_index * len(CONTAINERS) + c) * _FILL_BINS
+                    counts = self.fill_counts[start : start + _FILL_BINS]
+                    row: dict[str, Any] = {
+                        "timestep_index": step,
+                        "hours": self._hours(step),
+                        "location_id": location_id,
+                        "container": container,
+                        "fill_mean": (
+                            sum(fill * n for fill, n in enumerate(counts)) / self.replicates
+                            if self.replicates
+                            else None
+                        ),
+                    }
+                    for q in quantiles:
+                        row[f"fill_p{_pct(q)}"] = _histogram_quantile(counts, q)
+                    row["p_all_full"] = p_all_full
+                    rows.append(row)
+        return rows
+
+    def _fraction(self, count: int) -> float | None:
+        return count / self.replicates if self.replicates else None
+
+
+def _current_fills(engine: SimulationEngine) -> list[int]:
+    """Fill levels of every container, flattened as [loc0 left, loc0 center, ...]."""
+
+    fills = getattr(engine, "fills", None)
+    if fills is not None:
+        # NumPy engine: one (locations, 3) array.
+        return fills.ravel().tolist()
+    out: list[int] = []
+    for location_index in range(engine.location_count):
+        state = engine.location_state(location_index)
+        out += (state.left.fill_pct, state.center.fill_pct, state.right.fill_pct)
+    return out
+
+
+def _histogram_quantile(counts: Sequence[int], q: float) -> int | None:
+    """Smallest bin whose cumulative count reaches rank ``ceil(q * total)``."""
+
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = max(1, math.ceil(q * total))
+    cumulative = 0
+    for value, n in enumerate(counts):
+        cumulative += n
+        if cumulative >= rank:
+            return value
+    return len(counts) - 1
+
+
+def _pct(q: float) -> str:
+    return f"{q * 100:g}"
+
+
+def _add_replicates(
+    stats: EnsembleStats,
+    sim_cfg: SimulationConfig,
+    engine: str,
+    seeds: Sequence[int],
+    start_ts: datetime,
+) -> None:
+    for seed in seeds:
+        sim_engine = make_engine(engine, sim_cfg, seed=seed, start_ts=start_ts)
+        collector = CollectionScheduler(sim_cfg) if sim_cfg.collection is not None else None
+        try:
+            stats.add_replicate(sim_engine, collector)
+        finally:
+            sim_engine.close()
+
+
+def _run_replicates(
+    sim_cfg: SimulationConfig,
+    engine: str,
+    steps: int,
+    stride: int,
+    seeds: Sequence[int],
+    start_ts: datetime,
+) -> EnsembleStats:
+    stats = EnsembleStats.for_config(sim_cfg, steps=steps, stride=stride)
+    _add_replicates(stats, sim_cfg, engine, seeds, start_ts)
+    return stats
+
+
+def run_ensemble(
+    sim_cfg: SimulationConfig,
+    *,
+    replicates: int,
+    steps: int,
+    seed: int | None = None,
+    engine: str = "python",
+    workers: int | None = None,
+    stride: int = 1,
+    progress: Callable[[int, int], None] | None = None,
+) -> EnsembleStats:
+    """Run `replicates` independent runs of `steps` timesteps and aggregate them.
+
+    Replicate ``r`` uses ``replicate_seed(seed, r)`` (`seed` defaults to
+    `simulation.seed`, or a random seed), so the result does not depend on
+    `workers`. `engine` selects the engine per replicate (see `ENGINE_NAMES`;
+    "numpy" vectorizes over locations). With `workers`, replicates are split
+    into chunks that run in that many processes and are merged as they
+    finish. `progress(done, total)` is called after each chunk.
+
+    All replicates start at `simulation.start_time`, or at the current time
+    if it is unset, so arrival profiles line up across replicates.
+    """
+
+    if replicates <= 0:
+        raise ValueError("replicates must be > 0")
+    if not sim_cfg.locations:
+        raise ValueError("No simulation configured. Add a 'simulation.locations' section in config.yaml.")
+
+    base_seed = resolve_seed(seed if seed is not None else sim_cfg.seed)
+    seeds = [replicate_seed(base_seed, r) for r in range(replicates)]
+    start_ts = sim_cfg.start_time or datetime.now(timezone.utc)
+
+    if workers is None or workers <= 1:
+        stats = EnsembleStats.for_config(sim_cfg, steps=steps, stride=stride)
+        chunk = max(1, replicates // 100)
+        for start in range(0, replicates, chunk):
+            _add_replicates(stats, sim_cfg, engine, seeds[start : start + chunk], start_ts)
+            if progress is not None:
+                progress(stats.replicates, replicates)
+        return stats
+
+    # A few chunks per worker keeps the processes busy without much merging.
+    chunk = max(1, math.ceil(replicates / (workers * 4)))
+    stats = EnsembleStats.for_config(sim_cfg, steps=steps, stride=stride)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_replicates, sim_cfg, engine, steps, stride, seeds[start : start + chunk], start_ts)
+            for start in range(0, replicates, chunk)
+        ]
+        for future in as_completed(futures):
+            stats.merge(future.result())
+            if progress is not None:
+                progress(stats.replicates, replicates)
+    return stats
+
+
+def write_csv(path: str, rows: Sequence[dict[str, Any]]) -> None:
+    """Write `summary_rows()` / `timestep_rows()` output as CSV (empty cells for None)."""
+
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        if not rows:
+            return
+        writer = csv.DictWriter(fp, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def format_summary(rows: Sequence[dict[str, Any]]) -> str:
+    """Render `summary_rows()` as a fixed-width text table."""
+
+    def cell(value: Any, *, pct: bool = False) -> str:
+        if value is None:
+            return "-"
+        return f"{value:.0%}" if pct else f"{value:.1f}"
+
+    lines = [f"{'location':<16} {'container':<9} {'P(80%)':>7} {'t80 p50 h':>10} {'P(full)':>8} {'full p50 h':>11}"]
+    for row in rows:
+        lines.append(
+            f"{row['location_id']:<16} {row['container']:<9} "
+            f"{cell(row['p_reach_80'], pct=True):>7} {cell(row.get('t80_p50_h')):>10} "
+            f"{cell(row['p_reach_100'], pct=True):>8} {cell(row.get('t100_p50_h')):>11}"
+        )
+    return "\n".join(lines)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the `ensemble` subcommand options to `parser`."""
+
+    parser.add_argument("--replicates", type=int, default=1000, help="Number of replicate runs")
+    parser.add_argument("--steps", type=int, default=96, help="Timesteps per replicate")
+    parser.add_argument("--seed", type=int, default=None, help="Base seed (default: simulation.seed)")
+    parser.add_argument("--engine", choices=ENGINE_NAMES, default="python", help="Engine used for each replicate")
+    parser.add_argument("--workers", type=int, default=None, help="Run replicates in N worker processes")
+    parser.add_argument(
+        "--stride",
+        type=int,
+        default=1,
+        help="Keep fill-level statistics for every Nth timestep only (bounds memory for long runs)",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Write <OUTPUT>_summary.csv and <OUTPUT>_timesteps.csv",
+    )
+
+
+def run_cli(args: argparse.Namespace, sim_cfg: SimulationConfig | None) -> int:
+    """Run the ensemble selected by `args`. Returns the process exit code."""
+
+    if sim_cfg is None or not sim_cfg.locations:
+        print("No simulation configured. Add a 'simulation.locations' section in config.yaml.", file=sys.stderr)
+        return 2
+
+    def progress(done: int, total: int) -> None:
+        print(f"\r{done}/{total} replicates", end="", file=sys.stderr, flush=True)
+
+    stats = run_ensemble(
+        sim_cfg,
+        replicates=args.replicates,
+        steps=args.steps,
+        seed=args.seed,
+        engine=args.engine,
+        workers=args.workers,
+        stride=args.stride,
+        progress=progress,
+    )
+    print(file=sys.stderr)
+
+    summary = stats.summary_rows()
+    print(format_summary(summary))
+    if args.output:
+        write_csv(f"{args.output}_summary.csv", summary)
+        write_csv(f"{args.output}_timesteps.csv", stats.timestep_rows())
+        print(f"wrote {args.output}_summary.csv and {args.output}_timesteps.csv")
+    return 0
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+"""Compact binary event log for simulator status events.
+
+JSONL logs are easy to inspect but large and slow to parse. This module
+defines a fixed-width binary format that can be memory-mapped and read as
+NumPy arrays without parsing (see `dashboard_data.read_binary_event_log`).
+
+File layout (little endian):
+
+- Header, 32 bytes:
+  ``magic (8s) | version (u16) | record_size (u16) | reserved (u32) |
+  record_count (u64) | footer_offset (u64)``
+- ``record_count`` records of 24 bytes each:
+  ``ts_ns (i64) | timestep_index (i32) | location (u32) | fill_pct (u8) |
+  container (u8) | event (u8) | 5 padding bytes``
+- Footer: UTF-8 JSON string table
+  ``{"locations": [{"id", "lat", "lon"}, ...], "containers": [...], "events": [...]}``
+
+`location`, `container` and `event` are indexes into the footer lists. The
+header and footer are written on `close()`; a log whose writer crashed has
+``footer_offset == 0`` and is rejected by readers.
+
+The writer uses only the standard library; reading needs NumPy.
+"""
+
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import struct
+from typing import BinaryIO
+
+
+MAGIC = b"SCEVLOG\x00"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQQ")
+RECORD = struct.Struct("<qiIBBB5x")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def record_dtype():
+    """Return the NumPy structured dtype matching `RECORD`."""
+
+    import numpy as np  # type: ignore[import-not-found]
+
+    return np.dtype(
+        {
+            "names": ["ts_ns", "timestep_index", "location", "fill_pct", "container", "event"],
+            "formats": ["<i8", "<i4", "<u4", "u1", "u1", "u1"],
+            "offsets": [0, 8, 12, 16, 17, 18],
+            "itemsize": RECORD.size,
+        }
+    )
+
+
+def datetime_to_ns(ts: datetime) -> int:
+    """Convert an aware datetime to integer nanoseconds since the Unix epoch."""
+
+    delta = ts.astimezone(timezone.utc) - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+
+class BinaryEventLogWriter:
+    """Append status events to a binary event log file."""
+
+    def __init__(self, path: str | Path, *, buffer_records: int = 65_536) -> None:
+        self.path = Path(path)
+        self.buffer_records = buffer_records
+        self.record_count = 0
+
+        self._fp: BinaryIO | None = open(self.path, "wb")
+        self._buffer = bytearray()
+        self._buffered = 0
+
+        self._locations: list[dict] = []
+        self._location_index: dict[str, int] = {}
+        self._containers: list[str] = []
+        self._container_index: dict[str, int] = {}
+        self._events: list[str] = []
+        self._event_index: dict[str, int] = {}
+
+        # Placeholder header; patched with the final counts on close().
+        self._fp.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, 0, 0, 0))
+
+    def _intern(self, value: str, table: list[str], index: dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            if len(table) >= 256:
+                raise ValueError("binary event log supports at most 256 distinct containers/events")
+            code = index[value] = len(table)
+            table.append(value)
+        return code
+
+    def _location_code(self, location_id: str, lat: float, lon: float) -> int:
+        code = self._location_index.get(location_id)
+        if code is None:
+            code = self._location_index[location_id] = len(self._locations)
+            self._locations.append({"id": location_id, "lat": lat, "lon": lon})
+        return code
+
+    def write(
+        self,
+        *,
+        ts_ns: int,
+        location_id: str,
+        lat: float,
+        lon: float,
+        container: str,
+        fill_pct: int,
+        timestep_index: int,
+        event: str,
+    ) -> None:
+        """Append one event record."""
+
+        if self._fp is None:
+            raise ValueError("BinaryEventLogWriter is closed")
+
+        self._buffer += RECORD.pack(
+            ts_ns,
+            timestep_index,
+            self._location_code(location_id, lat, lon),
+            max(0, min(255, int(fill_pct))),
+            self._intern(container, self._containers, self._container_index),
+            self._intern(event, self._events, self._event_index),
+        )
+        self._buffered += 1
+        self.record_count += 1
+        if self._buffered >= self.buffer_records:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records to the file."""
+
+        if self._fp is None:
+            return
+        if self._buffer:
+            self._fp.write(self._buffer)
+            self._buffer = bytearray()
+            self._buffered = 0
+        self._fp.flush()
+
+    def close(self) -> None:
+        """Write the footer string table and final header, then close the file."""
+
+        if self._fp is None:
+            return
+        self.flush()
+
+        footer = json.dumps(
+            {"locations": self._locations, "containers": self._containers, "events": self._events},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        footer_offset = HEADER.size + self.record_count * RECORD.size
+        self._fp.write(footer)
+        self._fp.seek(0)
+        self._fp.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, 0, self.record_count, footer_offset))
+        self._fp.close()
+        self._fp = None
+
+
+def read_header(fp: BinaryIO) -> tuple[int, int, int]:
+    """Validate the header and return (version, record_count, footer_offset)."""
+
+    raw = fp.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("Not a binary event log (file too short)")
+    magic, version, record_size, _reserved, record_count, footer_offset = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError("Not a binary event log (bad magic)")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary event log version {version} (expected {FORMAT_VERSION})")
+    if record_size != RECORD.size:
+        raise ValueError(f"Unexpected record size {record_size}")
+    if footer_offset == 0:
+        raise ValueError("Binary event log is incomplete (the writer was not closed)")
+    return version, record_count, footer_offset
@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+"""Optional run-time instrumentation for `run_simulation`.
+
+When metrics are enabled (``--metrics`` / ``--metrics-file`` or the
+``simulation.metrics*`` config keys), the simulator records:
+
+- counters: timesteps, arrivals, deposits, arrivals rejected because every
+  container at the location was full, and status events published
+- latency histograms per stage: ``engine_step`` (RNG + state updates),
+  ``publish`` (encoding and handing all events of a timestep to the
+  publishers) and ``end_step`` (buffer flushes), plus per-publisher
+  ``publish_status`` / ``end_step`` / ``close`` timings (file writes, MQTT
+  waits)
+
+A summary can be written to a JSON file periodically and at the end of the
+run, and `MetricsServer` serves the live values in the Prometheus text format
+from a background thread (``--metrics-port``). With metrics disabled none of
+this code runs; the engines' counters are plain integer additions.
+
+This module only uses the standard library.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from typing import Any
+
+
+# Histogram bucket upper bounds in seconds (1-2.5-5 series, 1 µs .. 10 s).
+# Latencies above the last bound land in an overflow bucket.
+LATENCY_BUCKETS_S: tuple[float, ...] = tuple(
+    float(f"{m}e{e}") for e in range(-6, 1) for m in (1, 2.5, 5)
+) + (10.0,)
+
+
+@dataclass(slots=True)
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (count, sum, max and bucket counts)."""
+
+    bounds: tuple[float, ...] = LATENCY_BUCKETS_S
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total_s += seconds
+        if seconds > self.max_s:
+            self.max_s = seconds
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the `q` quantile (max for the overflow bucket)."""
+
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max_s) if i < len(self.bounds) else self.max_s
+        return self.max_s
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_s": self.total_s,
+            "mean_s": self.total_s / self.count if self.count else None,
+            "max_s": self.max_s,
+            "p50_s": self.quantile(0.50),
+            "p90_s": self.quantile(0.90),
+            "p99_s": self.quantile(0.99),
+            # Non-cumulative counts; the last entry ("le": None) is the overflow bucket.
+            "buckets": [
+                {"le": le, "count": n}
+                for le, n in zip((*self.bounds, None), self.counts)
+                if n
+            ],
+        }
+
+
+@dataclass(slots=True)
+class SimulationMetrics:
+    """Counters and stage latencies of one simulation run.
+
+    `run_steps` records timesteps and events; arrivals, deposits,
+    rejections and full containers are read from the engine's
+    `EngineCounters` when a snapshot is taken. If `path` is set, `maybe_write`
+    rewrites that file with the latest snapshot at most every `interval_s`
+    seconds, and `write` does so unconditionally (at the end of a run).
+
+    `step_interval_s` is the intended wall-clock time per timestep (the
+    pacing interval); when it is set, `lag_s` reports how far the run is
+    behind that schedule.
+    """
+
+    path: str | None = None
+    interval_s: float = 10.0
+    step_interval_s: float = 0.0
+    steps: int = 0
+    current_step: int = -1
+    sim_ts: datetime | None = None
+    events_published: int = 0
+    stages: dict[str, LatencyHistogram] = field(default_factory=dict)
+    publishers: dict[str, "PublisherMetrics"] = field(default_factory=dict)
+    engine_counters: Any = None
+    # `pacing.PacingScheduler` of the run, if paced.
+    pacer: Any = None
+    # `checkpoint.Checkpointer` of the run, if checkpointing.
+    checkpointer: Any = None
+    started_at: float = field(default_factory=time.perf_counter)
+    _last_write: float = field(default=float("-inf"), init=False, repr=False)
+
+    def stage(self, name: str) -> LatencyHistogram:
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = LatencyHistogram()
+        return hist
+
+    def add_publisher(self, label: str) -> "PublisherMetrics":
+        """Register a publisher and return its metrics.
+
+        Repeated labels get a numeric suffix so two publishers of the same
+        kind keep separate histograms.
+        """
+
+        name, n = label, 1
+        while name in self.publishers:
+            n += 1
+            name = f"{label}{n}"
+        metrics = self.publishers[name] = PublisherMetrics()
+        return metrics
+
+    def start(self) -> None:
+        """Mark the start of the timestep loop (the reference for rates and lag)."""
+
+        self.started_at = time.perf_counter()
+
+    def record_step(
+        self,
+        *,
+        timestep_index: int,
+        sim_ts: datetime,
+        engine_s: float,
+        publish_s: float,
+        end_step_s: float,
+        events: int,
+    ) -> None:
+        self.steps += 1
+        self.current_step = timestep_index
+        self.sim_ts = sim_ts
+        self.events_published += events
+        self.stage("engine_step").observe(engine_s)
+        self.stage("publish").observe(publish_s)
+        self.stage("end_step").observe(end_step_s)
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def lag_s(self) -> float | None:
+        """Seconds behind the `step_interval_s` schedule (None without one)."""
+
+        if self.step_interval_s <= 0:
+            return None
+        return self.elapsed_s - self.steps * self.step_interval_s
+
+    def snapshot(self) -> dict[str, Any]:
+        counters = self.engine_counters
+        elapsed_s = self.elapsed_s
+        return {
+            "ts": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "elapsed_s": elapsed_s,
+            "counters": {
+                "steps": self.steps,
+                "arrivals": None if counters is None else counters.arrivals,
+                "deposits": None if counters is None else counters.deposits,
+                "rejected_full": None if counters is None else counters.rejected_full,
+                "collected": None if counters is None else counters.collected,
+                "events_published": self.events_published,
+            },
+            "progress": {
+                "current_step": self.current_step,
+                "sim_ts": None if self.sim_ts is None else self.sim_ts.isoformat().replace("+00:00", "Z"),
+                "lag_s": self.lag_s,
+                "events_per_s": self.events_published / elapsed_s if elapsed_s > 0 else None,
+                "full_containers": None if counters is None else counters.full_containers,
+            },
+            "pacing": None if self.pacer is None else self.pacer.summary(),
+            "checkpoints": None
+            if self.checkpointer is None
+            else {"written": self.checkpointer.written, "skipped": self.checkpointer.skipped},
+            # list() copies: a metrics server thread may read while the run adds entries.
+            "stages": {name: hist.to_dict() for name, hist in list(self.stages.items())},
+            "publishers": {name: p.to_dict() for name, p in list(self.publishers.items())},
+        }
+
+    def maybe_write(self) -> None:
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if now - self._last_write >= self.interval_s:
+            self.write()
+
+    def write(self) -> None:
+        """Write the current snapshot to `path` (atomically replacing it)."""
+
+        if self.path is None:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write("\n")
+        os.replace(tmp, self.path)
+        self._last_write = time.monotonic()
+
+
+@dataclass(slots=True)
+class PublisherMetrics:
+    """Per-publisher call latencies (see `rubbish_sim.InstrumentedStatusPublisher`)."""
+
+    publish_status: LatencyHistogram = field(default_factory=LatencyHistogram)
+    end_step: LatencyHistogram = field(default_factory=LatencyHistogram)
+    close: LatencyHistogram = field(default_factory=LatencyHistogram)
+    # Extra publisher-specific numbers, e.g. MQTT acked/dropped counts.
+    extra: dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "events": self.publish_status.count,
+            "publish_status": self.publish_status.to_dict(),
+            "end_step": self.end_step.to_dict(),
+            "close": self.close.to_dict(),
+            **self.extra,
+        }
+
+
+def _fmt_s(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def format_summary(snapshot: dict[str, Any]) -> str:
+    """Render a snapshot as a short human-readable table."""
+
+    counters = snapshot["counters"]
+    progress = snapshot["progress"]
+    summary = " ".join(f"{k}={'-' if v is None else v}" for k, v in counters.items())
+    if progress["full_containers"] is not None:
+        summary += f" full_containers={progress['full_containers']}"
+    if progress["lag_s"] is not None:
+        summary += f" lag={progress['lag_s']:+.2f}s"
+    checkpoints = snapshot["checkpoints"]
+    if checkpoints is not None:
+        summary += f" checkpoints={checkpoints['written']} skipped={checkpoints['skipped']}"
+    lines = [f"metrics after {snapshot['elapsed_s']:.2f}s: {summary}"]
+
+    def row(name: str, hist: dict[str, Any]) -> str:
+        return (
+            f"  {name:<32} n={hist['count']:<9} total={_fmt_s(hist['sum_s']):>9} "
+            f"mean={_fmt_s(hist['mean_s']):>9} p99={_fmt_s(hist['p99_s']):>9} max={_fmt_s(hist['max_s']):>9}"
+        )
+
+    for name, hist in snapshot["stages"].items():
+        lines.append(row(name, hist))
+    for label, pub in snapshot["publishers"].items():
+        for call in ("publish_status", "end_step", "close"):
+            if pub[call]["count"]:
+                lines.append(row(f"{label}.{call}", pub[call]))
+    return "\n".join(lines)
+
+
+def _prom_histogram(lines: list[str], name: str, labels: str, hist: LatencyHistogram) -> None:
+    sep = "," if labels else ""
+    cumulative = 0
+    for le, n in zip(hist.bounds, hist.counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{{labels}{sep}le="{le:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {hist.count}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.total_s!r}")
+    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+
+def render_prometheus(metrics: SimulationMetrics) -> str:
+    """Render the live metrics in the Prometheus text exposition format."""
+
+    snapshot = metrics.snapshot()
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, Any]]) -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{{{labels}}} {value!r}" if labels else f"{name} {value!r}")
+
+    counters = snapshot["counters"]
+    progress = snapshot["progress"]
+    metric("simcity_steps_total", "counter", "Timesteps completed.", [("", counters["steps"])])
+    metric("simcity_arrivals_total", "counter", "People who arrived with a bag.", [("", counters["arrivals"])])
+    metric("simcity_deposits_total", "counter", "Bags deposited.", [("", counters["deposits"])])
+    metric(
+        "simcity_rejected_full_total",
+        "counter",
+        "Arrivals that found every container full.",
+        [("", counters["rejected_full"])],
+    )
+    metric(
+        "simcity_collected_total",
+        "counter",
+        "Containers emptied by collection trucks.",
+        [("", counters["collected"])],
+    )
+    metric(
+        "simcity_events_published_total",
+        "counter",
+        "Status events handed to the publishers.",
+        [("", counters["events_published"])],
+    )
+    metric("simcity_current_step", "gauge", "Index of the last completed timestep.", [("", progress["current_step"])])
+    metric(
+        "simcity_sim_time_seconds",
+        "gauge",
+        "Simulated time of the last completed timestep (Unix seconds).",
+        [("", None if metrics.sim_ts is None else metrics.sim_ts.timestamp())],
+    )
+    metric("simcity_elapsed_seconds", "gauge", "Wall-clock time since the run started.", [("", snapshot["elapsed_s"])])
+    metric(
+        "simcity_schedule_lag_seconds",
+        "gauge",
+        "Wall-clock seconds behind the pacing schedule (positive = falling behind).",
+        [("", progress["lag_s"])],
+    )
+    pacing = snapshot["pacing"] or {}
+    metric(
+        "simcity_pacing_target_steps_per_second",
+        "gauge",
+        "Timesteps per second the pacing schedule aims for.",
+        [("", pacing.get("target_steps_per_s"))],
+    )
+    metric(
+        "simcity_pacing_achieved_steps_per_second",
+        "gauge",
+        "Timesteps per second achieved since the start.",
+        [("", pacing.get("achieved_steps_per_s"))],
+    )
+    metric(
+        "simcity_pacing_overruns_total",
+        "counter",
+        "Timesteps that finished after their wall-clock deadline.",
+        [("", pacing.get("overruns"))],
+    )
+    checkpoints = snapshot["checkpoints"] or {}
+    metric(
+        "simcity_checkpoints_written_total",
+        "counter",
+        "Checkpoints written to disk.",
+        [("", checkpoints.get("written"))],
+    )
+    metric(
+        "simcity_checkpoints_skipped_total",
+        "counter",
+        "Checkpoints that were due but could not capture the engine state.",
+        [("", checkpoints.get("skipped"))],
+    )
+    metric(
+        "simcity_events_per_second",
+        "gauge",
+        "Average events published per wall-clock second since the start.",
+        [("", progress["events_per_s"])],
+    )
+    metric("simcity_full_containers", "gauge", "Containers at 100% fill.", [("", progress["full_containers"])])
+
+    publishers = list(metrics.publishers.items())
+    for key, help_text in (
+        ("in_flight", "MQTT messages awaiting broker acknowledgement."),
+        ("published", "MQTT messages handed to the client."),
+        ("acked", "MQTT messages acknowledged by the broker."),
+        ("dropped", "MQTT messages refused or failed."),
+    ):
+        kind = "gauge" if key == "in_flight" else "counter"
+        name = f"simcity_mqtt_{key}" if key == "in_flight" else f"simcity_mqtt_{key}_total"
+        metric(name, kind, help_text, [(f'publisher="{label}"', p.extra.get(key)) for label, p in publishers])
+
+    stages = list(metrics.stages.items())
+    if stages:
+        name = "simcity_stage_duration_seconds"
+        lines.append(f"# HELP {name} Time per timestep spent in each stage of the simulation loop.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, hist in stages:
+            _prom_histogram(lines, name, f'stage="{stage}"', hist)
+    if publishers:
+        name = "simcity_publisher_call_duration_seconds"
+        lines.append(f"# HELP {name} Duration of publisher calls.")
+        lines.append(f"# TYPE {name} histogram")
+        for label, p in publishers:
+            for call in ("publish_status", "end_step", "close"):
+                _prom_histogram(lines, name, f'publisher="{label}",call="{call}"', getattr(p, call))
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serve `render_prometheus(metrics)` at ``/metrics`` from a daemon thread.
+
+    Binds to localhost by default. `port=0` picks a free port (see `port`).
+    """
+
+    def __init__(self, metrics: SimulationMetrics, *, host: str = "127.0.0.1", port: int = 9108) -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server API)
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = render_prometheus(metrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="simcity-metrics", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        return int(self._server.server_address[1])
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
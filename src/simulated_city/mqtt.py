@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
+from functools import partial
 import socket
 import ssl
 import time
 import threading
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from .config import MqttConfig
 
@@ -22,32 +24,33 @@ class MqttClientHandle:
         result = self.client.publish(topic, payload=payload, qos=qos, retain=retain)
         result.wait_for_publish()
 
+    def publish_json_nowait(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> "mqtt.MQTTMessageInfo":
+        """Queue a message without waiting for the broker acknowledgement.
 
-def connect_mqtt(cfg: MqttConfig, *, client_id_suffix: str | None = None, timeout_s: float = 10.0) -> MqttClientHandle:
+        Returns paho's `MQTTMessageInfo`; call `wait_for_publish()` or
+        `is_published()` on it later. Requires a running network loop.
+        """
+
+        return self.client.publish(topic, payload=payload, qos=qos, retain=retain)
+
+
+def connect_mqtt(
+    cfg: MqttConfig,
+    *,
+    client_id_suffix: str | None = None,
+    timeout_s: float = 10.0,
+    max_inflight_messages: int | None = None,
+) -> MqttClientHandle:
     """Create and connect an MQTT client using configuration.
 
     Notes:
     - This function does not run a loop for you; call `client.loop_start()` or `client.loop_forever()`.
     - Credentials are optional; for HiveMQ Cloud you'll typically set env vars.
+    - `max_inflight_messages` raises paho's limit of 20 unacknowledged QoS>0
+      messages; paho only allows changing it before connecting.
     """
 
-    try:
-        import paho.mqtt.client as mqtt
-    except ModuleNotFoundError as e:
-        raise ModuleNotFoundError(
-            "paho-mqtt is required to use simulated_city.mqtt. "
-            "Install dependencies (e.g. `pip install -e .`) and try again."
-        ) from e
-
-    client_id = _make_client_id(cfg.client_id_prefix, client_id_suffix)
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
-
-    if cfg.username is not None:
-        client.username_pw_set(cfg.username, password=cfg.password)
-
-    if cfg.tls:
-        context = ssl.create_default_context()
-        client.tls_set_context(context)
+    client = _new_client(cfg, client_id_suffix, max_inflight_messages)
 
     # Connect (TCP) with a simple timeout.
     started = time.time()
@@ -69,13 +72,7 @@ def connect_mqtt(cfg: MqttConfig, *, client_id_suffix: str | None = None, timeou
     connect_err: list[str] = []
 
     def on_connect(_client, _userdata, _connect_flags, reason_code, _properties):
-        try:
-            code = getattr(reason_code, "value", reason_code)
-            code_int = int(code)
-        except Exception:
-            code_int = -1
-
-        if code_int != 0:
+        if _reason_code_int(reason_code) != 0:
             connect_err.append(f"CONNACK reason_code={reason_code}")
         connected.set()
 
@@ -85,18 +82,181 @@ def connect_mqtt(cfg: MqttConfig, *, client_id_suffix: str | None = None, timeou
         if not connected.wait(timeout_s):
             raise TimeoutError(f"Timed out waiting for MQTT CONNACK from {cfg.host}:{cfg.port}")
         if connect_err:
-            msg = (
-                "MQTT connection was rejected by the broker (likely auth/ACL). "
-                f"Details: {connect_err[0]}. "
-                "If you're using HiveMQ Cloud, ensure HIVEMQ_USERNAME and HIVEMQ_PASSWORD are set (e.g. in .env)."
-            )
-            raise ConnectionError(msg)
+            raise ConnectionError(_rejected_message(connect_err[0]))
     finally:
         client.loop_stop()
 
     return MqttClientHandle(client=client)
 
 
+class AsyncMqttClient:
+    """A paho client driven by an asyncio event loop instead of a network thread.
+
+    The client's socket is watched with the loop's `add_reader` /
+    `add_writer`, so any number of clients share the loop's thread. `publish`
+    returns a future that resolves when the broker acknowledges the message
+    (for QoS 0: when it has been written), so callers can keep many messages
+    in flight and await their acknowledgements concurrently.
+
+    Create instances with `connect_mqtt_async`.
+    """
+
+    def __init__(self, client: "mqtt.Client", loop: asyncio.AbstractEventLoop) -> None:
+        self.client = client
+        self._loop = loop
+        self._acks: dict[int, asyncio.Future[None]] = {}
+        self._connected: asyncio.Future[int] = loop.create_future()
+        self._disconnected: asyncio.Future[None] = loop.create_future()
+        self._misc_task: asyncio.Task[None] | None = None
+
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        client.on_connect = self._on_connect
+        client.on_publish = self._on_publish
+        client.on_disconnect = self._on_disconnect
+
+    @property
+    def pending_acks(self) -> int:
+        """Messages published and not yet acknowledged."""
+
+        return len(self._acks)
+
+    def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> asyncio.Future[None]:
+        """Queue a message; the returned future resolves on acknowledgement.
+
+        The future fails with `ConnectionError` if the client refuses the
+        message or the connection drops before it is acknowledged.
+        """
+
+        fut: asyncio.Future[None] = self._loop.create_future()
+        info = self.client.publish(topic, payload=payload, qos=qos, retain=retain)
+        if info.rc != 0:
+            fut.set_exception(ConnectionError(f"MQTT publish failed (rc={info.rc})"))
+        else:
+            self._acks[info.mid] = fut
+        return fut
+
+    async def disconnect(self, timeout_s: float = 5.0) -> None:
+        """Send DISCONNECT and wait (up to `timeout_s`) for the socket to close."""
+
+        if self._disconnected.done():
+            return
+        self.client.disconnect()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._disconnected), timeout_s)
+        except asyncio.TimeoutError:
+            pass
+
+    # paho callbacks. Socket callbacks can fire on the thread that runs
+    # `connect`, so the loop is only touched via `_call_in_loop`.
+
+    def _call_in_loop(self, fn: Callable[..., object], *args: object) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _on_socket_open(self, _client, _userdata, sock) -> None:
+        self._call_in_loop(self._watch, sock)
+
+    def _on_socket_close(self, _client, _userdata, sock) -> None:
+        self._call_in_loop(self._unwatch, sock)
+
+    def _on_socket_register_write(self, _client, _userdata, sock) -> None:
+        self._call_in_loop(self._loop.add_writer, sock, self.client.loop_write)
+
+    def _on_socket_unregister_write(self, _client, _userdata, sock) -> None:
+        self._call_in_loop(self._loop.remove_writer, sock)
+
+    def _watch(self, sock) -> None:
+        self._loop.add_reader(sock, self.client.loop_read)
+        if self._misc_task is None:
+            self._misc_task = self._loop.create_task(self._misc_loop())
+
+    def _unwatch(self, sock) -> None:
+        self._loop.remove_reader(sock)
+        self._loop.remove_writer(sock)
+        if self._misc_task is not None:
+            self._misc_task.cancel()
+            self._misc_task = None
+
+    async def _misc_loop(self) -> None:
+        # Keepalive pings and retries; paho's threaded loop does this too.
+        while self.client.loop_misc() == 0:
+            await asyncio.sleep(1.0)
+
+    def _on_connect(self, _client, _userdata, _connect_flags, reason_code, _properties) -> None:
+        if not self._connected.done():
+            self._connected.set_result(_reason_code_int(reason_code))
+
+    def _on_publish(self, _client, _userdata, mid, reason_code, _properties) -> None:
+        fut = self._acks.pop(mid, None)
+        if fut is None or fut.done():
+            return
+        if getattr(reason_code, "is_failure", False):
+            fut.set_exception(ConnectionError(f"MQTT publish rejected: {reason_code}"))
+        else:
+            fut.set_result(None)
+
+    def _on_disconnect(self, _client, _userdata, _disconnect_flags, reason_code, _properties) -> None:
+        error = ConnectionError(f"MQTT connection closed: {reason_code}")
+        for fut in self._acks.values():
+            if not fut.done():
+                fut.set_exception(error)
+        self._acks.clear()
+        if not self._connected.done():
+            self._connected.set_exception(error)
+        if not self._disconnected.done():
+            self._disconnected.set_result(None)
+
+
+async def connect_mqtt_async(
+    cfg: MqttConfig,
+    *,
+    client_id_suffix: str | None = None,
+    timeout_s: float = 10.0,
+    max_inflight_messages: int | None = None,
+) -> AsyncMqttClient:
+    """Async counterpart of `connect_mqtt`: connect and wait for CONNACK.
+
+    The blocking TCP/TLS connect runs in the loop's default executor; all
+    later network I/O runs on the event loop itself (see `AsyncMqttClient`).
+    """
+
+    loop = asyncio.get_running_loop()
+    handle = AsyncMqttClient(_new_client(cfg, client_id_suffix, max_inflight_messages), loop)
+
+    started = loop.time()
+    while True:
+        try:
+            await loop.run_in_executor(
+                None, partial(handle.client.connect, cfg.host, cfg.port, keepalive=cfg.keepalive_s)
+            )
+            break
+        except (OSError, socket.gaierror, ssl.SSLError) as e:
+            if loop.time() - started >= timeout_s:
+                raise TimeoutError(
+                    f"Failed to connect to MQTT broker {cfg.host}:{cfg.port} within {timeout_s}s"
+                ) from e
+            await asyncio.sleep(0.25)
+
+    try:
+        code = await asyncio.wait_for(handle._connected, max(0.0, timeout_s - (loop.time() - started)))
+    except asyncio.TimeoutError:
+        await handle.disconnect(timeout_s=0.0)
+        raise TimeoutError(f"Timed out waiting for MQTT CONNACK from {cfg.host}:{cfg.port}") from None
+    if code != 0:
+        await handle.disconnect(timeout_s=0.0)
+        raise ConnectionError(_rejected_message(f"CONNACK reason_code={code}"))
+    return handle
+
+
 @dataclass(frozen=True, slots=True)
 class PublishCheckResult:
     topic: str
@@ -198,6 +358,58 @@ def topic(cfg: MqttConfig, suffix: str) -> str:
     return f"{cfg.base_topic}/{suffix}" if suffix else cfg.base_topic
 
 
+def _new_client(cfg: MqttConfig, client_id_suffix: str | None, max_inflight_messages: int | None) -> "mqtt.Client":
+    try:
+        import paho.mqtt.client as mqtt
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "paho-mqtt is required to use simulated_city.mqtt. "
+            "Install dependencies (e.g. `pip install -e .`) and try again."
+        ) from e
+
+    client_id = _make_client_id(cfg.client_id_prefix, client_id_suffix)
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+
+    if cfg.username is not None:
+        client.username_pw_set(cfg.username, password=cfg.password)
+
+    if cfg.tls:
+        context = ssl.create_default_context()
+        client.tls_set_context(context)
+
+    if max_inflight_messages is not None:
+        client.max_inflight_messages_set(max_inflight_messages)
+    return client
+
+
+def raise_inflight_limit(client: "mqtt.Client", inflight: int) -> None:
+    """Let `client` keep `inflight` QoS>0 messages unacknowledged, if still possible.
+
+    paho refuses to change the limit on an open connection; such clients keep
+    the limit given to `connect_mqtt(max_inflight_messages=...)`.
+    """
+
+    try:
+        client.max_inflight_messages_set(inflight)
+    except RuntimeError:
+        pass
+
+
+def _reason_code_int(reason_code: object) -> int:
+    try:
+        return int(getattr(reason_code, "value", reason_code))
+    except Exception:
+        return -1
+
+
+def _rejected_message(details: str) -> str:
+    return (
+        "MQTT connection was rejected by the broker (likely auth/ACL). "
+        f"Details: {details}. "
+        "If you're using HiveMQ Cloud, ensure HIVEMQ_USERNAME and HIVEMQ_PASSWORD are set (e.g. in .env)."
+    )
+
+
 def _make_client_id(prefix: str, suffix: str | None) -> str:
     safe_prefix = prefix.strip() or "simcity"
     if suffix:
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+"""Wall-clock pacing for real-time simulation runs.
+
+Sleeping a fixed `step_delay_s` after every timestep makes each step take
+``work + delay``, so a run drifts further behind its intended pace as the work
+per step grows. `PacingScheduler` instead waits for absolute deadlines
+(``start + (n + 1) * interval_s`` after step ``n``), so the time spent working
+is absorbed by a shorter sleep.
+
+When a step overruns its deadline the scheduler either rebases the schedule
+(the default: the run continues at the target pace from now on, accepting
+the delay) or, with `catch_up`, keeps the original schedule and runs the
+following steps back to back until it is on time again. `max_catch_up_steps`
+bounds such a burst; a larger backlog (for example after the machine was
+suspended) is dropped by rebasing.
+"""
+
+from dataclasses import dataclass, field
+import time
+from typing import Any, Callable
+
+from .config import SimulationConfig
+
+
+@dataclass(slots=True)
+class PacingScheduler:
+    """Wait for absolute per-step deadlines `interval_s` apart."""
+
+    interval_s: float
+    catch_up: bool = False
+    max_catch_up_steps: int = 100
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False)
+    sleep: Callable[[float], None] = field(default=time.sleep, repr=False)
+    steps: int = 0
+    overruns: int = 0
+    max_overrun_s: float = 0.0
+    slept_s: float = 0.0
+    started_at: float | None = None
+    _origin: float = field(default=0.0, repr=False)
+    _origin_step: int = field(default=0, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.interval_s <= 0:
+            raise ValueError("interval_s must be > 0")
+        if self.max_catch_up_steps < 0:
+            raise ValueError("max_catch_up_steps must be >= 0")
+
+    @classmethod
+    def for_timestep(
+        cls,
+        *,
+        timestep_minutes: int,
+        speed: float,
+        catch_up: bool = False,
+    ) -> "PacingScheduler":
+        """Pace simulated time at `speed` times real time (1.0 = real time)."""
+
+        if speed <= 0:
+            raise ValueError("speed must be > 0")
+        return cls(interval_s=timestep_minutes * 60.0 / speed, catch_up=catch_up)
+
+    def start(self) -> None:
+        """Start the schedule; the first step is due `interval_s` from now."""
+
+        self.started_at = self._origin = self.clock()
+        self._origin_step = 0
+        self.steps = 0
+
+    def wait(self) -> None:
+        """Call after each step: sleep until the step's deadline, or record an overrun."""
+
+        delay = self.next_delay()
+        if delay > 0:
+            self.sleep(delay)
+
+    def next_delay(self) -> float:
+        """Like `wait`, but return the seconds to sleep instead of sleeping.
+
+        Lets an event loop await the deadline (``await asyncio.sleep(delay)``)
+        with the same bookkeeping as `wait`.
+        """
+
+        if self.started_at is None:
+            self.start()
+        self.steps += 1
+        deadline = self._origin + (self.steps - self._origin_step) * self.interval_s
+        now = self.clock()
+        if now < deadline:
+            self.slept_s += deadline - now
+            return deadline - now
+
+        late_s = now - deadline
+        if late_s > 0:
+            self.overruns += 1
+            self.max_overrun_s = max(self.max_overrun_s, late_s)
+        if not self.catch_up or late_s > self.max_catch_up_steps * self.interval_s:
+            # Continue at the target pace from now on instead of bursting.
+            self._origin = now
+            self._origin_step = self.steps
+        return 0.0
+
+    @property
+    def target_steps_per_s(self) -> float:
+        return 1.0 / self.interval_s
+
+    @property
+    def achieved_steps_per_s(self) -> float | None:
+        if self.started_at is None or self.steps == 0:
+            return None
+        elapsed = self.clock() - self.started_at
+        return self.steps / elapsed if elapsed > 0 else None
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "interval_s": self.interval_s,
+            "catch_up": self.catch_up,
+            "steps": self.steps,
+            "target_steps_per_s": self.target_steps_per_s,
+            "achieved_steps_per_s": self.achieved_steps_per_s,
+            "overruns": self.overruns,
+            "max_overrun_s": self.max_overrun_s,
+            "slept_s": self.slept_s,
+        }
+
+    def format_summary(self) -> str:
+        achieved = self.achieved_steps_per_s
+        return (
+            f"pacing: target {self.target_steps_per_s:.3f} steps/s, "
+            f"achieved {'-' if achieved is None else f'{achieved:.3f}'} steps/s, "
+            f"overruns={self.overruns} (max {self.max_overrun_s:.3f}s late)"
+        )
+
+
+def pacer_for_config(
+    sim_cfg: SimulationConfig,
+    *,
+    speed: float | None = None,
+    catch_up: bool | None = None,
+) -> PacingScheduler | None:
+    """Build the scheduler a run should use, or None to run as fast as possible.
+
+    `speed` (or `simulation.pacing_speed`) paces simulated time relative to
+    real time; otherwise a positive `step_delay_s` is used as the wall-clock
+    time per step. Arguments override the config.
+    """
+
+    speed = speed if speed is not None else sim_cfg.pacing_speed
+    catch_up = catch_up if catch_up is not None else sim_cfg.pacing_catch_up
+    if speed is not None:
+        return PacingScheduler.for_timestep(
+            timestep_minutes=sim_cfg.timestep_minutes,
+            speed=speed,
+            catch_up=catch_up,
+        )
+    if sim_cfg.step_delay_s > 0:
+        return PacingScheduler(interval_s=sim_cfg.step_delay_s, catch_up=catch_up)
+    return None
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+"""Independent random streams per location.
+
+Every location gets its own random stream derived from the run seed and the
+location id. Adding, removing or reordering locations in `config.yaml`
+therefore does not change any other location's trajectory, and a single
+location can be re-simulated on its own (or on another CPU core).
+
+The streams are *counter based* (SplitMix64): draw number ``n`` of a stream is
+a pure function of ``(key, n)``. That keeps the state tiny (two integers),
+makes it trivial to save and restore, and lets the NumPy engine compute the
+same numbers for many locations at once (see `uniform_many`).
+"""
+
+import hashlib
+import random
+from typing import Sequence, TypeVar
+
+
+T = TypeVar("T")
+
+_MASK64 = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+_TO_UNIT = 2.0**-53
+
+
+def derive_seed(seed: int, *parts: object) -> int:
+    """Derive a 64-bit seed from a run seed and extra identifiers.
+
+    A cryptographic hash keeps derived streams independent even for
+    neighbouring inputs ("bin-1" vs "bin-2").
+    """
+
+    text = ":".join(str(p) for p in (seed, *parts))
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def resolve_seed(seed: int | None) -> int:
+    """Return `seed`, or a fresh random seed if it is None."""
+
+    if seed is not None:
+        return int(seed)
+    return random.SystemRandom().randrange(2**63)
+
+
+def location_stream_key(seed: int, location_id: str) -> int:
+    """Return the stream key for one location."""
+
+    return derive_seed(seed, "location", location_id)
+
+
+def _splitmix64(key: int, counter: int) -> int:
+    z = (key + (counter + 1) * _GAMMA) & _MASK64
+    z = ((z ^ (z >> 30)) * _MIX1) & _MASK64
+    z = ((z ^ (z >> 27)) * _MIX2) & _MASK64
+    return z ^ (z >> 31)
+
+
+class LocationRandom:
+    """Small counter-based RNG with the subset of `random.Random` we use.
+
+    `key` identifies the stream and `counter` is the number of draws so far.
+    Both are plain integers, so the state is cheap to copy, pickle and store.
+    """
+
+    __slots__ = ("key", "counter")
+
+    def __init__(self, key: int, counter: int = 0) -> None:
+        self.key = int(key) & _MASK64
+        self.counter = int(counter)
+
+    @classmethod
+    def for_location(cls, seed: int, location_id: str) -> "LocationRandom":
+        return cls(location_stream_key(seed, location_id))
+
+    def random(self) -> float:
+        """Return the next float in [0, 1)."""
+
+        z = _splitmix64(self.key, self.counter)
+        self.counter += 1
+        return (z >> 11) * _TO_UNIT
+
+    def choice(self, seq: Sequence[T]) -> T:
+        """Return a uniformly chosen element of a non-empty sequence."""
+
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[int(self.random() * len(seq))]
+
+    def __getstate__(self) -> tuple[int, int]:
+        return self.key, self.counter
+
+    def __setstate__(self, state: tuple[int, int]) -> None:
+        self.key, self.counter = state
+
+    def __repr__(self) -> str:
+        return f"LocationRandom(key={self.key:#018x}, counter={self.counter})"
+
+
+def uniform_many(keys, counters):
+    """Vectorized `LocationRandom.random` without advancing any counter.
+
+    `keys` and `counters` are NumPy uint64 arrays of the same shape. Returns a
+    float64 array with exactly the values `LocationRandom(key, counter).random()`
+    would produce.
+    """
+
+    import numpy as np  # type: ignore[import-not-found]
+
+    # uint64 array arithmetic wraps modulo 2**64, matching `& _MASK64` above.
+    z = keys + (counters + np.uint64(1)) * np.uint64(_GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MIX2)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) * _TO_UNIT
@@ -11,23 +11,44 @@ behavior described in README.md:
 - Stochastic arrivals and deposits
 - MQTT status messages when a container crosses a fill boundary (e.g. every 10%)
 
-The implementation prioritizes clarity and testability over performance.
+`step_location` and `PythonSimulationEngine` are the readable reference
+model. The other engines (`EventSkippingSimulationEngine` here, plus the
+numpy and sharded engines in their own modules) must produce the same
+behavior faster, and the publishers buffer and pre-encode events so that
+large runs are not limited by I/O. `run_simulation` ties an engine, the
+publishers, metrics, pacing, checkpoints and collection trucks together.
 """
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, replace
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import heapq
 import io
 import json
+import math
 import random
+import sys
 import time
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Literal
 
+from .arrival_profiles import ArrivalTable, base_arrival_rate
 from .config import AppConfig, MqttConfig, SimulationConfig, SimulationLocationConfig
-from .mqtt import MqttClientHandle, connect_mqtt, topic
+from .event_log import BinaryEventLogWriter, datetime_to_ns
+from .metrics import MetricsServer, PublisherMetrics, SimulationMetrics, format_summary
+from .mqtt import MqttClientHandle, connect_mqtt, raise_inflight_limit, topic
+from .pacing import PacingScheduler, pacer_for_config
+from .rng_streams import LocationRandom, resolve_seed
+
+if TYPE_CHECKING:
+    from .checkpoint import Checkpointer
+    from .collection import CollectionScheduler
 
 
 ContainerName = Literal["left", "center", "right"]
 
+# Anything with `random()` and `choice()`; engines use per-location streams.
+RandomSource = random.Random | LocationRandom
+
 
 @dataclass(frozen=True, slots=True)
 class ContainerState:
@@ -60,10 +81,30 @@ class DepositResult:
     container: ContainerName | None
     old_fill_pct: int | None
     new_fill_pct: int | None
+    # False if nobody arrived; True with `deposited=False` means every
+    # container was full.
+    arrived: bool = True
+
+
+_NO_ARRIVAL = DepositResult(deposited=False, container=None, old_fill_pct=None, new_fill_pct=None, arrived=False)
+
+
+@dataclass(frozen=True, slots=True)
+class LocationDeposit:
+    """A successful deposit reported by a simulation engine for one timestep."""
+
+    location_index: int
+    container: ContainerName
+    old_fill_pct: int
+    new_fill_pct: int
 
 
 class StatusPublisher:
-    """A small interface for publishing status messages."""
+    """A small interface for publishing status messages.
+
+    Only `publish_status` is required. The other hooks let buffering
+    publishers batch work; their defaults do nothing.
+    """
 
     def publish_status(
         self,
@@ -77,6 +118,24 @@ class StatusPublisher:
     ) -> None:
         raise NotImplementedError
 
+    def end_step(self, timestep_index: int) -> None:
+        """Called by `run_simulation` after all events of a timestep."""
+
+        return
+
+    def close(self) -> None:
+        """Deliver anything still buffered. Called once at the end of a run."""
+
+        return
+
+    def checkpoint_offset(self) -> int | None:
+        """Flush and return the output position, for resuming into the same output.
+
+        Publishers whose output cannot be rewound return None.
+        """
+
+        return None
+
 
 @dataclass(frozen=True, slots=True)
 class NoopStatusPublisher(StatusPublisher):
@@ -102,6 +161,10 @@ class StdoutStatusPublisher(StatusPublisher):
     """
 
     mqtt_cfg: MqttConfig
+    _encoder: StatusEncoder = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_encoder", StatusEncoder.for_mqtt(self.mqtt_cfg))
 
     def publish_status(
         self,
@@ -113,7 +176,7 @@ class StdoutStatusPublisher(StatusPublisher):
         timestep_index: int,
         event: str = "status",
     ) -> None:
-        payload = make_status_payload(
+        full_topic, payload = self._encoder.encode(
             ts=ts,
             location=location,
             container=container,
@@ -121,8 +184,6 @@ class StdoutStatusPublisher(StatusPublisher):
             timestep_index=timestep_index,
             event=event,
         )
-        suffix = f"bins/{location.location_id}/{container}/status"
-        full_topic = topic(self.mqtt_cfg, suffix)
         print(f"[DRY-RUN] topic={full_topic} payload={payload}")
 
 
@@ -136,6 +197,10 @@ class JsonlFileStatusPublisher(StatusPublisher):
 
     mqtt_cfg: MqttConfig
     fp: io.TextIOBase
+    _encoder: StatusEncoder = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_encoder", StatusEncoder.for_mqtt(self.mqtt_cfg))
 
     def publish_status(
         self,
@@ -147,7 +212,7 @@ class JsonlFileStatusPublisher(StatusPublisher):
         timestep_index: int,
         event: str = "status",
     ) -> None:
-        payload_str = make_status_payload(
+        full_topic, payload_str = self._encoder.encode(
             ts=ts,
             location=location,
             container=container,
@@ -155,8 +220,6 @@ class JsonlFileStatusPublisher(StatusPublisher):
             timestep_index=timestep_index,
             event=event,
         )
-        suffix = f"bins/{location.location_id}/{container}/status"
-        full_topic = topic(self.mqtt_cfg, suffix)
 
         line_obj = {
             "topic": full_topic,
@@ -165,6 +228,215 @@ class JsonlFileStatusPublisher(StatusPublisher):
         self.fp.write(json.dumps(line_obj, ensure_ascii=False) + "\n")
         self.fp.flush()
 
+    def checkpoint_offset(self) -> int:
+        return self.fp.tell()
+
+
+@dataclass(slots=True)
+class BufferedJsonlFileStatusPublisher(StatusPublisher):
+    """High-throughput variant of `JsonlFileStatusPublisher`.
+
+    Writes the same `{"topic": ..., "payload": {...}}` lines, but:
+    - serializes each record once (the payload JSON is spliced into the line)
+    - collects lines in memory and writes them in large chunks
+    - flushes when `flush_every_events` lines or `flush_every_bytes` characters
+      are buffered, or when `flush_interval_s` seconds have passed
+    - always flushes on `close()`
+
+    Readers tailing the file (dashboards) only ever see whole lines once a
+    chunk is flushed, so keep `flush_interval_s` small for live playback.
+    """
+
+    mqtt_cfg: MqttConfig
+    fp: io.TextIOBase
+    flush_every_events: int = 1000
+    flush_every_bytes: int = 1 << 20
+    flush_interval_s: float = 1.0
+    _lines: list[str] = field(default_factory=list, repr=False)
+    _buffered_chars: int = field(default=0, repr=False)
+    _last_flush: float = field(default_factory=time.monotonic, repr=False)
+    _encoder: StatusEncoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._encoder = StatusEncoder.for_mqtt(self.mqtt_cfg)
+
+    def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        line = self._encoder.jsonl_line(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+        self._lines.append(line)
+        self._buffered_chars += len(line)
+
+        if len(self._lines) >= self.flush_every_events or self._buffered_chars >= self.flush_every_bytes:
+            self.flush()
+
+    def end_step(self, timestep_index: int) -> None:
+        if self._lines and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered lines and flush the file."""
+
+        if self._lines:
+            self.fp.write("".join(self._lines))
+            self._lines.clear()
+            self._buffered_chars = 0
+        self.fp.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+
+    def checkpoint_offset(self) -> int:
+        self.flush()
+        return self.fp.tell()
+
+
+@dataclass(slots=True)
+class BinaryEventLogStatusPublisher(StatusPublisher):
+    """Publisher that writes status events to a compact binary event log.
+
+    See :mod:`simulated_city.event_log` for the format. Read it back with
+    `dashboard_data.read_binary_event_log`.
+    """
+
+    writer: BinaryEventLogWriter
+    _last_ts: datetime | None = field(default=None, repr=False)
+    _last_ts_ns: int = field(default=0, repr=False)
+
+    def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        # All events of a timestep share one timestamp; convert it once.
+        if ts != self._last_ts:
+            self._last_ts = ts
+            self._last_ts_ns = datetime_to_ns(ts)
+
+        self.writer.write(
+            ts_ns=self._last_ts_ns,
+            location_id=location.location_id,
+            lat=location.lat,
+            lon=location.lon,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+PARQUET_COLUMNS = ("ts", "location_id", "lat", "lon", "container", "fill_pct", "timestep_index", "event")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa  # type: ignore[import-not-found]
+        import pyarrow.parquet as pq  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "pyarrow is required for Parquet event logs. "
+            "Install it with `pip install -e \".[parquet]\"` (or `pip install pyarrow`)."
+        ) from e
+    return pa, pq
+
+
+@dataclass(slots=True)
+class ParquetStatusPublisher(StatusPublisher):
+    """Publisher that writes status events to a Parquet file (via Arrow).
+
+    Events are collected in column lists and written as one Parquet row group
+    every `row_group_size` events. Rows are written in timestamp order, so the
+    per-row-group min/max statistics let readers skip whole row groups when
+    filtering on `ts` (see `dashboard_data.read_parquet_events`).
+
+    The file is only readable after `close()` (Parquet writes its footer last).
+    """
+
+    path: str
+    row_group_size: int = 131_072
+    _columns: dict[str, list] = field(default_factory=lambda: {name: [] for name in PARQUET_COLUMNS}, repr=False)
+    _writer: Any = field(default=None, repr=False)
+    _schema: Any = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.row_group_size <= 0:
+            raise ValueError("row_group_size must be > 0")
+        pa, pq = _require_pyarrow()
+        self._schema = pa.schema(
+            [
+                ("ts", pa.timestamp("us", tz="UTC")),
+                ("location_id", pa.string()),
+                ("lat", pa.float64()),
+                ("lon", pa.float64()),
+                ("container", pa.string()),
+                ("fill_pct", pa.int16()),
+                ("timestep_index", pa.int32()),
+                ("event", pa.string()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+
+    def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        columns = self._columns
+        columns["ts"].append(ts)
+        columns["location_id"].append(location.location_id)
+        columns["lat"].append(location.lat)
+        columns["lon"].append(location.lon)
+        columns["container"].append(container)
+        columns["fill_pct"].append(int(fill_pct))
+        columns["timestep_index"].append(int(timestep_index))
+        columns["event"].append(str(event))
+
+        if len(columns["ts"]) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self) -> None:
+        if not self._columns["ts"]:
+            return
+        pa, _ = _require_pyarrow()
+        batch = pa.RecordBatch.from_pydict(self._columns, schema=self._schema)
+        self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        self._columns = {name: [] for name in PARQUET_COLUMNS}
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._write_row_group()
+        self._writer.close()
+        self._writer = None
+
 
 @dataclass(frozen=True, slots=True)
 class TeeStatusPublisher(StatusPublisher):
@@ -192,6 +464,71 @@ class TeeStatusPublisher(StatusPublisher):
                 event=event,
             )
 
+    def end_step(self, timestep_index: int) -> None:
+        for p in self.publishers:
+            p.end_step(timestep_index)
+
+    def close(self) -> None:
+        for p in self.publishers:
+            p.close()
+
+
+# Publisher attributes copied into the metrics (see WindowedMqttStatusPublisher).
+_PUBLISHER_COUNTERS = ("published", "acked", "dropped", "unacked", "in_flight")
+
+
+@dataclass(frozen=True, slots=True)
+class InstrumentedStatusPublisher(StatusPublisher):
+    """Wrap a publisher and time its calls into `metrics`.
+
+    Only used when metrics are enabled, so unmonitored runs call the wrapped
+    publisher directly.
+    """
+
+    inner: StatusPublisher
+    metrics: PublisherMetrics
+
+    def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        t0 = time.perf_counter()
+        self.inner.publish_status(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+        self.metrics.publish_status.observe(time.perf_counter() - t0)
+
+    def end_step(self, timestep_index: int) -> None:
+        t0 = time.perf_counter()
+        self.inner.end_step(timestep_index)
+        self.metrics.end_step.observe(time.perf_counter() - t0)
+        self._copy_counters()
+
+    def close(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            self.inner.close()
+        finally:
+            self.metrics.close.observe(time.perf_counter() - t0)
+            self._copy_counters()
+
+    def _copy_counters(self) -> None:
+        for name in _PUBLISHER_COUNTERS:
+            value = getattr(self.inner, name, None)
+            if isinstance(value, int):
+                self.metrics.extra[name] = value
+
 
 @dataclass(frozen=True, slots=True)
 class MqttStatusPublisher(StatusPublisher):
@@ -199,6 +536,65 @@ class MqttStatusPublisher(StatusPublisher):
 
     handle: MqttClientHandle
     mqtt_cfg: MqttConfig
+    _encoder: StatusEncoder = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_encoder", StatusEncoder.for_mqtt(self.mqtt_cfg))
+
+    def publish_status(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: ContainerName,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> None:
+        full_topic, payload = self._encoder.encode(
+            ts=ts,
+            location=location,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+        self.handle.publish_json(full_topic, payload, qos=1, retain=True)
+
+
+@dataclass(slots=True)
+class WindowedMqttStatusPublisher(StatusPublisher):
+    """Publish retained status messages without a broker round trip per message.
+
+    `MqttStatusPublisher` waits for every QoS 1 acknowledgement, so throughput
+    is bounded by network latency. This publisher queues messages and keeps up
+    to `window` of them in flight. It only blocks when the window is full (and
+    then waits for the whole batch), and at `close()`.
+
+    Counters:
+    - `published`: messages handed to the MQTT client
+    - `acked`: messages confirmed by the broker
+    - `dropped`: messages the client refused or that failed while in flight
+    - `unacked`: messages still unconfirmed when `close()` gave up waiting
+    """
+
+    handle: MqttClientHandle
+    mqtt_cfg: MqttConfig
+    window: int = 1000
+    ack_timeout_s: float = 10.0
+    published: int = 0
+    acked: int = 0
+    dropped: int = 0
+    unacked: int = 0
+    _in_flight: list[Any] = field(default_factory=list, repr=False)
+    _encoder: StatusEncoder = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.window <= 0:
+            raise ValueError("window must be > 0")
+        self._encoder = StatusEncoder.for_mqtt(self.mqtt_cfg)
+        # paho only sends 20 QoS>0 messages concurrently by default.
+        raise_inflight_limit(self.handle.client, self.window)
 
     def publish_status(
         self,
@@ -210,7 +606,7 @@ class MqttStatusPublisher(StatusPublisher):
         timestep_index: int,
         event: str = "status",
     ) -> None:
-        payload = make_status_payload(
+        full_topic, payload = self._encoder.encode(
             ts=ts,
             location=location,
             container=container,
@@ -218,8 +614,52 @@ class MqttStatusPublisher(StatusPublisher):
             timestep_index=timestep_index,
             event=event,
         )
-        suffix = f"bins/{location.location_id}/{container}/status"
-        self.handle.publish_json(topic(self.mqtt_cfg, suffix), payload, qos=1, retain=True)
+        info = self.handle.publish_json_nowait(full_topic, payload, qos=1, retain=True)
+        self.published += 1
+        self._in_flight.append(info)
+
+        if len(self._in_flight) >= self.window:
+            self._wait_for_in_flight(self.ack_timeout_s)
+
+    @property
+    def in_flight(self) -> int:
+        """Messages handed to the client and not yet acknowledged."""
+
+        return len(self._in_flight)
+
+    def end_step(self, timestep_index: int) -> None:
+        # Forget messages that are already acknowledged, without blocking.
+        still_in_flight = []
+        for info in self._in_flight:
+            try:
+                if info.is_published():
+                    self.acked += 1
+                else:
+                    still_in_flight.append(info)
+            except (RuntimeError, ValueError):
+                self.dropped += 1
+        self._in_flight = still_in_flight
+
+    def close(self) -> None:
+        self._wait_for_in_flight(self.ack_timeout_s)
+        self.unacked += len(self._in_flight)
+        self._in_flight = []
+
+    def _wait_for_in_flight(self, timeout_s: float) -> None:
+        """Wait (up to `timeout_s` in total) for every in-flight message."""
+
+        deadline = time.monotonic() + timeout_s
+        still_in_flight = []
+        for info in self._in_flight:
+            try:
+                info.wait_for_publish(timeout=max(0.0, deadline - time.monotonic()))
+                if info.is_published():
+                    self.acked += 1
+                else:
+                    still_in_flight.append(info)
+            except (RuntimeError, ValueError):
+                self.dropped += 1
+        self._in_flight = still_in_flight
 
 
 def make_status_payload(
@@ -246,6 +686,132 @@ def make_status_payload(
     return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
 
 
+def format_status_ts(ts: datetime) -> str:
+    """Format a timestamp the way status payloads do (UTC, ``Z`` suffix)."""
+
+    return ts.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass(frozen=True, slots=True)
+class _ContainerTemplate:
+    topic: str
+    # Payload text between the timestamp and the fill value:
+    # '","location_id":...,"container":"left","fill_pct":'
+    payload_middle: str
+    # JSONL line text before the payload: '{"topic": "...", "payload": '
+    line_prefix: str
+
+
+@dataclass(slots=True)
+class StatusEncoder:
+    """Build status topics and payloads from cached per-container templates.
+
+    `make_status_payload` builds a dict and runs `json.dumps` for every
+    event, and the publishers rebuild the topic each time. The parts that never
+    change for a container (topic, location id, lat/lon, container name) are
+    encoded once here, and the timestamp is formatted once per timestep, so
+    encoding an event is a few string splices.
+
+    Output is identical to `make_status_payload` and `mqtt.topic`. Templates
+    are keyed by (location_id, container); lat/lon must not change for a
+    location id during a run (ids are unique per config).
+    """
+
+    base_topic: str
+    _templates: dict[tuple[str, str], _ContainerTemplate] = field(default_factory=dict, repr=False)
+    _events: dict[str, str] = field(default_factory=dict, repr=False)
+    _last_ts: datetime | None = field(default=None, repr=False)
+    _last_ts_str: str = field(default="", repr=False)
+
+    @classmethod
+    def for_mqtt(cls, mqtt_cfg: MqttConfig) -> "StatusEncoder":
+        return cls(base_topic=topic(mqtt_cfg, ""))
+
+    def _template(self, location: LocationState, container: str) -> _ContainerTemplate:
+        key = (location.location_id, container)
+        template = self._templates.get(key)
+        if template is None:
+            full_topic = f"{self.base_topic}/bins/{location.location_id}/{container}/status"
+            middle = (
+                '","location_id":'
+                + json.dumps(location.location_id, ensure_ascii=False)
+                + ',"lat":'
+                + json.dumps(location.lat)
+                + ',"lon":'
+                + json.dumps(location.lon)
+                + ',"container":'
+                + json.dumps(container, ensure_ascii=False)
+                + ',"fill_pct":'
+            )
+            line_prefix = '{"topic": ' + json.dumps(full_topic, ensure_ascii=False) + ', "payload": '
+            template = self._templates[key] = _ContainerTemplate(full_topic, middle, line_prefix)
+        return template
+
+    def _ts(self, ts: datetime) -> str:
+        # All events of a timestep share one datetime; format it once.
+        if ts is not self._last_ts and ts != self._last_ts:
+            self._last_ts = ts
+            self._last_ts_str = format_status_ts(ts)
+        return self._last_ts_str
+
+    def _event(self, event: str) -> str:
+        tail = self._events.get(event)
+        if tail is None:
+            tail = self._events[event] = ',"event":' + json.dumps(str(event), ensure_ascii=False) + "}"
+        return tail
+
+    def topic(self, location: LocationState, container: str) -> str:
+        return self._template(location, container).topic
+
+    def _payload(
+        self,
+        template: _ContainerTemplate,
+        ts: datetime,
+        fill_pct: int,
+        timestep_index: int,
+        event: str,
+    ) -> str:
+        return (
+            '{"ts":"'
+            + self._ts(ts)
+            + template.payload_middle
+            + str(int(fill_pct))
+            + ',"timestep_index":'
+            + str(int(timestep_index))
+            + self._event(event)
+        )
+
+    def encode(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: str,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> tuple[str, str]:
+        """Return (topic, payload JSON) for one status event."""
+
+        template = self._template(location, container)
+        return template.topic, self._payload(template, ts, fill_pct, timestep_index, event)
+
+    def jsonl_line(
+        self,
+        *,
+        ts: datetime,
+        location: LocationState,
+        container: str,
+        fill_pct: int,
+        timestep_index: int,
+        event: str = "status",
+    ) -> str:
+        """Return the ``{"topic": ..., "payload": {...}}`` JSONL line (with newline)."""
+
+        template = self._template(location, container)
+        return template.line_prefix + self._payload(template, ts, fill_pct, timestep_index, event) + "}\n"
+
+
 def boundaries_crossed(old_fill_pct: int, new_fill_pct: int, *, boundary_pct: int) -> list[int]:
     """Return boundary values crossed when fill increases.
 
@@ -268,7 +834,7 @@ def boundaries_crossed(old_fill_pct: int, new_fill_pct: int, *, boundary_pct: in
     return [i * boundary_pct for i in range(old_bucket + 1, new_bucket + 1)]
 
 
-def _pick_preferred_container(rng: random.Random) -> ContainerName:
+def _pick_preferred_container(rng: RandomSource) -> ContainerName:
     """Pick preferred container using the 50/25/25 rule."""
 
     roll = rng.random()
@@ -281,7 +847,7 @@ def _pick_preferred_container(rng: random.Random) -> ContainerName:
 
 def choose_container(
     *,
-    rng: random.Random,
+    rng: RandomSource,
     left: ContainerState,
     center: ContainerState,
     right: ContainerState,
@@ -314,15 +880,31 @@ def _apply_deposit(container: ContainerState, *, delta_pct: int) -> tuple[Contai
 
 def step_location(
     *,
-    rng: random.Random,
+    rng: RandomSource,
     sim_cfg: SimulationConfig,
     location: LocationState,
+    arrival_prob: float | None = None,
 ) -> tuple[LocationState, DepositResult]:
-    """Advance one timestep for a single location."""
+    """Advance one timestep for a single location.
+
+    `arrival_prob` overrides `sim_cfg.arrival_prob` (see
+    :mod:`simulated_city.arrival_profiles`).
+    """
 
-    arrived = rng.random() < sim_cfg.arrival_prob
+    arrived = rng.random() < (sim_cfg.arrival_prob if arrival_prob is None else arrival_prob)
     if not arrived:
-        return location, DepositResult(deposited=False, container=None, old_fill_pct=None, new_fill_pct=None)
+        return location, _NO_ARRIVAL
+
+    return deposit_bag(rng=rng, sim_cfg=sim_cfg, location=location)
+
+
+def deposit_bag(
+    *,
+    rng: RandomSource,
+    sim_cfg: SimulationConfig,
+    location: LocationState,
+) -> tuple[LocationState, DepositResult]:
+    """Deposit one bag at a location where a person has arrived."""
 
     chosen = choose_container(rng=rng, left=location.left, center=location.center, right=location.right)
     if chosen is None:
@@ -364,6 +946,157 @@ def step_location(
     return updated, DepositResult(deposited=True, container="right", old_fill_pct=old_fill, new_fill_pct=new_fill)
 
 
+# Most bags placed at one location in one timestep with the "poisson" model
+# (far beyond any rate up to `MAX_ARRIVAL_RATE`).
+MAX_BAGS_PER_STEP = 1024
+
+# Preference split of a batch of bags: P(left), then P(center | not left).
+PREFERENCE_SPLIT = (0.25, 0.5 / 0.75)
+
+
+def sample_poisson(u: float, rate: float) -> int:
+    """Inverse-CDF sample of a Poisson count with mean `rate`, for `u` in [0, 1)."""
+
+    k = 0
+    pk = cdf = math.exp(-rate)
+    while u >= cdf and pk > 0.0 and k < MAX_BAGS_PER_STEP:
+        k += 1
+        pk = pk * rate / k
+        cdf += pk
+    return k
+
+
+@lru_cache(maxsize=None)
+def _binomial_table(p: float) -> tuple[tuple[float, ...], float]:
+    """``(1 - p) ** n`` for n = 0..MAX_BAGS_PER_STEP, and ``p / (1 - p)``."""
+
+    q = 1.0 - p
+    powers = [1.0]
+    for _ in range(MAX_BAGS_PER_STEP):
+        powers.append(powers[-1] * q)
+    return tuple(powers), p / q
+
+
+def sample_binomial(u: float, n: int, p: float) -> int:
+    """Inverse-CDF sample of a Binomial(n, p) count, for `u` in [0, 1)."""
+
+    powers, ratio = _binomial_table(p)
+    k = 0
+    pk = cdf = powers[n]
+    while u >= cdf and k < n:
+        pk = pk * (n - k) / (k + 1) * ratio
+        k += 1
+        cdf += pk
+    return k
+
+
+def bag_room(fill_pct: int, delta_pct: int) -> int:
+    """Number of bags a container at `fill_pct` still accepts (the last one fills it to 100)."""
+
+    if fill_pct >= 100:
+        return 0
+    return (100 - fill_pct + delta_pct - 1) // delta_pct
+
+
+def _place_overflow(placed: list[int], rooms: list[int], overflow: int, u_split: float) -> int:
+    """Move bags whose preferred container was full into containers with room.
+
+    Like the per-bag fallback, overflow is shared evenly between the two
+    other containers while both have room. Updates `placed` and returns the
+    number of bags that found every container full.
+    """
+
+    free = [room - n for room, n in zip(rooms, placed)]
+    open_ = [j for j in range(3) if free[j] > 0]
+    if not overflow or not open_:
+        return overflow
+    first = open_[0]
+    to_first = sample_binomial(u_split, overflow, 0.5) if len(open_) == 2 else overflow
+    moved = min(to_first, free[first])
+    if len(open_) == 2:
+        second = open_[1]
+        to_second = min(overflow - moved, free[second])
+        placed[second] += to_second
+        overflow -= to_second
+    moved += min(overflow - moved, free[first] - moved)
+    placed[first] += moved
+    return overflow - moved
+
+
+def deposit_bags(
+    *,
+    rng: RandomSource,
+    sim_cfg: SimulationConfig,
+    location: LocationState,
+    bags: int,
+) -> tuple[LocationState, list[DepositResult], int]:
+    """Deposit `bags` bags that arrived at a location in the same timestep.
+
+    Three draws place the whole batch: how many bags prefer the left
+    container, how many of the rest prefer the center one, and how bags
+    whose preferred container is full are shared between the others.
+    Returns the new state, one result per deposited bag (in container
+    order) and the number of bags rejected because every container was full.
+    """
+
+    delta = int(sim_cfg.bag_fill_delta_pct)
+    u_left, u_center, u_split = rng.random(), rng.random(), rng.random()
+    bags = min(bags, MAX_BAGS_PER_STEP)
+    left = sample_binomial(u_left, bags, PREFERENCE_SPLIT[0])
+    center = sample_binomial(u_center, bags - left, PREFERENCE_SPLIT[1])
+
+    containers = (location.left, location.center, location.right)
+    rooms = [bag_room(c.fill_pct, delta) for c in containers]
+    placed = [min(n, room) for n, room in zip((left, center, bags - left - center), rooms)]
+    rejected = _place_overflow(placed, rooms, bags - sum(placed), u_split)
+
+    results: list[DepositResult] = []
+    new_states: dict[str, ContainerState] = {}
+    for name, container, n in zip(("left", "center", "right"), containers, placed):
+        fill = container.fill_pct
+        for _ in range(n):
+            new_fill = min(100, fill + delta)
+            results.append(DepositResult(deposited=True, container=name, old_fill_pct=fill, new_fill_pct=new_fill))
+            fill = new_fill
+        if n:
+            new_states[name] = ContainerState(fill_pct=fill)
+    return (replace(location, **new_states) if new_states else location), results, rejected
+
+
+def step_location_bags(
+    *,
+    rng: RandomSource,
+    sim_cfg: SimulationConfig,
+    location: LocationState,
+    arrival_rate: float | None = None,
+) -> tuple[LocationState, list[DepositResult], int]:
+    """Advance one timestep for a single location with the "poisson" arrival model.
+
+    Draws the number of arrivals, then places them with `deposit_bags`.
+    `arrival_rate` overrides the configured mean arrivals per timestep.
+    """
+
+    rate = base_arrival_rate(sim_cfg) if arrival_rate is None else arrival_rate
+    bags = sample_poisson(rng.random(), rate)
+    if not bags:
+        return location, [], 0
+    return deposit_bags(rng=rng, sim_cfg=sim_cfg, location=location, bags=bags)
+
+
+def empty_containers(
+    location: LocationState,
+    containers: tuple[ContainerName, ...] | list[ContainerName] = ("left", "center", "right"),
+) -> tuple[LocationState, list[tuple[ContainerName, int]]]:
+    """Empty `containers` of a location; returns the new state and the (container, old fill) emptied."""
+
+    emptied = [(name, getattr(location, name).fill_pct) for name in containers]
+    emptied = [(name, old_fill) for name, old_fill in emptied if old_fill > 0]
+    if not emptied:
+        return location, []
+    updated = replace(location, **{name: ContainerState(fill_pct=0) for name, _ in emptied})
+    return updated, emptied
+
+
 def _initial_location_state(loc: SimulationLocationConfig) -> LocationState:
     return LocationState(
         location_id=loc.location_id,
@@ -375,6 +1108,617 @@ def _initial_location_state(loc: SimulationLocationConfig) -> LocationState:
     )
 
 
+@dataclass(slots=True)
+class EngineCounters:
+    """Running totals kept by every engine (always on; a few integer adds per step)."""
+
+    deposits: int = 0
+    # Arrivals that found all three containers full.
+    rejected_full: int = 0
+    # Containers currently at 100%.
+    full_containers: int = 0
+    # Containers emptied by collection trucks.
+    collected: int = 0
+
+    @property
+    def arrivals(self) -> int:
+        return self.deposits + self.rejected_full
+
+    def record_emptied(self, emptied: list[tuple[ContainerName, int]]) -> None:
+        self.collected += len(emptied)
+        self.full_containers -= sum(1 for _, old_fill in emptied if old_fill >= 100)
+
+
+class SimulationEngine:
+    """Advance all configured locations one timestep at a time.
+
+    `run_simulation` owns publishing; an engine only owns the container state.
+    Every engine returns every deposit from `step`, including those that
+    cross no status boundary; the publish loop decides which produce events.
+    """
+
+    counters: EngineCounters
+
+    def step(self, timestep_index: int) -> list[LocationDeposit]:
+        """Advance one timestep and return deposits ordered by location index."""
+
+        raise NotImplementedError
+
+    def location_state(self, location_index: int) -> LocationState:
+        """Return the current state of one location."""
+
+        raise NotImplementedError
+
+    @property
+    def location_count(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources such as worker processes."""
+
+        return
+
+    def empty_location(
+        self,
+        location_index: int,
+        timestep_index: int,
+        containers: list[ContainerName],
+    ) -> list[tuple[ContainerName, int]]:
+        """Empty `containers` of a location before timestep `timestep_index` is stepped.
+
+        Used by collection trucks (see :mod:`simulated_city.collection`).
+        Returns the (container, old fill) of the containers that were not
+        already empty.
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} does not support collection")
+
+    def get_state(self) -> dict[str, Any] | None:
+        """Return a JSON-compatible snapshot of the state after the last step.
+
+        Used for checkpoints (see :mod:`simulated_city.checkpoint`). Returns
+        None if the state cannot be captured at this step; callers try again
+        at `next_state_step()`.
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} does not support checkpoints")
+
+    def next_state_step(self) -> int | None:
+        """After `get_state` returned None: the step count from which it works again.
+
+        None means unknown; callers then try after every timestep.
+        """
+
+        return None
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore a `get_state` snapshot; the next `step` continues from it."""
+
+        raise NotImplementedError(f"{type(self).__name__} does not support checkpoints")
+
+
+def location_fills(locations: list[LocationState]) -> list[list[int]]:
+    """Fill levels as ``[[left, center, right], ...]`` (the checkpoint layout)."""
+
+    return [[loc.left.fill_pct, loc.center.fill_pct, loc.right.fill_pct] for loc in locations]
+
+
+def locations_from_fills(sim_cfg: SimulationConfig, fills: list[list[int]]) -> list[LocationState]:
+    """Inverse of `location_fills` for the configured locations."""
+
+    if len(fills) != len(sim_cfg.locations):
+        raise ValueError(f"state has {len(fills)} locations, the configuration has {len(sim_cfg.locations)}")
+    return [
+        LocationState(
+            location_id=loc.location_id,
+            lat=loc.lat,
+            lon=loc.lon,
+            left=ContainerState(fill_pct=int(left)),
+            center=ContainerState(fill_pct=int(center)),
+            right=ContainerState(fill_pct=int(right)),
+        )
+        for loc, (left, center, right) in zip(sim_cfg.locations, fills)
+    ]
+
+
+def location_rngs(sim_cfg: SimulationConfig, seed: int) -> list[LocationRandom]:
+    """Create one independent random stream per configured location."""
+
+    return [LocationRandom.for_location(seed, loc.location_id) for loc in sim_cfg.locations]
+
+
+class PythonSimulationEngine(SimulationEngine):
+    """Reference engine: one `step_location` call per location per timestep.
+
+    With the "poisson" arrival model it calls `step_location_bags` instead.
+    """
+
+    def __init__(self, sim_cfg: SimulationConfig, *, seed: int | None, start_ts: datetime | None = None) -> None:
+        self.sim_cfg = sim_cfg
+        self.rngs = location_rngs(sim_cfg, resolve_seed(seed))
+        self.locations = [_initial_location_state(loc) for loc in sim_cfg.locations]
+        self.counters = EngineCounters()
+        self.arrivals = ArrivalTable.for_config(sim_cfg, start_ts)
+
+    @property
+    def location_count(self) -> int:
+        return len(self.locations)
+
+    def location_state(self, location_index: int) -> LocationState:
+        return self.locations[location_index]
+
+    def get_state(self) -> dict[str, Any]:
+        return {
+            "fills": location_fills(self.locations),
+            "rng_counters": [rng.counter for rng in self.rngs],
+            "counters": asdict(self.counters),
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        self.locations = locations_from_fills(self.sim_cfg, state["fills"])
+        for rng, counter in zip(self.rngs, state["rng_counters"], strict=True):
+            rng.counter = int(counter)
+        self.counters = EngineCounters(**state["counters"])
+
+    def empty_location(
+        self,
+        location_index: int,
+        timestep_index: int,
+        containers: list[ContainerName],
+    ) -> list[tuple[ContainerName, int]]:
+        self.locations[location_index], emptied = empty_containers(self.locations[location_index], containers)
+        self.counters.record_emptied(emptied)
+        return emptied
+
+    def step(self, timestep_index: int) -> list[LocationDeposit]:
+        if self.sim_cfg.arrival_model == "poisson":
+            return self._step_bags(timestep_index)
+
+        deposits: list[LocationDeposit] = []
+        rejected = 0
+        filled = 0
+        probs = self.arrivals.step_probs(timestep_index) if self.arrivals is not None else None
+        for i, loc_state in enumerate(self.locations):
+            updated, deposit = step_location(
+                rng=self.rngs[i],
+                sim_cfg=self.sim_cfg,
+                location=loc_state,
+                arrival_prob=None if probs is None else probs[i],
+            )
+            self.locations[i] = updated
+
+            if not deposit.deposited:
+                if deposit.arrived:
+                    rejected += 1
+                continue
+
+            assert deposit.container is not None
+            assert deposit.old_fill_pct is not None
+            assert deposit.new_fill_pct is not None
+            if deposit.new_fill_pct >= 100:
+                filled += 1
+            deposits.append(
+                LocationDeposit(
+                    location_index=i,
+                    container=deposit.container,
+                    old_fill_pct=deposit.old_fill_pct,
+                    new_fill_pct=deposit.new_fill_pct,
+                )
+            )
+        self.counters.deposits += len(deposits)
+        self.counters.rejected_full += rejected
+        self.counters.full_containers += filled
+        return deposits
+
+    def _step_bags(self, timestep_index: int) -> list[LocationDeposit]:
+        deposits: list[LocationDeposit] = []
+        rejected = 0
+        filled = 0
+        rates = self.arrivals.step_probs(timestep_index) if self.arrivals is not None else None
+        for i, loc_state in enumerate(self.locations):
+            updated, results, bags_rejected = step_location_bags(
+                rng=self.rngs[i],
+                sim_cfg=self.sim_cfg,
+                location=loc_state,
+                arrival_rate=None if rates is None else rates[i],
+            )
+            self.locations[i] = updated
+            rejected += bags_rejected
+            for deposit in results:
+                if deposit.new_fill_pct >= 100:
+                    filled += 1
+                deposits.append(
+                    LocationDeposit(
+                        location_index=i,
+                        container=deposit.container,
+                        old_fill_pct=deposit.old_fill_pct,
+                        new_fill_pct=deposit.new_fill_pct,
+                    )
+                )
+        self.counters.deposits += len(deposits)
+        self.counters.rejected_full += rejected
+        self.counters.full_containers += filled
+        return deposits
+
+
+def sample_steps_until_arrival(rng: RandomSource, arrival_prob: float) -> int | None:
+    """Sample the number of timesteps until the next arrival (1, 2, 3, ...).
+
+    Each timestep is an independent Bernoulli trial with `arrival_prob`, so the
+    wait is geometrically distributed. Returns None if nobody ever arrives.
+    """
+
+    if arrival_prob <= 0:
+        return None
+    if arrival_prob >= 1:
+        return 1
+
+    # Inverse-CDF sampling: P(wait > k) = (1 - p) ** k.
+    u = 1.0 - rng.random()  # in (0, 1], avoids log(0)
+    return max(1, math.ceil(math.log(u) / math.log1p(-arrival_prob)))
+
+
+class EventSkippingSimulationEngine(SimulationEngine):
+    """Engine that jumps straight to the next arrival of each location.
+
+    Instead of rolling an arrival die for every location on every timestep,
+    each location's next arrival step is sampled from a geometric distribution
+    and kept in a priority queue. A timestep only touches the locations that
+    someone arrives at, so cost scales with the number of arrivals. Arrivals
+    at a full location are still drawn so `counters.rejected_full` matches
+    the other engines.
+
+    The arrival process is the same as `step_location`, but random numbers are
+    consumed differently, so a given seed gives a different trajectory than
+    the Python engine.
+
+    With arrival profiles, candidate arrivals are sampled at each location's
+    highest probability of the week and accepted with the ratio of the
+    timestep's probability to it (thinning), which gives the same
+    per-timestep arrival probabilities.
+
+    With the "poisson" arrival model a timestep has arrivals with probability
+    ``1 - exp(-rate)``; at such a timestep the number of bags is drawn from
+    the Poisson distribution conditioned on at least one arrival.
+    """
+
+    def __init__(self, sim_cfg: SimulationConfig, *, seed: int | None, start_ts: datetime | None = None) -> None:
+        self.sim_cfg = sim_cfg
+        self.rngs = location_rngs(sim_cfg, resolve_seed(seed))
+        self.locations = [_initial_location_state(loc) for loc in sim_cfg.locations]
+        self.counters = EngineCounters()
+        self.arrivals = ArrivalTable.for_config(sim_cfg, start_ts)
+        self._poisson = sim_cfg.arrival_model == "poisson"
+
+        # Heap of (timestep_index, location_index). Ties pop in location order,
+        # matching the order of the other engines.
+        self._pending: list[tuple[int, int]] = []
+        for i in range(len(self.locations)):
+            self._schedule_next(i, after_step=-1)
+        heapq.heapify(self._pending)
+
+    @property
+    def location_count(self) -> int:
+        return len(self.locations)
+
+    def location_state(self, location_index: int) -> LocationState:
+        return self.locations[location_index]
+
+    def get_state(self) -> dict[str, Any]:
+        return {
+            "fills": location_fills(self.locations),
+            "rng_counters": [rng.counter for rng in self.rngs],
+            "counters": asdict(self.counters),
+            "pending": [list(item) for item in sorted(self._pending)],
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        self.locations = locations_from_fills(self.sim_cfg, state["fills"])
+        for rng, counter in zip(self.rngs, state["rng_counters"], strict=True):
+            rng.counter = int(counter)
+        self.counters = EngineCounters(**state["counters"])
+        # A sorted list is a valid heap.
+        self._pending = [(int(step), int(i)) for step, i in state["pending"]]
+        heapq.heapify(self._pending)
+
+    def empty_location(
+        self,
+        location_index: int,
+        timestep_index: int,
+        containers: list[ContainerName],
+    ) -> list[tuple[ContainerName, int]]:
+        self.locations[location_index], emptied = empty_containers(self.locations[location_index], containers)
+        self.counters.record_emptied(emptied)
+        return emptied
+
+    def _arrival_chance(self, rate: float) -> float:
+        """Probability of at least one arrival in a timestep."""
+
+        return -math.expm1(-rate) if self._poisson else rate
+
+    def _schedule_next(self, location_index: int, *, after_step: int) -> None:
+        arrivals = self.arrivals
+        rate = base_arrival_rate(self.sim_cfg) if arrivals is None else arrivals.max_probs[location_index]
+        wait = sample_steps_until_arrival(self.rngs[location_index], self._arrival_chance(rate))
+        if wait is not None:
+            heapq.heappush(self._pending, (after_step + wait, location_index))
+
+    def step(self, timestep_index: int) -> list[LocationDeposit]:
+        deposits: list[LocationDeposit] = []
+        pending = self._pending
+        arrivals = self.arrivals
+        probs = arrivals.step_probs(timestep_index) if arrivals is not None else None
+        while pending and pending[0][0] <= timestep_index:
+            _, i = heapq.heappop(pending)
+            rng = self.rngs[i]
+            if probs is not None and (
+                rng.random() * self._arrival_chance(arrivals.max_probs[i]) >= self._arrival_chance(probs[i])
+            ):
+                # Thinned out: nobody arrives at this candidate step.
+                self._schedule_next(i, after_step=timestep_index)
+                continue
+            if self._poisson:
+                rate = base_arrival_rate(self.sim_cfg) if probs is None else probs[i]
+                updated = self._deposit_bags(i, rate, deposits)
+            else:
+                updated, deposit = deposit_bag(rng=rng, sim_cfg=self.sim_cfg, location=self.locations[i])
+            self.locations[i] = updated
+            self._schedule_next(i, after_step=timestep_index)
+
+            if self._poisson:
+                continue
+            if not deposit.deposited:
+                self.counters.rejected_full += 1
+                continue
+
+            assert deposit.container is not None
+            assert deposit.old_fill_pct is not None
+            assert deposit.new_fill_pct is not None
+            if deposit.new_fill_pct >= 100:
+                self.counters.full_containers += 1
+            deposits.append(
+                LocationDeposit(
+                    location_index=i,
+                    container=deposit.container,
+                    old_fill_pct=deposit.old_fill_pct,
+                    new_fill_pct=deposit.new_fill_pct,
+                )
+            )
+        self.counters.deposits += len(deposits)
+        return deposits
+
+    def _deposit_bags(self, location_index: int, rate: float, deposits: list[LocationDeposit]) -> LocationState:
+        """Place the bags of a timestep known to have arrivals; appends to `deposits`."""
+
+        rng = self.rngs[location_index]
+        # Zero-truncated Poisson: map the draw above P(no arrivals).
+        none = math.exp(-rate)
+        bags = max(1, sample_poisson(none + rng.random() * (1.0 - none), rate))
+        updated, results, rejected = deposit_bags(
+            rng=rng,
+            sim_cfg=self.sim_cfg,
+            location=self.locations[location_index],
+            bags=bags,
+        )
+        self.counters.rejected_full += rejected
+        for deposit in results:
+            if deposit.new_fill_pct >= 100:
+                self.counters.full_containers += 1
+            deposits.append(
+                LocationDeposit(
+                    location_index=location_index,
+                    container=deposit.container,
+                    old_fill_pct=deposit.old_fill_pct,
+                    new_fill_pct=deposit.new_fill_pct,
+                )
+            )
+        return updated
+
+
+ENGINE_NAMES = ("python", "numpy", "event")
+
+
+def make_engine(
+    name: str,
+    sim_cfg: SimulationConfig,
+    *,
+    seed: int | None,
+    workers: int | None = None,
+    start_ts: datetime | None = None,
+    max_steps: int | None = None,
+) -> SimulationEngine:
+    """Create a simulation engine by name (see `ENGINE_NAMES`).
+
+    Passing `workers` selects the sharded multi-process runner, which currently
+    supports only the "python" engine; `max_steps` (the run length) keeps it
+    from simulating past the end of the run. `start_ts` is the timestamp of
+    the first timestep, used by arrival profiles (default
+    `simulation.start_time`, then the current time).
+    """
+
+    if workers is not None:
+        if name != "python":
+            raise ValueError("workers is only supported with the 'python' engine")
+        from .sharded_sim import ShardedSimulationEngine
+
+        return ShardedSimulationEngine(sim_cfg, seed=seed, workers=workers, start_ts=start_ts, max_steps=max_steps)
+
+    if name == "python":
+        return PythonSimulationEngine(sim_cfg, seed=seed, start_ts=start_ts)
+    if name == "event":
+        return EventSkippingSimulationEngine(sim_cfg, seed=seed, start_ts=start_ts)
+    if name == "numpy":
+        # Imported lazily so NumPy stays an optional dependency.
+        from .vectorized_sim import NumpySimulationEngine
+
+        return NumpySimulationEngine(sim_cfg, seed=seed, start_ts=start_ts)
+
+    raise ValueError(f"Unknown simulation engine '{name}'. Available: {', '.join(ENGINE_NAMES)}")
+
+
+def deposit_event_count(sim_cfg: SimulationConfig, deposit: LocationDeposit) -> int:
+    """Number of status events a deposit causes.
+
+    With `publish_every_deposit` every deposit causes one event; otherwise
+    one event is sent per `status_boundary_pct` boundary crossed.
+    """
+
+    if sim_cfg.publish_every_deposit:
+        return 1
+    return len(
+        boundaries_crossed(
+            deposit.old_fill_pct,
+            deposit.new_fill_pct,
+            boundary_pct=sim_cfg.status_boundary_pct,
+        )
+    )
+
+
+# (location, container, fill_pct, event) of one status event; see `step_events`.
+StepEvent = tuple[LocationState, ContainerName, int, str]
+
+
+def step_events(
+    sim_engine: SimulationEngine,
+    *,
+    sim_cfg: SimulationConfig,
+    timestep_index: int,
+    collector: CollectionScheduler | None = None,
+) -> list[StepEvent]:
+    """Advance one timestep and return its status events in publish order.
+
+    With `collector`, trucks first empty the containers at their scheduled
+    stops, and the scheduler observes the engine's deposits. Each emptied
+    container gives a `collected` event with fill 0, ahead of the deposits'
+    `status` events (see `deposit_event_count`). The sync and async runners
+    share this and differ only in how they publish.
+    """
+
+    collections = collector.collect(sim_engine, timestep_index) if collector is not None else []
+    deposits = sim_engine.step(timestep_index)
+    if collector is not None:
+        collector.observe(sim_engine, deposits, timestep_index)
+
+    events: list[StepEvent] = [
+        (sim_engine.location_state(c.location_index), c.container, 0, "collected") for c in collections
+    ]
+    for deposit in deposits:
+        count = deposit_event_count(sim_cfg, deposit)
+        if count:
+            location = sim_engine.location_state(deposit.location_index)
+            events.extend([(location, deposit.container, deposit.new_fill_pct, "status")] * count)
+    return events
+
+
+def run_steps(
+    sim_engine: SimulationEngine,
+    publisher: StatusPublisher,
+    *,
+    sim_cfg: SimulationConfig,
+    steps: int,
+    start_ts: datetime,
+    metrics: SimulationMetrics | None = None,
+    pacer: PacingScheduler | None = None,
+    start_step: int = 0,
+    checkpointer: Checkpointer | None = None,
+    collector: CollectionScheduler | None = None,
+) -> None:
+    """Publish the initial status events, then advance `steps` timesteps.
+
+    This is the core loop of `run_simulation`, without creating the engine or
+    the publishers and without closing them.
+
+    A resumed run passes the checkpoint's `start_step`: the initial events
+    are skipped and the loop continues up to `steps`. `checkpointer` gets a
+    chance to checkpoint after every timestep.
+
+    With `collector`, trucks empty the containers at their scheduled stops
+    before each timestep, and `collected` events are published ahead of that
+    timestep's deposits (see :mod:`simulated_city.collection`).
+
+    With `metrics`, every timestep is timed per stage (engine, publish,
+    end_step) and the metrics file is refreshed when its interval elapses.
+    With `pacer`, each timestep waits for its wall-clock deadline; without
+    one the steps run as fast as possible.
+    """
+
+    if metrics is not None:
+        metrics.engine_counters = getattr(sim_engine, "counters", None)
+        metrics.step_interval_s = pacer.interval_s if pacer is not None else 0.0
+        metrics.pacer = pacer
+        metrics.checkpointer = checkpointer
+        metrics.start()
+
+    # Publish an initial status for every container so dashboards can show
+    # all bins immediately (aligned at the same start timestamp).
+    if start_step == 0:
+        for location_index in range(sim_engine.location_count):
+            loc_state = sim_engine.location_state(location_index)
+            for container_name in ("left", "center", "right"):
+                publisher.publish_status(
+                    ts=start_ts,
+                    location=loc_state,
+                    container=container_name,
+                    fill_pct=getattr(loc_state, container_name).fill_pct,
+                    timestep_index=-1,
+                    event="init",
+                )
+
+        if metrics is not None:
+            metrics.events_published += 3 * sim_engine.location_count
+
+    if pacer is not None:
+        pacer.start()
+
+    for timestep_index in range(start_step, steps):
+        ts = start_ts + timedelta(minutes=sim_cfg.timestep_minutes * timestep_index)
+
+        t0 = time.perf_counter()
+        events = step_events(sim_engine, sim_cfg=sim_cfg, timestep_index=timestep_index, collector=collector)
+        t1 = time.perf_counter()
+        for location, container, fill_pct, event in events:
+            publisher.publish_status(
+                ts=ts,
+                location=location,
+                container=container,
+                fill_pct=fill_pct,
+                timestep_index=timestep_index,
+                event=event,
+            )
+        t2 = time.perf_counter()
+        publisher.end_step(timestep_index)
+        if metrics is not None:
+            metrics.record_step(
+                timestep_index=timestep_index,
+                sim_ts=ts,
+                engine_s=t1 - t0,
+                publish_s=t2 - t1,
+                end_step_s=time.perf_counter() - t2,
+                events=len(events),
+            )
+            metrics.maybe_write()
+
+        if checkpointer is not None:
+            checkpointer.maybe_checkpoint(sim_engine, timestep_index + 1)
+
+        # Optional real-time pacing for demos / MQTT dashboard testing.
+        if pacer is not None:
+            pacer.wait()
+
+
+LOG_FORMATS = ("jsonl", "binary", "parquet")
+
+# Names of the publishers in metrics output.
+_PUBLISHER_LABELS: dict[type, str] = {
+    BufferedJsonlFileStatusPublisher: "jsonl",
+    BinaryEventLogStatusPublisher: "binary",
+    ParquetStatusPublisher: "parquet",
+    StdoutStatusPublisher: "stdout",
+    MqttStatusPublisher: "mqtt",
+    WindowedMqttStatusPublisher: "mqtt",
+}
+
+
 def run_simulation(
     cfg: AppConfig,
     *,
@@ -382,8 +1726,59 @@ def run_simulation(
     dry_run: bool = False,
     seed_override: int | None = None,
     log_file: str | None = None,
-) -> None:
-    """Run the rubbish-bin simulation for a given number of timesteps."""
+    engine: str = "python",
+    workers: int | None = None,
+    log_format: str = "jsonl",
+    metrics: bool = False,
+    metrics_file: str | None = None,
+    metrics_port: int | None = None,
+    speed: float | None = None,
+    catch_up: bool | None = None,
+    checkpoint_file: str | None = None,
+    resume: bool = False,
+) -> SimulationMetrics | None:
+    """Run the rubbish-bin simulation for a given number of timesteps.
+
+    `engine` selects how container state is advanced: "python" (reference
+    implementation), "numpy" (vectorized, requires the `fast` extra) or
+    "event" (samples each location's next arrival, skipping idle steps).
+
+    `workers` shards locations across that many worker processes.
+
+    `log_format` selects the `log_file` format: "jsonl" (one JSON object per
+    line), "binary" (see :mod:`simulated_city.event_log`) or "parquet"
+    (requires the `parquet` extra).
+
+    Runs are paced in wall-clock time when `step_delay_s` or a `speed`
+    (simulated time per wall-clock time, default `simulation.pacing_speed`) is
+    set; `catch_up` overrides `simulation.pacing_catch_up` (see
+    :mod:`simulated_city.pacing`). Achieved vs target pace is printed to
+    stderr at the end.
+
+    Every location draws from its own random stream derived from the seed and
+    its `location_id`, so editing the location list does not change the other
+    locations' trajectories. The "python" and "numpy" engines (sharded or not)
+    produce identical events for a fixed seed.
+
+    `metrics` (or `metrics_file`, or the `simulation.metrics*` config keys)
+    turns on instrumentation (see :mod:`simulated_city.metrics`): a summary is
+    printed to stderr at the end and, with a metrics file, the JSON snapshot
+    is refreshed every `metrics_interval_s` seconds. `metrics_port` (or
+    `simulation.metrics_port`) also serves the live metrics in the Prometheus
+    text format at ``http://<metrics_host>:<port>/metrics`` while the run
+    lasts. The metrics are returned; without instrumentation the return value
+    is None.
+
+    `checkpoint_file` (or `simulation.checkpoint_file`) is rewritten every
+    `checkpoint_interval_s` seconds and at the end of the run. With `resume`,
+    the run continues from that checkpoint up to timestep `steps`, appending
+    to the JSONL `log_file` from the checkpoint's position, so the events
+    match an uninterrupted run (see :mod:`simulated_city.checkpoint`).
+
+    A `simulation.collection` section adds trucks that empty containers and
+    publish `collected` events (see :mod:`simulated_city.collection`); it is
+    not supported with `workers`.
+    """
 
     if steps <= 0:
         raise ValueError("steps must be > 0")
@@ -392,91 +1787,173 @@ def run_simulation(
     if sim_cfg is None or not sim_cfg.locations:
         raise ValueError("No simulation configured. Add a 'simulation.locations' section in config.yaml.")
 
-    seed = seed_override if seed_override is not None else sim_cfg.seed
-    rng = random.Random(seed)
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{log_format}'. Available: {', '.join(LOG_FORMATS)}")
+
+    checkpoint_file = checkpoint_file or sim_cfg.checkpoint_file
+    checkpoint = None
+    log_mode = "w"
+    if resume:
+        from .checkpoint import load_checkpoint, rewind_log
+
+        if not checkpoint_file:
+            raise ValueError("resume needs a checkpoint file (--checkpoint-file or simulation.checkpoint_file)")
+        checkpoint = load_checkpoint(checkpoint_file)
+        checkpoint.check_compatible(sim_cfg, engine=engine)
+        if log_file:
+            offset = checkpoint.publisher_offsets.get("jsonl")
+            if log_format != "jsonl" or offset is None:
+                raise ValueError("resuming into a log file needs a JSONL log written by the checkpointed run")
+            rewind_log(log_file, offset)
+            log_mode = "a"
+        print(f"Resuming at timestep {checkpoint.next_step} from {checkpoint_file}", file=sys.stderr)
+        seed = checkpoint.seed
+        start_ts = checkpoint.start_ts
+    else:
+        # Resolved here so a checkpoint can record the seed actually used.
+        seed = resolve_seed(seed_override if seed_override is not None else sim_cfg.seed)
+        start_ts = sim_cfg.start_time or datetime.now(timezone.utc)
+
+    collector: CollectionScheduler | None = None
+    if sim_cfg.collection is not None:
+        from .collection import CollectionScheduler
+
+        if workers is not None:
+            raise ValueError("simulation.collection is not supported with workers")
+        collector = CollectionScheduler(sim_cfg)
 
-    locations = [_initial_location_state(loc) for loc in sim_cfg.locations]
+    pacer = pacer_for_config(sim_cfg, speed=speed, catch_up=catch_up)
+    sim_engine = make_engine(engine, sim_cfg, seed=seed, workers=workers, start_ts=start_ts, max_steps=steps)
+    if checkpoint is not None:
+        sim_engine.set_state(checkpoint.engine_state)
+        if collector is not None:
+            collector.set_state(checkpoint.collection_state)
 
     publisher: StatusPublisher
+    mqtt_publisher: StatusPublisher | None = None
     client = None
     log_fp: io.TextIOWrapper | None = None
 
     publishers: list[StatusPublisher] = []
-    if log_file:
+    if log_file and log_format == "binary":
+        publishers.append(BinaryEventLogStatusPublisher(writer=BinaryEventLogWriter(log_file)))
+    elif log_file and log_format == "parquet":
+        publishers.append(ParquetStatusPublisher(path=log_file))
+    elif log_file:
         # Overwrite by default so a single log file corresponds to one run.
         # This avoids confusing dashboards with apparent fill decreases caused
         # by appended runs.
-        log_fp = open(log_file, "w", encoding="utf-8")
-        publishers.append(JsonlFileStatusPublisher(mqtt_cfg=cfg.mqtt, fp=log_fp))
+        log_fp = open(log_file, log_mode, encoding="utf-8", buffering=sim_cfg.log_flush_every_bytes)
+        publishers.append(
+            BufferedJsonlFileStatusPublisher(
+                mqtt_cfg=cfg.mqtt,
+                fp=log_fp,
+                flush_every_events=sim_cfg.log_flush_every_events,
+                flush_every_bytes=sim_cfg.log_flush_every_bytes,
+                flush_interval_s=sim_cfg.log_flush_interval_s,
+            )
+        )
 
     if dry_run:
         publishers.append(StdoutStatusPublisher(mqtt_cfg=cfg.mqtt))
-        publisher = TeeStatusPublisher(publishers=tuple(publishers)) if len(publishers) > 1 else publishers[0]
     else:
-        handle = connect_mqtt(cfg.mqtt, client_id_suffix="rubbish-sim")
+        handle = connect_mqtt(
+            cfg.mqtt,
+            client_id_suffix="rubbish-sim",
+            max_inflight_messages=sim_cfg.mqtt_publish_window or None,
+        )
         client = handle.client
         client.loop_start()
-        publishers.append(MqttStatusPublisher(handle=handle, mqtt_cfg=cfg.mqtt))
-        publisher = TeeStatusPublisher(publishers=tuple(publishers)) if len(publishers) > 1 else publishers[0]
-
-    try:
-        start_ts = sim_cfg.start_time or datetime.now(timezone.utc)
-
-        # Publish an initial status for every container so dashboards can show
-        # all bins immediately (aligned at the same start timestamp).
-        for loc_state in locations:
-            for container_name in ("left", "center", "right"):
-                publisher.publish_status(
-                    ts=start_ts,
-                    location=loc_state,
-                    container=container_name,
-                    fill_pct=getattr(loc_state, container_name).fill_pct,
-                    timestep_index=-1,
-                    event="init",
-                )
-
-        for timestep_index in range(steps):
-            ts = start_ts + timedelta(minutes=sim_cfg.timestep_minutes * timestep_index)
-
-            for i, loc_state in enumerate(locations):
-                updated, deposit = step_location(rng=rng, sim_cfg=sim_cfg, location=loc_state)
-                locations[i] = updated
+        if sim_cfg.mqtt_publish_window > 0:
+            mqtt_publisher = WindowedMqttStatusPublisher(
+                handle=handle,
+                mqtt_cfg=cfg.mqtt,
+                window=sim_cfg.mqtt_publish_window,
+            )
+            publishers.append(mqtt_publisher)
+        else:
+            publishers.append(MqttStatusPublisher(handle=handle, mqtt_cfg=cfg.mqtt))
+
+    checkpointer: Checkpointer | None = None
+    if checkpoint_file:
+        from .checkpoint import Checkpointer
+
+        checkpointer = Checkpointer(
+            checkpoint_file,
+            engine=engine,
+            seed=seed,
+            start_ts=start_ts,
+            sim_cfg=sim_cfg,
+            interval_s=sim_cfg.checkpoint_interval_s,
+            publishers={_PUBLISHER_LABELS.get(type(p), type(p).__name__): p for p in publishers},
+            collector=collector,
+        )
 
-                if not deposit.deposited:
-                    continue
+    run_metrics: SimulationMetrics | None = None
+    metrics_server: MetricsServer | None = None
+    metrics_file = metrics_file or sim_cfg.metrics_file
+    metrics_port = metrics_port if metrics_port is not None else sim_cfg.metrics_port
+    if metrics or metrics_file or metrics_port is not None or sim_cfg.metrics:
+        run_metrics = SimulationMetrics(path=metrics_file, interval_s=sim_cfg.metrics_interval_s)
+        publishers = [
+            InstrumentedStatusPublisher(
+                inner=p,
+                metrics=run_metrics.add_publisher(_PUBLISHER_LABELS.get(type(p), type(p).__name__)),
+            )
+            for p in publishers
+        ]
+        if metrics_port is not None:
+            metrics_server = MetricsServer(run_metrics, host=sim_cfg.metrics_host, port=metrics_port)
+            print(
+                f"Serving metrics at http://{sim_cfg.metrics_host}:{metrics_server.port}/metrics",
+                file=sys.stderr,
+            )
 
-                assert deposit.container is not None
-                assert deposit.old_fill_pct is not None
-                assert deposit.new_fill_pct is not None
+    publisher = TeeStatusPublisher(publishers=tuple(publishers)) if len(publishers) > 1 else publishers[0]
 
-                if sim_cfg.publish_every_deposit:
-                    publisher.publish_status(
-                        ts=ts,
-                        location=updated,
-                        container=deposit.container,
-                        fill_pct=deposit.new_fill_pct,
-                        timestep_index=timestep_index,
-                        event="status",
-                    )
-                else:
-                    for _boundary in boundaries_crossed(
-                        deposit.old_fill_pct,
-                        deposit.new_fill_pct,
-                        boundary_pct=sim_cfg.status_boundary_pct,
-                    ):
-                        publisher.publish_status(
-                            ts=ts,
-                            location=updated,
-                            container=deposit.container,
-                            fill_pct=deposit.new_fill_pct,
-                            timestep_index=timestep_index,
-                            event="status",
-                        )
-
-            # Optional wall-clock delay for demos / MQTT dashboard testing.
-            if sim_cfg.step_delay_s > 0:
-                time.sleep(sim_cfg.step_delay_s)
+    try:
+        run_steps(
+            sim_engine,
+            publisher,
+            sim_cfg=sim_cfg,
+            steps=steps,
+            start_ts=start_ts,
+            metrics=run_metrics,
+            pacer=pacer,
+            start_step=checkpoint.next_step if checkpoint is not None else 0,
+            checkpointer=checkpointer,
+            collector=collector,
+        )
+        if checkpointer is not None:
+            next_step = max(steps, checkpoint.next_step if checkpoint is not None else 0)
+            if not checkpointer.checkpoint(sim_engine, next_step):
+                print(
+                    f"WARNING: the final checkpoint could not be taken; {checkpoint_file} is from an earlier step",
+                    file=sys.stderr,
+                )
     finally:
+        # Flush buffered publishers before their files/connections go away.
+        publisher.close()
+        if checkpointer is not None:
+            checkpointer.close()
+            if checkpointer.error is not None:
+                print(f"WARNING: writing checkpoint {checkpoint_file} failed: {checkpointer.error}", file=sys.stderr)
+        if pacer is not None:
+            print(pacer.format_summary(), file=sys.stderr)
+        if run_metrics is not None:
+            run_metrics.write()
+            print(format_summary(run_metrics.snapshot()), file=sys.stderr)
+        if metrics_server is not None:
+            metrics_server.close()
+        if isinstance(mqtt_publisher, WindowedMqttStatusPublisher) and (
+            mqtt_publisher.dropped or mqtt_publisher.unacked
+        ):
+            print(
+                f"WARNING: MQTT published={mqtt_publisher.published} acked={mqtt_publisher.acked} "
+                f"dropped={mqtt_publisher.dropped} unacked={mqtt_publisher.unacked}",
+                file=sys.stderr,
+            )
+        sim_engine.close()
         if log_fp is not None:
             log_fp.close()
         if client is not None:
@@ -484,3 +1961,5 @@ def run_simulation(
                 client.loop_stop()
             finally:
                 client.disconnect()
+
+    return run_metrics
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+"""Multi-process (sharded) engine for the rubbish-bin simulation.
+
+Locations never influence each other, so they can be simulated on separate CPU
+cores. This engine:
+
+- splits `SimulationConfig.locations` into fixed-size blocks
+- advances blocks in a `ProcessPoolExecutor` several timesteps at a time,
+  shipping each location's random stream (see :mod:`simulated_city.rng_streams`)
+  along with its state
+- merges the per-block deposits back into (timestep, location) order
+
+Every location owns its random stream, so the output for a fixed seed does not
+depend on the number of workers or the block size, and it matches the
+unsharded "python" engine exactly.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+import heapq
+from typing import Any
+
+from .arrival_profiles import ArrivalTable
+from .config import SimulationConfig
+from .rng_streams import LocationRandom, resolve_seed
+from .rubbish_sim import (
+    ContainerName,
+    ContainerState,
+    EngineCounters,
+    LocationDeposit,
+    LocationState,
+    SimulationEngine,
+    _initial_location_state,
+    location_fills,
+    location_rngs,
+    locations_from_fills,
+    step_location,
+    step_location_bags,
+)
+
+
+# Number of locations sent to a worker per task.
+DEFAULT_BLOCK_SIZE = 64
+
+# Timesteps advanced per round trip to the worker pool (one simulated day at
+# the default 15-minute timestep).
+DEFAULT_CHUNK_STEPS = 96
+
+
+@dataclass(frozen=True, slots=True)
+class _BlockTask:
+    sim_cfg: SimulationConfig
+    first_location: int
+    locations: tuple[LocationState, ...]
+    rngs: tuple[LocationRandom, ...]
+    first_step: int
+    step_count: int
+    # Per timestep, the block's arrival probabilities, or mean arrivals with
+    # the "poisson" model (None = the configured constant).
+    arrival_probs: tuple[tuple[float, ...], ...] | None = None
+
+
+# (timestep_index, location_index, container, old_fill_pct, new_fill_pct)
+_RawDeposit = tuple[int, int, ContainerName, int, int]
+
+
+def _advance_block(task: _BlockTask) -> tuple[tuple[LocationRandom, ...], list[_RawDeposit], list[int]]:
+    """Advance one block for `step_count` timesteps (runs in a worker process).
+
+    Returns the advanced streams, the deposits and the number of rejected
+    (all containers full) arrivals per timestep.
+    """
+
+    rngs = task.rngs
+    locations = list(task.locations)
+
+    deposits: list[_RawDeposit] = []
+    rejected = [0] * task.step_count
+    poisson = task.sim_cfg.arrival_model == "poisson"
+    for timestep_index in range(task.first_step, task.first_step + task.step_count):
+        probs = None if task.arrival_probs is None else task.arrival_probs[timestep_index - task.first_step]
+        for offset, loc_state in enumerate(locations):
+            if poisson:
+                locations[offset], results, bags_rejected = step_location_bags(
+                    rng=rngs[offset],
+                    sim_cfg=task.sim_cfg,
+                    location=loc_state,
+                    arrival_rate=None if probs is None else probs[offset],
+                )
+                rejected[timestep_index - task.first_step] += bags_rejected
+                for bag in results:
+                    deposits.append(
+                        (
+                            timestep_index,
+                            task.first_location + offset,
+                            bag.container,
+                            bag.old_fill_pct,
+                            bag.new_fill_pct,
+                        )
+                    )
+                continue
+
+            updated, deposit = step_location(
+                rng=rngs[offset],
+                sim_cfg=task.sim_cfg,
+                location=loc_state,
+                arrival_prob=None if probs is None else probs[offset],
+            )
+            locations[offset] = updated
+            if not deposit.deposited and deposit.arrived:
+                rejected[timestep_index - task.first_step] += 1
+            elif deposit.deposited:
+                assert deposit.container is not None
+                assert deposit.old_fill_pct is not None
+                assert deposit.new_fill_pct is not None
+                deposits.append(
+                    (
+                        timestep_index,
+                        task.first_location + offset,
+                        deposit.container,
+                        deposit.old_fill_pct,
+                        deposit.new_fill_pct,
+                    )
+                )
+
+    # Return the advanced streams; the worker's copies are discarded.
+    return rngs, deposits, rejected
+
+
+class ShardedSimulationEngine(SimulationEngine):
+    """Advance blocks of locations in parallel worker processes.
+
+    `workers=1` runs every block in the current process (no pool), which is
+    handy for debugging and produces exactly the same events as `workers=N`.
+    With `max_steps` (the run length), the last chunk stops at that timestep
+    instead of simulating a full `chunk_steps` past the end of the run.
+    """
+
+    def __init__(
+        self,
+        sim_cfg: SimulationConfig,
+        *,
+        seed: int | None,
+        workers: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        chunk_steps: int = DEFAULT_CHUNK_STEPS,
+        start_ts: datetime | None = None,
+        max_steps: int | None = None,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be > 0")
+        if block_size <= 0:
+            raise ValueError("block_size must be > 0")
+        if chunk_steps <= 0:
+            raise ValueError("chunk_steps must be > 0")
+
+        self.sim_cfg = sim_cfg
+        self.chunk_steps = chunk_steps
+        self.max_steps = max_steps
+        self.locations = [_initial_location_state(loc) for loc in sim_cfg.locations]
+
+        # Workers only need the model parameters, not the location list.
+        self._task_cfg = replace(sim_cfg, locations=())
+        self._blocks = [
+            (start, min(start + block_size, len(self.locations)))
+            for start in range(0, len(self.locations), block_size)
+        ]
+        self.rngs = location_rngs(sim_cfg, resolve_seed(seed))
+        self.arrivals = ArrivalTable.for_config(sim_cfg, start_ts)
+
+        # The pool is started lazily on the first chunk.
+        self.workers = workers
+        self._executor: Executor | None = None
+        self._buffered: dict[int, list[_RawDeposit]] = {}
+        self._buffered_rejected: list[int] = []
+        self._chunk_start = 0
+        self._next_chunk_step = 0
+        self._stepped_to = 0
+        self.counters = EngineCounters()
+
+    @property
+    def location_count(self) -> int:
+        return len(self.locations)
+
+    def location_state(self, location_index: int) -> LocationState:
+        return self.locations[location_index]
+
+    def get_state(self) -> dict[str, Any] | None:
+        # The streams run ahead to the end of the current chunk, so the state
+        # is only consistent once every buffered timestep has been stepped.
+        if self._stepped_to != self._next_chunk_step:
+            return None
+        return {
+            "fills": location_fills(self.locations),
+            "rng_counters": [rng.counter for rng in self.rngs],
+            "counters": asdict(self.counters),
+        }
+
+    def next_state_step(self) -> int | None:
+        return self._next_chunk_step
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        self.locations = locations_from_fills(self.sim_cfg, state["fills"])
+        for rng, counter in zip(self.rngs, state["rng_counters"], strict=True):
+            rng.counter = int(counter)
+        self.counters = EngineCounters(**state["counters"])
+        # The next step starts a new chunk at whatever index it has.
+        self._buffered = {}
+        self._buffered_rejected = []
+        self._chunk_start = self._next_chunk_step = self._stepped_to = 0
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _advance_chunk(self, first_step: int) -> None:
+        step_count = self.chunk_steps
+        if self.max_steps is not None and first_step < self.max_steps:
+            step_count = min(step_count, self.max_steps - first_step)
+        chunk_probs = None
+        if self.arrivals is not None:
+            chunk_probs = [self.arrivals.step_probs(step) for step in range(first_step, first_step + step_count)]
+        tasks = [
+            _BlockTask(
+                sim_cfg=self._task_cfg,
+                first_location=start,
+                locations=tuple(self.locations[start:end]),
+                rngs=tuple(self.rngs[start:end]),
+                first_step=first_step,
+                step_count=step_count,
+                arrival_probs=None if chunk_probs is None else tuple(tuple(probs[start:end]) for probs in chunk_probs),
+            )
+            for start, end in self._blocks
+        ]
+
+        if self.workers == 1:
+            results = list(map(_advance_block, tasks))
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._executor.map(_advance_block, tasks))
+
+        per_block: list[list[_RawDeposit]] = []
+        self._buffered_rejected = [0] * step_count
+        for (start, end), (rngs, deposits, rejected) in zip(self._blocks, results):
+            self.rngs[start:end] = rngs
+            per_block.append(deposits)
+            self._buffered_rejected = [a + b for a, b in zip(self._buffered_rejected, rejected)]
+
+        # Each block's deposits are already sorted by (timestep, location), so
+        # a k-way merge restores the global order a single process would use.
+        self._buffered = {}
+        self._chunk_start = first_step
+        self._next_chunk_step = first_step + step_count
+        for raw in heapq.merge(*per_block):
+            self._buffered.setdefault(raw[0], []).append(raw)
+
+    def step(self, timestep_index: int) -> list[LocationDeposit]:
+        if timestep_index >= self._next_chunk_step:
+            self._advance_chunk(timestep_index)
+        self._stepped_to = timestep_index + 1
+
+        raw_deposits = self._buffered.pop(timestep_index, [])
+        self.counters.deposits += len(raw_deposits)
+        self.counters.rejected_full += self._buffered_rejected[timestep_index - self._chunk_start]
+
+        deposits: list[LocationDeposit] = []
+        for _, location_index, container, old_fill, new_fill in raw_deposits:
+            if new_fill >= 100:
+                self.counters.full_containers += 1
+            # Replay the deposit so `location_state` matches this timestep.
+            self.locations[location_index] = replace(
+                self.locations[location_index],
+                **{container: ContainerState(fill_pct=new_fill)},
+            )
+            deposits.append(
+                LocationDeposit(
+                    location_index=location_index,
+                    container=container,
+                    old_fill_pct=old_fill,
+                    new_fill_pct=new_fill,
+                )
+            )
+        return deposits
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+"""Vectorized (NumPy) engine for the rubbish-bin simulation.
+
+The reference engine in :mod:`simulated_city.rubbish_sim` advances one
+location at a time and allocates new state objects for every deposit. That is
+easy to read but slow for thousands of locations.
+
+This engine keeps all fill levels in a single ``(locations, 3)`` integer array
+and advances every location at once:
+
+- one batched RNG call per timestep draws the arrival roll, the preferred
+  container roll and the fallback roll for every location
+- the 50/25/25 preference and the full-container fallback are applied with
+  array masks
+- with the "poisson" arrival model, the inverse-CDF loops of
+  `sample_poisson` and `sample_binomial` run over all locations at once and
+  the batches are expanded into per-bag deposits with `np.repeat`
+
+Random numbers come from the same per-location counter streams as the Python
+engine (see :mod:`simulated_city.rng_streams`), and each location advances its
+counter by exactly as many draws as `step_location` would. The two engines
+therefore produce identical events for a given seed.
+
+Dependency note:
+NumPy is optional. Install with:
+
+    pip install -e ".[fast]"
+"""
+
+from dataclasses import asdict
+from datetime import datetime
+import math
+from typing import Any
+
+from .arrival_profiles import ArrivalTable, base_arrival_rate
+from .config import SimulationConfig
+from .rng_streams import location_stream_key, resolve_seed, uniform_many
+from .rubbish_sim import (
+    MAX_BAGS_PER_STEP,
+    PREFERENCE_SPLIT,
+    ContainerName,
+    ContainerState,
+    EngineCounters,
+    LocationDeposit,
+    LocationState,
+    SimulationEngine,
+    _binomial_table,
+)
+
+
+# Column order of the fill array. Matches the order used by `choose_container`
+# when it builds the list of available containers.
+CONTAINER_NAMES: tuple[ContainerName, ...] = ("left", "center", "right")
+
+
+def _require_numpy():
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "numpy is required for the vectorized simulation engine. "
+            "Install it with `pip install -e \".[fast]\"` (or `pip install numpy`)."
+        ) from e
+    return np
+
+
+class NumpySimulationEngine(SimulationEngine):
+    """Advance all locations per timestep with NumPy array operations."""
+
+    def __init__(self, sim_cfg: SimulationConfig, *, seed: int | None, start_ts: datetime | None = None) -> None:
+        np = _require_numpy()
+        self._np = np
+        self.sim_cfg = sim_cfg
+        seed = resolve_seed(seed)
+
+        self.location_ids = [loc.location_id for loc in sim_cfg.locations]
+        self.lats = [loc.lat for loc in sim_cfg.locations]
+        self.lons = [loc.lon for loc in sim_cfg.locations]
+        self.fills = np.zeros((len(self.location_ids), 3), dtype=np.int16)
+        self._rows = np.arange(len(self.location_ids))
+
+        # Per-location stream keys and draw counters (see `LocationRandom`).
+        self.stream_keys = np.array(
+            [location_stream_key(seed, location_id) for location_id in self.location_ids],
+            dtype=np.uint64,
+        )
+        self.stream_counters = np.zeros(len(self.location_ids), dtype=np.uint64)
+        self.counters = EngineCounters()
+
+        # Arrival profiles: (group, hour of week) probabilities and each
+        # location's group; one fancy-index per hour of the week.
+        self.arrivals = ArrivalTable.for_config(sim_cfg, start_ts)
+        if self.arrivals is not None:
+            self._group_probs = np.array(self.arrivals.group_probs, dtype=np.float64)
+            self._location_groups = np.array(self.arrivals.location_groups, dtype=np.intp)
+            self._probs_slot = -1
+            self._probs = np.empty(len(self.location_ids), dtype=np.float64)
+
+        if sim_cfg.arrival_model == "poisson":
+            # exp(-rate) from `math.exp`, so draws match `sample_poisson` exactly.
+            if self.arrivals is None:
+                self._exp_neg_rate = math.exp(-base_arrival_rate(sim_cfg))
+            else:
+                self._group_exp_neg = np.array(
+                    [[math.exp(-rate) for rate in rates] for rates in self.arrivals.group_probs],
+                    dtype=np.float64,
+                )
+            self._binomial = {
+                p: (np.array(powers, dtype=np.float64), ratio)
+                for p in (*PREFERENCE_SPLIT, 0.5)
+                for powers, ratio in [_binomial_table(p)]
+            }
+
+    @property
+    def location_count(self) -> int:
+        return len(self.location_ids)
+
+    def location_state(self, location_index: int) -> LocationState:
+        left, center, right = (int(v) for v in self.fills[location_index])
+        return LocationState(
+            location_id=self.location_ids[location_index],
+            lat=self.lats[location_index],
+            lon=self.lons[location_index],
+            left=ContainerState(fill_pct=left),
+            center=ContainerState(fill_pct=center),
+            right=ContainerState(fill_pct=right),
+        )
+
+    def get_state(self) -> dict[str, Any]:
+        # Same layout as the Python engine, so checkpoints are interchangeable.
+        return {
+            "fills": self.fills.tolist(),
+            "rng_counters": self.stream_counters.tolist(),
+            "counters": asdict(self.counters),
+        }
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        np = self._np
+        fills = np.asarray(state["fills"], dtype=np.int16).reshape(-1, 3)
+        if len(fills) != self.location_count:
+            raise ValueError(f"state has {len(fills)} locations, the configuration has {self.location_count}")
+        self.fills[:] = fills
+        self.stream_counters[:] = np.asarray(state["rng_counters"], dtype=np.uint64)
+        self.counters = EngineCounters(**state["counters"])
+
+    def empty_location(
+        self,
+        location_index: int,
+        timestep_index: int,
+        containers: list[ContainerName],
+    ) -> list[tuple[ContainerName, int]]:
+        row = self.fills[location_index]
+        emptied = []
+        for name in containers:
+            column = CONTAINER_NAMES.index(name)
+            if row[column] > 0:
+                emptied.append((name, int(row[column])))
+                row[column] = 0
+        self.counters.record_emptied(emptied)
+        return emptied
+
+    def _arrival_probs(self, timestep_index: int):
+        slot = self.arrivals.slot(timestep_index)
+        if slot != self._probs_slot:
+            self._probs = self._group_probs[self._location_groups, slot]
+            self._probs_slot = slot
+        return self._probs
+
+    def step(self, timestep_index: int) -> list[LocationDeposit]:
+        if self.sim_cfg.arrival_model == "poisson":
+            return self._step_bags(timestep_index)
+
+        np = self._np
+        sim_cfg = self.sim_cfg
+        rows = self._rows
+
+        # Columns: arrival roll, preferred-container roll, fallback roll. Each
+        # is the next unused draw of the location's stream; the counters are
+        # advanced below by the number of draws `step_location` would use.
+        offsets = np.arange(3, dtype=np.uint64)
+        rolls = uniform_many(self.stream_keys[:, None], self.stream_counters[:, None] + offsets)
+
+        arrival_prob = sim_cfg.arrival_prob if self.arrivals is None else self._arrival_probs(timestep_index)
+        arrived = rolls[:, 0] < arrival_prob
+
+        # 50/25/25 rule: [0, 0.25) left, [0.25, 0.75) center, [0.75, 1) right.
+        preferred = np.searchsorted(np.array([0.25, 0.75]), rolls[:, 1], side="right")
+
+        available = self.fills < 100
+        available_count = available.sum(axis=1)
+
+        # Fallback: pick uniformly among the non-full containers, in column order.
+        fallback_rank = np.floor(rolls[:, 2] * available_count).astype(np.int64)
+        fallback = np.argmax(np.cumsum(available, axis=1) > fallback_rank[:, None], axis=1)
+
+        preferred_available = available[rows, preferred]
+        chosen = np.where(preferred_available, preferred, fallback)
+        deposited = arrived & (available_count > 0)
+
+        used_fallback = arrived & ~preferred_available & (available_count > 0)
+        self.stream_counters += np.uint64(1) + arrived.astype(np.uint64) + used_fallback.astype(np.uint64)
+
+        self.counters.deposits += int(deposited.sum())
+        self.counters.rejected_full += int((arrived & (available_count == 0)).sum())
+
+        idx = rows[deposited]
+        cols = chosen[deposited]
+        old = self.fills[idx, cols].astype(np.int64)
+        new = np.minimum(100, old + int(sim_cfg.bag_fill_delta_pct))
+        self.fills[idx, cols] = new
+        self.counters.full_containers += int((new >= 100).sum())
+
+        return [
+            LocationDeposit(
+                location_index=int(i),
+                container=CONTAINER_NAMES[int(c)],
+                old_fill_pct=int(o),
+                new_fill_pct=int(n),
+            )
+            for i, c, o, n in zip(idx, cols, old, new)
+        ]
+
+    def _poisson(self, u, rate, exp_neg_rate):
+        """Vectorized `sample_poisson`."""
+
+        np = self._np
+        k = np.zeros(len(u), dtype=np.int64)
+        pk = np.broadcast_to(np.asarray(exp_neg_rate, dtype=np.float64), u.shape).copy()
+        cdf = pk.copy()
+        rate = np.broadcast_to(np.asarray(rate, dtype=np.float64), u.shape)
+        active = np.flatnonzero((u >= cdf) & (pk > 0.0))
+        while len(active):
+            k[active] += 1
+            pk[active] = pk[active] * rate[active] / k[active]
+            cdf[active] += pk[active]
+            active = active[(u[active] >= cdf[active]) & (pk[active] > 0.0) & (k[active] < MAX_BAGS_PER_STEP)]
+        return k
+
+    def _binomial_sample(self, u, n, p):
+        """Vectorized `sample_binomial`."""
+
+        powers, ratio = self._binomial[p]
+        k = self._np.zeros(len(u), dtype=self._np.int64)
+        pk = powers[n]
+        cdf = pk.copy()
+        active = self._np.flatnonzero((u >= cdf) & (k < n))
+        while len(active):
+            ka, na = k[active], n[active]
+            pk[active] = pk[active] * (na - ka) / (ka + 1) * ratio
+            k[active] = ka + 1
+            cdf[active] += pk[active]
+            active = active[(u[active] >= cdf[active]) & (k[active] < n[active])]
+        return k
+
+    def _step_bags(self, timestep_index: int) -> list[LocationDeposit]:
+        """Advance one timestep with the "poisson" arrival model (see `deposit_bags`)."""
+
+        np = self._np
+        sim_cfg = self.sim_cfg
+        delta = int(sim_cfg.bag_fill_delta_pct)
+
+        # Columns: arrival count, left count, center count, overflow split.
+        # A location with no arrivals uses only the first draw.
+        offsets = np.arange(4, dtype=np.uint64)
+        rolls = uniform_many(self.stream_keys[:, None], self.stream_counters[:, None] + offsets)
+
+        if self.arrivals is None:
+            bags = self._poisson(rolls[:, 0], base_arrival_rate(sim_cfg), self._exp_neg_rate)
+        else:
+            slot = self.arrivals.slot(timestep_index)
+            groups = self._location_groups
+            bags = self._poisson(rolls[:, 0], self._arrival_probs(timestep_index), self._group_exp_neg[groups, slot])
+        arrived = bags > 0
+        self.stream_counters += np.uint64(1) + np.uint64(3) * arrived.astype(np.uint64)
+
+        idx = np.flatnonzero(arrived)
+        if not len(idx):
+            return []
+        bags, rolls = bags[idx], rolls[idx]
+        left = self._binomial_sample(rolls[:, 1], bags, PREFERENCE_SPLIT[0])
+        center = self._binomial_sample(rolls[:, 2], bags - left, PREFERENCE_SPLIT[1])
+
+        fills = self.fills[idx].astype(np.int64)
+        rooms = np.where(fills >= 100, 0, (100 - fills + delta - 1) // delta)
+        placed = np.minimum(np.stack([left, center, bags - left - center], axis=1), rooms)
+        overflow = bags - placed.sum(axis=1)
+
+        # `_place_overflow`: share evenly between the first and last
+        # container with room when there are two, else all to the only one.
+        rows = np.arange(len(idx))
+        free = rooms - placed
+        open_ = free > 0
+        two_open = open_.sum(axis=1) == 2
+        first = np.argmax(open_, axis=1)
+        second = 2 - np.argmax(open_[:, ::-1], axis=1)
+        to_first = overflow.copy()
+        split = np.flatnonzero(two_open & (overflow > 0))
+        if len(split):
+            to_first[split] = self._binomial_sample(rolls[split, 3], overflow[split], 0.5)
+        free_first = free[rows, first]
+        free_second = np.where(two_open, free[rows, second], 0)
+        moved = np.minimum(to_first, free_first)
+        to_second = np.minimum(overflow - moved, free_second)
+        overflow = overflow - to_second
+        moved += np.minimum(overflow - moved, free_first - moved)
+        placed[rows, second] += to_second
+        placed[rows, first] += moved
+
+        self.counters.rejected_full += int((overflow - moved).sum())
+        self.counters.deposits += int(placed.sum())
+        new_fills = np.minimum(100, fills + placed * delta)
+        self.counters.full_containers += int(((new_fills >= 100) & (fills < 100)).sum())
+        self.fills[idx] = new_fills
+
+        # One deposit per bag, in (location, container) order.
+        counts = placed.ravel()
+        bag_idx = np.repeat(np.repeat(idx, 3), counts)
+        bag_cols = np.repeat(np.tile(np.arange(3), len(idx)), counts)
+        starts = np.cumsum(counts) - counts
+        nth = np.arange(len(bag_idx)) - np.repeat(starts, counts)
+        base = np.repeat(fills.ravel(), counts)
+        old = np.minimum(100, base + nth * delta)
+        new = np.minimum(100, old + delta)
+
+        return [
+            LocationDeposit(
+                location_index=int(i),
+                container=CONTAINER_NAMES[int(c)],
+                old_fill_pct=int(o),
+                new_fill_pct=int(n),
+            )
+            for i, c, o, n in zip(bag_idx, bag_cols, old, new)
+        ]
@@ -0,0 +1,30 @@
+"""Helpers shared by the test modules."""
+
+from simulated_city.config import (
+    AppConfig,
+    ArrivalProfileConfig,
+    MqttConfig,
+    SimulationConfig,
+    SimulationLocationConfig,
+)
+
+
+MQTT_CFG = MqttConfig("h", 1883, False, None, None, "demo", 60, "base")
+
+# Busy 08:00-20:00, closed at night; half as busy on Sundays.
+_HOURLY = tuple(0.0 if hour < 8 or hour >= 20 else 1.5 for hour in range(24))
+DAY_PROFILE = ArrivalProfileConfig(
+    profile_id="day",
+    factors=tuple(tuple(f * (0.5 if day == 6 else 1.0) for f in _HOURLY) for day in range(7)),
+)
+
+
+def many_locations_cfg(count: int = 3, **overrides) -> SimulationConfig:
+    """`count` locations "loc0", "loc1", ... at the same point; `overrides` are `SimulationConfig` fields."""
+
+    locations = tuple(SimulationLocationConfig(location_id=f"loc{i}", lat=55.0, lon=12.0) for i in range(count))
+    return SimulationConfig(**{"locations": locations, **overrides})
+
+
+def app_cfg(simulation: SimulationConfig) -> AppConfig:
+    return AppConfig(mqtt=MQTT_CFG, simulation=simulation)
@@ -0,0 +1,158 @@
+from dataclasses import replace
+from datetime import date, datetime, timezone
+import importlib.util
+
+import pytest
+
+from helpers import DAY_PROFILE, app_cfg
+from simulated_city.arrival_profiles import ArrivalTable
+from simulated_city.config import SimulationConfig, SimulationLocationConfig, load_config
+from simulated_city.rubbish_sim import make_engine, run_simulation
+
+
+def _sim_cfg(count: int = 6, **overrides) -> SimulationConfig:
+    locations = tuple(
+        SimulationLocationConfig(
+            location_id=f"loc{i}",
+            lat=55.0,
+            lon=12.0,
+            profile="day" if i % 2 else None,
+            arrival_scale=1.0 + 0.25 * (i % 3),
+        )
+        for i in range(count)
+    )
+    settings = {
+        "arrival_prob": 0.4,
+        "bag_fill_delta_pct": 5,
+        "seed": 8,
+        "arrival_profiles": (DAY_PROFILE,),
+        "start_time": datetime(2026, 1, 4, 22, 0, tzinfo=timezone.utc),  # Sunday 23:00 in Copenhagen
+        "profile_timezone": "Europe/Copenhagen",
+        **overrides,
+    }
+    return SimulationConfig(locations=locations, **settings)
+
+
+def test_table_uses_local_hour_of_week_and_holidays() -> None:
+    sim_cfg = _sim_cfg(holidays=(date(2026, 1, 6),))
+    table = ArrivalTable.for_config(sim_cfg)
+
+    assert table.slot(0) == 6 * 24 + 23  # Sunday 23:00
+    assert table.slot(4) == 0  # Monday 00:00
+    assert table.slot(4 + 24 * 4 + 40) == 6 * 24 + 10  # Tuesday 10:00 is a holiday
+    assert table.slot(10_000) == table.slot(10_000 - 7 * 24 * 4)
+
+    # loc1: "day" profile, scale 1.25; loc0: flat, scale 1.0.
+    monday_noon = table.step_probs(4 + 12 * 4)
+    assert monday_noon[1] == pytest.approx(0.4 * 1.5 * 1.25)
+    assert monday_noon[0] == 0.4
+    assert table.step_probs(4 + 2 * 4)[1] == 0.0
+    assert table.max_probs[1] == pytest.approx(0.75)
+
+    assert ArrivalTable.for_config(SimulationConfig(locations=sim_cfg.locations[:1], arrival_prob=0.4)) is None
+
+
+def test_table_follows_daylight_saving_time() -> None:
+    # Europe/Copenhagen switches to CEST at 2026-03-29 01:00 UTC.
+    sim_cfg = _sim_cfg(start_time=datetime(2026, 3, 28, 23, 0, tzinfo=timezone.utc), timestep_minutes=60)
+    table = ArrivalTable.for_config(sim_cfg)
+    assert [table.slot(step) % 24 for step in range(4)] == [0, 1, 3, 4]
+
+
+ENGINES = [("python", 2)]
+if importlib.util.find_spec("numpy") is not None:
+    ENGINES.append(("numpy", None))
+
+
+@pytest.mark.parametrize(("engine", "workers"), ENGINES)
+def test_engines_match_the_reference_engine_with_profiles(tmp_path, capsys, engine, workers) -> None:
+    cfg = app_cfg(_sim_cfg())
+    reference = tmp_path / "python.jsonl"
+    run_simulation(cfg, steps=300, dry_run=True, log_file=str(reference))
+    log = tmp_path / "other.jsonl"
+    run_simulation(cfg, steps=300, dry_run=True, log_file=str(log), engine=engine, workers=workers)
+    assert log.read_text(encoding="utf-8") == reference.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("engine", ["python", "event"])
+def test_no_deposits_outside_opening_hours(engine) -> None:
+    locations = tuple(
+        SimulationLocationConfig(location_id=f"loc{i}", lat=55.0, lon=12.0, profile="day") for i in range(20)
+    )
+    sim_cfg = replace(_sim_cfg(bag_fill_delta_pct=1, publish_every_deposit=True), locations=locations)
+    sim_engine = make_engine(engine, sim_cfg, seed=1)
+    table = ArrivalTable.for_config(sim_cfg)
+
+    by_hour = [0] * 24
+    steps = 4 * 24 * 7
+    for step in range(steps):
+        by_hour[table.slot(step) % 24] += len(sim_engine.step(step))
+
+    assert sum(by_hour[:8]) + sum(by_hour[20:]) == 0
+    # 20 locations x 4 steps/hour x 7 days, p = 0.6 (0.3 on Sunday).
+    expected = 20 * 4 * (6 * 0.6 + 0.3)
+    assert by_hour[12] == pytest.approx(expected, rel=0.15)
+
+
+def test_load_config_reads_arrival_profiles(tmp_path) -> None:
+    (tmp_path / "profiles").mkdir()
+    (tmp_path / "profiles" / "night.csv").write_text(
+        "day,hour,factor\n"
+        + "".join(f"*,{hour},{0.5 if hour < 6 else 1}\n" for hour in range(24))
+        + "sat,23,2\n",
+        encoding="utf-8",
+    )
+    p = tmp_path / "config.yaml"
+    p.write_text(
+        """
+simulation:
+  profile_timezone: "Europe/Copenhagen"
+  holidays: ["2026-12-25", 2026-12-24]
+  arrival_profiles:
+    default:
+      hourly: [1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 1, 1, 1, 1]
+      daily: [1, 1, 1, 1, 1, 0.5, 0.5]
+    nightlife:
+      csv: "profiles/night.csv"
+  locations:
+    - id: a
+      lat: 55.67
+      lon: 12.56
+    - id: b
+      lat: 55.68
+      lon: 12.57
+      profile: nightlife
+      arrival_scale: 1.5
+""",
+        encoding="utf-8",
+    )
+    sim_cfg = load_config(p).simulation
+    assert sim_cfg.holidays == (date(2026, 12, 24), date(2026, 12, 25))
+    default, nightlife = sim_cfg.arrival_profiles
+    assert default.factors[0][8] == 2.0 and default.factors[6][8] == 1.0
+    assert nightlife.factors[5][23] == 2.0 and nightlife.factors[0][3] == 0.5
+    assert (sim_cfg.locations[1].profile, sim_cfg.locations[1].arrival_scale) == ("nightlife", 1.5)
+
+    p.write_text(p.read_text(encoding="utf-8").replace("profile: nightlife", "profile: missing"), encoding="utf-8")
+    with pytest.raises(ValueError, match="unknown arrival profile"):
+        load_config(p)
+
+
+def test_resume_with_profiles_matches_uninterrupted_run(tmp_path, capsys) -> None:
+    cfg = app_cfg(_sim_cfg())
+    full_log = tmp_path / "full.jsonl"
+    run_simulation(cfg, steps=120, dry_run=True, log_file=str(full_log), engine="event")
+
+    log = tmp_path / "resumed.jsonl"
+    checkpoint_file = tmp_path / "checkpoint.json"
+    run_simulation(cfg, steps=50, dry_run=True, log_file=str(log), engine="event", checkpoint_file=str(checkpoint_file))
+    run_simulation(
+        cfg,
+        steps=120,
+        dry_run=True,
+        log_file=str(log),
+        engine="event",
+        checkpoint_file=str(checkpoint_file),
+        resume=True,
+    )
+    assert log.read_text(encoding="utf-8") == full_log.read_text(encoding="utf-8")
@@ -0,0 +1,207 @@
+import asyncio
+import io
+import json
+import struct
+from dataclasses import replace
+from datetime import datetime, timezone
+
+from helpers import MQTT_CFG, many_locations_cfg
+from simulated_city.async_sim import (
+    AsyncJsonlFileStatusPublisher,
+    AsyncMqttStatusPublisher,
+    AsyncQueueStatusPublisher,
+    AsyncTeeStatusPublisher,
+    run_steps_async,
+)
+from simulated_city.config import SimulationConfig
+from simulated_city.mqtt import connect_mqtt_async
+from simulated_city.rubbish_sim import (
+    BufferedJsonlFileStatusPublisher,
+    ContainerState,
+    LocationState,
+    PythonSimulationEngine,
+    run_steps,
+)
+
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _sim_cfg(count: int = 5) -> SimulationConfig:
+    return many_locations_cfg(count, arrival_prob=0.5)
+
+
+def _sync_jsonl(sim_cfg: SimulationConfig, *, seed: int, steps: int) -> str:
+    fp = io.StringIO()
+    publisher = BufferedJsonlFileStatusPublisher(mqtt_cfg=MQTT_CFG, fp=fp)
+    run_steps(
+        PythonSimulationEngine(sim_cfg, seed=seed),
+        publisher,
+        sim_cfg=sim_cfg,
+        steps=steps,
+        start_ts=START,
+    )
+    publisher.close()
+    return fp.getvalue()
+
+
+async def _async_jsonl(sim_cfg: SimulationConfig, *, seed: int, steps: int) -> str:
+    fp = io.StringIO()
+    publisher = AsyncJsonlFileStatusPublisher(mqtt_cfg=MQTT_CFG, fp=fp, flush_every_events=7)
+    await run_steps_async(
+        PythonSimulationEngine(sim_cfg, seed=seed),
+        publisher,
+        sim_cfg=sim_cfg,
+        steps=steps,
+        start_ts=START,
+    )
+    await publisher.close()
+    return fp.getvalue()
+
+
+def test_concurrent_async_runs_match_sync_runs() -> None:
+    sim_cfg = _sim_cfg()
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(_async_jsonl(sim_cfg, seed=seed, steps=40) for seed in (1, 2)))
+
+    outputs = asyncio.run(main())
+    assert outputs == [_sync_jsonl(sim_cfg, seed=seed, steps=40) for seed in (1, 2)]
+    assert outputs[0] != outputs[1]
+
+
+def test_tee_feeds_queue_and_file() -> None:
+    sim_cfg = _sim_cfg(2)
+
+    async def main() -> tuple[list[tuple[str, str]], str]:
+        queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=4)
+        fp = io.StringIO()
+        publisher = AsyncTeeStatusPublisher(
+            publishers=(
+                AsyncQueueStatusPublisher(mqtt_cfg=MQTT_CFG, queue=queue),
+                AsyncJsonlFileStatusPublisher(mqtt_cfg=MQTT_CFG, fp=fp),
+            )
+        )
+        received: list[tuple[str, str]] = []
+
+        async def consume() -> None:
+            while True:
+                received.append(await queue.get())
+                queue.task_done()
+
+        consumer = asyncio.create_task(consume())
+        engine = PythonSimulationEngine(sim_cfg, seed=3)
+        await run_steps_async(engine, publisher, sim_cfg=sim_cfg, steps=20, start_ts=START)
+        await publisher.close()
+        await queue.join()
+        consumer.cancel()
+        return received, fp.getvalue()
+
+    received, text = asyncio.run(main())
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert [(topic, json.loads(payload)) for topic, payload in received] == [
+        (line["topic"], line["payload"]) for line in lines
+    ]
+
+
+class _FakeAsyncClient:
+    def __init__(self) -> None:
+        self.client = self
+        self.acks: list[asyncio.Future[None]] = []
+
+    def max_inflight_messages_set(self, inflight: int) -> None:
+        self.inflight = inflight
+
+    def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> asyncio.Future[None]:
+        fut = asyncio.get_running_loop().create_future()
+        self.acks.append(fut)
+        return fut
+
+
+async def _publish_n(publisher, n: int) -> None:
+    loc = LocationState(
+        location_id="a",
+        lat=55.0,
+        lon=12.0,
+        left=ContainerState(fill_pct=0),
+        center=ContainerState(fill_pct=0),
+        right=ContainerState(fill_pct=0),
+    )
+    for i in range(n):
+        await publisher.publish_status(ts=START, location=loc, container="left", fill_pct=10, timestep_index=i)
+
+
+def test_async_mqtt_publisher_keeps_window_in_flight() -> None:
+    async def main() -> None:
+        client = _FakeAsyncClient()
+        publisher = AsyncMqttStatusPublisher(client=client, mqtt_cfg=MQTT_CFG, window=3, ack_timeout_s=0.01)
+        assert client.inflight == 3
+
+        await _publish_n(publisher, 2)
+        blocked = asyncio.create_task(_publish_n(publisher, 1))
+        await asyncio.sleep(0)
+        assert not blocked.done() and publisher.in_flight == 3
+
+        # One acknowledgement frees one slot; the others stay in flight.
+        client.acks[1].set_result(None)
+        await blocked
+        assert (publisher.acked, publisher.in_flight) == (1, 2)
+
+        client.acks[2].set_result(None)
+        await _publish_n(publisher, 1)
+        client.acks[0].set_exception(ConnectionError("lost"))
+        await publisher.close()
+        assert (publisher.published, publisher.acked, publisher.dropped, publisher.unacked) == (4, 2, 1, 1)
+
+    asyncio.run(main())
+
+
+async def _fake_broker(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, received: list[str]) -> None:
+    """Just enough MQTT 3.1.1 to accept a connection and acknowledge publishes."""
+
+    while True:
+        try:
+            header = (await reader.readexactly(1))[0]
+        except asyncio.IncompleteReadError:
+            break
+        length, shift = 0, 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = await reader.readexactly(length)
+        kind = header >> 4
+        if kind == 1:  # CONNECT
+            writer.write(b"\x20\x02\x00\x00")
+        elif kind == 3:  # PUBLISH
+            (topic_len,) = struct.unpack("!H", body[:2])
+            received.append(body[2 : 2 + topic_len].decode())
+            if (header >> 1) & 3:
+                writer.write(b"\x40\x02" + body[2 + topic_len : 4 + topic_len])
+        elif kind == 12:  # PINGREQ
+            writer.write(b"\xd0\x00")
+        elif kind == 14:  # DISCONNECT
+            break
+        await writer.drain()
+    writer.close()
+
+
+def test_async_mqtt_client_publishes_through_event_loop() -> None:
+    async def main() -> tuple[int, list[str]]:
+        received: list[str] = []
+        server = await asyncio.start_server(lambda r, w: _fake_broker(r, w, received), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cfg = replace(MQTT_CFG, host="127.0.0.1", port=port)
+        async with server:
+            client = await connect_mqtt_async(cfg, timeout_s=5.0, max_inflight_messages=10)
+            publisher = AsyncMqttStatusPublisher(client=client, mqtt_cfg=cfg, window=10)
+            await _publish_n(publisher, 50)
+            await publisher.close()
+            await client.disconnect()
+        return publisher.acked, received
+
+    acked, received = asyncio.run(main())
+    assert acked == 50
+    assert received == ["base/bins/a/left/status"] * 50
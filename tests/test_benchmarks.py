@@ -0,0 +1,65 @@
+import pytest
+
+from simulated_city.benchmarks import (
+    BenchmarkResult,
+    BenchmarkScenario,
+    compare_results,
+    default_scenarios,
+    load_results,
+    run_scenario,
+    write_results,
+)
+
+
+def _result(name: str, wall_s: float, *, events: int = 1000, rss: float | None = 50.0, skipped=None):
+    return BenchmarkResult(name, "simulate", {}, wall_s, 10, events, rss, skipped=skipped)
+
+
+def test_simulate_benchmark_counts_same_events_for_noop_and_file_sinks() -> None:
+    params = {"engine": "python", "locations": 20, "steps": 50, "publish": "boundary"}
+    noop = run_scenario(BenchmarkScenario("simulate", {**params, "sink": "noop"}))
+    file = run_scenario(BenchmarkScenario("simulate", {**params, "sink": "file"}))
+
+    assert noop.events == file.events > 20 * 3
+    assert noop.steps == 50
+    assert noop.steps_per_s is not None and noop.steps_per_s > 0
+
+
+def test_compare_results_flags_slowdowns_and_memory_growth(tmp_path) -> None:
+    baseline = [_result("a", 1.0), _result("b", 1.0), _result("c", 1.0), _result("d", 1.0, skipped="no numpy")]
+    current = [
+        _result("a", 1.05),  # within tolerance
+        _result("b", 2.0),  # half the throughput
+        _result("c", 1.0, rss=80.0),
+        _result("d", 9.0),  # skipped in the baseline
+        _result("e", 9.0),  # new scenario
+    ]
+
+    path = str(tmp_path / "baseline.json")
+    write_results(path, baseline)
+    regressions = compare_results(current, load_results(path), tolerance=0.1)
+
+    assert [(r.name, r.metric) for r in regressions] == [
+        ("b", "events_per_s"),
+        ("b", "steps_per_s"),
+        ("c", "peak_rss_mib"),
+    ]
+    assert regressions[0].change == pytest.approx(-0.5)
+
+
+def test_default_scenarios_cover_the_requested_matrix() -> None:
+    names = [s.name for s in default_scenarios()]
+    assert len(names) == len(set(names))
+    assert {s.params["locations"] for s in default_scenarios(groups=("simulate",))} == {1, 100, 10_000, 100_000}
+    with pytest.raises(ValueError):
+        default_scenarios(groups=("nope",))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("scenario", default_scenarios(quick=True), ids=lambda s: s.name)
+def test_benchmark(scenario: BenchmarkScenario) -> None:
+    result = run_scenario(scenario)
+    if result.skipped is not None:
+        pytest.skip(result.skipped)
+    assert result.events > 0
+    assert result.wall_s > 0
@@ -0,0 +1,140 @@
+import importlib.util
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from helpers import app_cfg, many_locations_cfg
+from simulated_city.checkpoint import Checkpointer, load_checkpoint
+from simulated_city.config import AppConfig
+from simulated_city.rubbish_sim import make_engine, run_simulation
+from simulated_city.sharded_sim import ShardedSimulationEngine
+
+
+def _cfg(**overrides) -> AppConfig:
+    settings = {
+        "arrival_prob": 0.6,
+        "bag_fill_delta_pct": 5,
+        "seed": 11,
+        "start_time": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        **overrides,
+    }
+    return app_cfg(many_locations_cfg(6, **settings))
+
+
+ENGINES = [("python", None), ("event", None), ("python", 2)]
+if importlib.util.find_spec("numpy") is not None:
+    ENGINES.append(("numpy", None))
+
+
+@pytest.mark.parametrize(("engine", "workers"), ENGINES)
+def test_resumed_run_matches_uninterrupted_run(tmp_path, capsys, engine, workers) -> None:
+    cfg = _cfg()
+    full_log = tmp_path / "full.jsonl"
+    run_simulation(cfg, steps=150, dry_run=True, log_file=str(full_log), engine=engine, workers=workers)
+
+    log = tmp_path / "resumed.jsonl"
+    checkpoint_file = tmp_path / "checkpoint.json"
+    first_part = 40
+    run_simulation(
+        cfg,
+        steps=first_part,
+        dry_run=True,
+        log_file=str(log),
+        engine=engine,
+        workers=workers,
+        checkpoint_file=str(checkpoint_file),
+    )
+    assert load_checkpoint(str(checkpoint_file)).next_step == first_part
+
+    # Events written after the checkpoint, before a crash, are dropped on resume.
+    with open(log, "a", encoding="utf-8") as fp:
+        fp.write('{"topic": "base/bins/loc0/left/status", "payload": {}}\n')
+
+    run_simulation(
+        cfg,
+        steps=150,
+        dry_run=True,
+        log_file=str(log),
+        engine=engine,
+        workers=workers,
+        checkpoint_file=str(checkpoint_file),
+        resume=True,
+    )
+    assert log.read_text(encoding="utf-8") == full_log.read_text(encoding="utf-8")
+    assert "Resuming at timestep" in capsys.readouterr().err
+
+
+def test_resume_rejects_changed_configuration(tmp_path) -> None:
+    checkpoint_file = tmp_path / "checkpoint.json"
+    run_simulation(_cfg(), steps=5, dry_run=True, checkpoint_file=str(checkpoint_file))
+
+    with pytest.raises(ValueError, match="different simulation settings"):
+        run_simulation(
+            _cfg(arrival_prob=0.1),
+            steps=10,
+            dry_run=True,
+            checkpoint_file=str(checkpoint_file),
+            resume=True,
+        )
+    with pytest.raises(ValueError, match="engine"):
+        run_simulation(_cfg(), steps=10, dry_run=True, engine="event", checkpoint_file=str(checkpoint_file), resume=True)
+
+
+def test_checkpointer_writes_in_background_and_records_seed(tmp_path) -> None:
+    cfg = _cfg().simulation
+    sim_engine = make_engine("python", cfg, seed=5)
+    now = [0.0]
+    path = tmp_path / "checkpoint.json"
+    checkpointer = Checkpointer(
+        str(path),
+        engine="python",
+        seed=5,
+        start_ts=cfg.start_time,
+        sim_cfg=cfg,
+        interval_s=10.0,
+        clock=lambda: now[0],
+    )
+
+    for step in range(30):
+        sim_engine.step(step)
+        now[0] += 1.0
+        checkpointer.maybe_checkpoint(sim_engine, step + 1)
+    checkpointer.close()
+
+    assert checkpointer.error is None
+    assert checkpointer.written >= 1
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert (data["seed"], data["next_step"]) == (5, 30)
+    assert data["engine_state"]["fills"] == sim_engine.get_state()["fills"]
+    assert not (tmp_path / "checkpoint.json.tmp").exists()
+
+
+def test_checkpointer_retries_sharded_engine_at_chunk_boundary(tmp_path) -> None:
+    cfg = _cfg().simulation
+    sim_engine = ShardedSimulationEngine(cfg, seed=5, workers=1, chunk_steps=10)
+    path = tmp_path / "checkpoint.json"
+    checkpointer = Checkpointer(
+        str(path),
+        engine="python",
+        seed=5,
+        start_ts=cfg.start_time,
+        sim_cfg=cfg,
+        interval_s=0.0,
+        clock=lambda: 0.0,
+    )
+    attempts = []
+    get_state = sim_engine.get_state
+    sim_engine.get_state = lambda: attempts.append(1) or get_state()
+
+    try:
+        for step in range(10):
+            sim_engine.step(step)
+            checkpointer.maybe_checkpoint(sim_engine, step + 1)
+        checkpointer.close()
+    finally:
+        sim_engine.close()
+
+    # Mid-chunk: one skipped attempt, then nothing until the chunk ends at step 10.
+    assert (checkpointer.skipped, checkpointer.written, len(attempts)) == (1, 1, 2)
+    assert load_checkpoint(str(path)).next_step == 10
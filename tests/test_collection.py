@@ -0,0 +1,201 @@
+import importlib.util
+import json
+import math
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from helpers import app_cfg
+from simulated_city.collection import CollectionScheduler, _DueIndex
+from simulated_city.config import (
+    AppConfig,
+    CollectionConfig,
+    DepotConfig,
+    SimulationConfig,
+    SimulationLocationConfig,
+    TruckConfig,
+    load_config,
+)
+from simulated_city.rubbish_sim import make_engine, run_simulation
+
+
+def _cfg(
+    count: int = 4,
+    *,
+    trucks: int = 1,
+    capacity_pct: int = 3000,
+    threshold_pct: int = 80,
+    **overrides,
+) -> AppConfig:
+    # Locations 1 km apart along a line east of the depot.
+    locations = tuple(
+        SimulationLocationConfig(location_id=f"loc{i}", lat=55.0, lon=12.0 + 0.0157 * (i + 1)) for i in range(count)
+    )
+    collection = CollectionConfig(
+        threshold_pct=threshold_pct,
+        dispatch_every_steps=2,
+        speed_kmh=30.0,
+        stop_minutes=2.0,
+        depots=(DepotConfig(depot_id="depot", lat=55.0, lon=12.0),),
+        trucks=tuple(TruckConfig(truck_id=f"truck{i}", depot_id="depot", capacity_pct=capacity_pct) for i in range(trucks)),
+    )
+    settings = {
+        "arrival_prob": 0.8,
+        "bag_fill_delta_pct": 10,
+        "seed": 3,
+        "start_time": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "collection": collection,
+        **overrides,
+    }
+    return app_cfg(SimulationConfig(locations=locations, **settings))
+
+
+def _events(path) -> list[dict]:
+    return [json.loads(line)["payload"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_trucks_empty_due_containers_and_publish_collected_events(tmp_path, capsys) -> None:
+    log = tmp_path / "events.jsonl"
+    run_simulation(_cfg(), steps=200, dry_run=True, log_file=str(log))
+
+    events = _events(log)
+    collected = [e for e in events if e["event"] == "collected"]
+    assert collected and all(e["fill_pct"] == 0 for e in collected)
+
+    # Fills only ever drop through a collection.
+    last: dict[tuple[str, str], int] = {}
+    for e in events:
+        key = (e["location_id"], e["container"])
+        if e["event"] == "status":
+            assert e["fill_pct"] >= last.get(key, 0)
+        last[key] = e["fill_pct"]
+    assert {e["location_id"] for e in collected} == {f"loc{i}" for i in range(4)}
+
+
+ENGINES = ["python", "event"]
+if importlib.util.find_spec("numpy") is not None:
+    ENGINES.append("numpy")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_track_emptied_containers(engine) -> None:
+    sim_cfg = _cfg(arrival_prob=1.0, bag_fill_delta_pct=50).simulation
+    sim_engine = make_engine(engine, sim_cfg, seed=1)
+    collector = CollectionScheduler(sim_cfg)
+
+    for step in range(40):
+        collector.collect(sim_engine, step)
+        collector.observe(sim_engine, sim_engine.step(step), step)
+
+    fills = [getattr(sim_engine.location_state(i), c).fill_pct for i in range(4) for c in ("left", "center", "right")]
+    assert sim_engine.counters.collected > 0
+    assert sim_engine.counters.full_containers == sum(fill >= 100 for fill in fills)
+    # Emptied locations keep receiving bags.
+    assert sim_engine.counters.deposits > 40
+
+
+@pytest.mark.parametrize("threshold_pct", [80, 85])
+def test_python_and_numpy_engines_match_with_collection(tmp_path, capsys, threshold_pct) -> None:
+    pytest.importorskip("numpy")
+    # 85 is not a status boundary: trucks still see every deposit.
+    cfg = _cfg(threshold_pct=threshold_pct, bag_fill_delta_pct=5)
+    logs = []
+    for engine in ("python", "numpy"):
+        log = tmp_path / f"{engine}.jsonl"
+        run_simulation(cfg, steps=150, dry_run=True, log_file=str(log), engine=engine)
+        logs.append(log.read_text(encoding="utf-8"))
+    assert logs[0] == logs[1]
+
+
+def test_truck_capacity_limits_routes() -> None:
+    # One truck that holds a single full location per trip.
+    sim_cfg = _cfg(arrival_prob=1.0, bag_fill_delta_pct=100, capacity_pct=300).simulation
+    sim_engine = make_engine("python", sim_cfg, seed=1)
+    collector = CollectionScheduler(sim_cfg)
+
+    for step in range(4):
+        collector.collect(sim_engine, step)
+        collector.observe(sim_engine, sim_engine.step(step), step)
+
+    # Every location holds 200 after step 1, so each trip takes only the
+    # nearest one (loc0), which keeps filling up and is nearest again.
+    assert collector.routes == 2
+    assert sim_engine.counters.collected == 2
+    assert collector.due_count == 3
+
+
+def test_due_index_finds_the_nearest_location() -> None:
+    rng = random.Random(7)
+    points = [(rng.uniform(0, 20), rng.uniform(0, 20)) for _ in range(500)]
+    index = _DueIndex(points, cell_km=0.5)
+    members = set(rng.sample(range(500), 80))
+    for i in members:
+        index.add(i)
+
+    for _ in range(50):
+        x, y = rng.uniform(-5, 25), rng.uniform(-5, 25)
+        expected = min(members, key=lambda i: (math.hypot(points[i][0] - x, points[i][1] - y), i))
+        assert index.nearest(x, y) == expected
+        index.remove(expected)
+        members.discard(expected)
+
+
+def test_resume_with_collection_matches_uninterrupted_run(tmp_path, capsys) -> None:
+    cfg = _cfg()
+    full_log = tmp_path / "full.jsonl"
+    run_simulation(cfg, steps=120, dry_run=True, log_file=str(full_log))
+
+    log = tmp_path / "resumed.jsonl"
+    checkpoint_file = tmp_path / "checkpoint.json"
+    run_simulation(cfg, steps=45, dry_run=True, log_file=str(log), checkpoint_file=str(checkpoint_file))
+    run_simulation(
+        cfg,
+        steps=120,
+        dry_run=True,
+        log_file=str(log),
+        checkpoint_file=str(checkpoint_file),
+        resume=True,
+    )
+    assert log.read_text(encoding="utf-8") == full_log.read_text(encoding="utf-8")
+
+
+def test_collection_is_not_supported_with_workers() -> None:
+    with pytest.raises(ValueError, match="workers"):
+        run_simulation(_cfg(), steps=5, dry_run=True, workers=2)
+
+
+def test_load_config_reads_collection(tmp_path) -> None:
+    p = tmp_path / "config.yaml"
+    p.write_text(
+        """
+simulation:
+  status_boundary_pct: 10
+  collection:
+    threshold_pct: 70
+    dispatch_every_steps: 8
+    depots:
+      - id: north
+        lat: 55.7
+        lon: 12.55
+    trucks:
+      - id: t1
+        depot: north
+        capacity_pct: 1500
+  locations:
+    - id: a
+      lat: 55.67
+      lon: 12.56
+""",
+        encoding="utf-8",
+    )
+    collection = load_config(p).simulation.collection
+    assert collection.threshold_pct == 70
+    assert collection.dispatch_every_steps == 8
+    assert collection.depots == (DepotConfig(depot_id="north", lat=55.7, lon=12.55),)
+    assert collection.trucks == (TruckConfig(truck_id="t1", depot_id="north", capacity_pct=1500),)
+
+    text = p.read_text(encoding="utf-8")
+    p.write_text(text.replace("depot: north", "depot: south"), encoding="utf-8")
+    with pytest.raises(ValueError, match="unknown depot"):
+        load_config(p)
@@ -1,3 +1,5 @@
+import pytest
+
 from simulated_city.config import load_config
 
 
@@ -108,3 +110,19 @@ def test_load_config_mqtt_profile_can_be_selected_by_env_var(tmp_path, monkeypat
         monkeypatch.setenv("SIMCITY_MQTT_PROFILE", "mqtthq")
         cfg = load_config(p)
         assert cfg.mqtt.host == "broker.mqttdashboard.com"
+
+
+def test_load_config_rejects_duplicate_location_ids(tmp_path) -> None:
+    p = tmp_path / "config.yaml"
+    p.write_text(
+        """
+        simulation:
+          locations:
+            - {id: a, lat: 55.0, lon: 12.0}
+            - {id: a, lat: 55.1, lon: 12.1}
+        """.strip(),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_config(p)
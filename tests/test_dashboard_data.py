@@ -0,0 +1,449 @@
+import json
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from simulated_city.dashboard_data import read_jsonl_all, read_jsonl_incremental
+
+
+def _line(fill_pct: int) -> str:
+    payload = {
+        "ts": "2026-02-18T00:00:00.000000Z",
+        "location_id": "a",
+        "container": "left",
+        "fill_pct": fill_pct,
+        "timestep_index": 0,
+        "event": "status",
+    }
+    return json.dumps({"topic": "t", "payload": payload})
+
+
+def test_read_jsonl_incremental_leaves_partial_line_for_next_read(tmp_path) -> None:
+    p = tmp_path / "log.jsonl"
+    complete = _line(10) + "\n"
+    partial = _line(20)
+    p.write_text(complete + partial[:15], encoding="utf-8")
+
+    payloads, offset = read_jsonl_incremental(str(p), 0)
+    assert [x["fill_pct"] for x in payloads] == [10]
+    assert offset == len(complete.encode("utf-8"))
+
+    p.write_text(complete + partial + "\n", encoding="utf-8")
+    payloads, offset = read_jsonl_incremental(str(p), offset)
+    assert [x["fill_pct"] for x in payloads] == [20]
+    assert offset == p.stat().st_size
+
+
+def test_read_jsonl_all_skips_malformed_lines_and_reads_unterminated_tail(tmp_path) -> None:
+    p = tmp_path / "log.jsonl"
+    p.write_text(_line(10) + "\nnot json\n" + _line(30), encoding="utf-8")
+
+    assert [x["fill_pct"] for x in read_jsonl_all(str(p))] == [10, 30]
+
+
+def test_binary_event_log_round_trip(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    from datetime import datetime, timezone
+
+    from simulated_city.dashboard_data import read_binary_event_log
+    from simulated_city.event_log import BinaryEventLogWriter, datetime_to_ns
+
+    path = tmp_path / "events.bin"
+    writer = BinaryEventLogWriter(path, buffer_records=2)
+    ts = datetime(2026, 2, 18, 12, 30, 0, 123456, tzinfo=timezone.utc)
+    rows = [("a", "left", 0, -1, "init"), ("b", "right", 10, 3, "status"), ("a", "center", 20, 7, "status")]
+    for location_id, container, fill_pct, timestep_index, event in rows:
+        writer.write(
+            ts_ns=datetime_to_ns(ts),
+            location_id=location_id,
+            lat=55.0,
+            lon=12.0,
+            container=container,
+            fill_pct=fill_pct,
+            timestep_index=timestep_index,
+            event=event,
+        )
+    writer.close()
+
+    log = read_binary_event_log(str(path))
+    assert len(log) == 3
+    assert log.location_ids == ("a", "b")
+    assert list(log.fill_pct) == [0, 10, 20]
+
+    df = log.to_frame()
+    assert list(df["series"].astype(str)) == ["a.left", "b.right", "a.center"]
+    assert list(df["event"].astype(str)) == ["init", "status", "status"]
+    assert list(df["timestep_index"]) == [-1, 3, 7]
+    assert df["ts"].iloc[0] == pd.Timestamp(ts)
+
+
+def test_binary_event_log_rejects_unclosed_file(tmp_path) -> None:
+    pytest.importorskip("numpy")
+    from simulated_city.dashboard_data import read_binary_event_log
+    from simulated_city.event_log import BinaryEventLogWriter
+
+    path = tmp_path / "events.bin"
+    writer = BinaryEventLogWriter(path)
+    writer.flush()
+
+    with pytest.raises(ValueError, match="incomplete"):
+        read_binary_event_log(str(path))
+    writer.close()
+
+
+def test_parquet_publisher_round_trip_with_filters(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    from datetime import datetime, timedelta, timezone
+
+    from simulated_city.dashboard_data import read_parquet_events
+    from simulated_city.rubbish_sim import ContainerState, LocationState, ParquetStatusPublisher
+
+    path = tmp_path / "events.parquet"
+    publisher = ParquetStatusPublisher(path=str(path), row_group_size=4)
+    start = datetime(2026, 2, 18, tzinfo=timezone.utc)
+    empty = ContainerState(fill_pct=0)
+    for step in range(10):
+        for location_id in ("a", "b"):
+            loc = LocationState(location_id=location_id, lat=55.0, lon=12.0, left=empty, center=empty, right=empty)
+            publisher.publish_status(
+                ts=start + timedelta(minutes=15 * step),
+                location=loc,
+                container="left",
+                fill_pct=step * 10,
+                timestep_index=step,
+            )
+    publisher.close()
+
+    df = read_parquet_events(str(path))
+    assert len(df) == 20
+    assert set(df["series"]) == {"a.left", "b.left"}
+
+    window = read_parquet_events(
+        str(path),
+        columns=["ts", "fill_pct"],
+        start_ts=start + timedelta(minutes=30),
+        end_ts=start + timedelta(minutes=60),
+        location_ids=["b"],
+    )
+    assert list(window.columns) == ["ts", "fill_pct"]
+    assert list(window["fill_pct"]) == [20, 30]
+
+
+def _payload(ts: str, location_id: str, fill_pct: int, event: str = "status", container: str = "left") -> dict:
+    return {
+        "ts": ts,
+        "location_id": location_id,
+        "container": container,
+        "fill_pct": fill_pct,
+        "timestep_index": 0,
+        "event": event,
+    }
+
+
+def test_event_store_dedups_and_orders_out_of_order_events() -> None:
+    from simulated_city.dashboard_data import EventStore
+
+    store = EventStore(initial_capacity=2)
+    added = store.ingest_payloads(
+        [
+            _payload("2026-02-18T00:00:00Z", "a", 0, "init"),
+            _payload("2026-02-18T02:00:00Z", "a", 20),
+            _payload("2026-02-18T01:00:00Z", "a", 10),
+            _payload("2026-02-18T01:00:00Z", "a", 10),
+            {"not": "an event"},
+        ]
+    )
+    assert added == 3
+    assert len(store) == 3
+
+    df = store.window()
+    assert list(df["fill_pct"]) == [0, 10, 20]
+    assert list(store.latest()["fill_pct"]) == [20]
+
+
+def test_event_store_keeps_only_latest_run() -> None:
+    from simulated_city.dashboard_data import EventStore
+
+    store = EventStore()
+    store.ingest_payloads(
+        [
+            _payload("2026-02-18T00:00:00Z", "a", 0, "init"),
+            _payload("2026-02-18T01:00:00Z", "a", 50),
+            # Second run without init marker: detected by the fill decrease.
+            _payload("2026-02-19T00:00:00Z", "a", 10),
+            _payload("2026-02-19T00:00:00Z", "b", 30),
+        ]
+    )
+    assert store.run_start_ns == pd.Timestamp("2026-02-19T00:00:00Z").value
+    assert sorted(store.window()["series"]) == ["a.left", "b.left"]
+    assert list(store.latest()["fill_pct"]) == [10, 30]
+
+
+def test_event_store_collected_events_do_not_start_a_run() -> None:
+    from simulated_city.dashboard_data import EventStore
+
+    store = EventStore()
+    store.ingest_payloads(
+        [
+            _payload("2026-02-18T00:00:00Z", "a", 0, "init"),
+            _payload("2026-02-18T02:00:00Z", "a", 0, "collected"),
+            _payload("2026-02-18T01:00:00Z", "a", 80),
+            _payload("2026-02-18T03:00:00Z", "a", 10),
+        ]
+    )
+    assert store.run_start_ns == pd.Timestamp("2026-02-18T00:00:00Z").value
+    assert list(store.window()["fill_pct"]) == [0, 80, 0, 10]
+
+
+def test_event_store_window_keeps_baseline_before_cutoff() -> None:
+    from simulated_city.dashboard_data import EventStore
+
+    store = EventStore()
+    store.ingest_payloads(
+        [
+            _payload("2026-02-10T00:00:00Z", "a", 0, "init"),
+            _payload("2026-02-11T00:00:00Z", "a", 10),
+            _payload("2026-02-12T00:00:00Z", "a", 20),
+            _payload("2026-02-20T00:00:00Z", "a", 30),
+        ]
+    )
+
+    df = store.window(days=2)
+    assert list(df["fill_pct"]) == [20, 30]
+    assert str(df["ts"].dtype) == "datetime64[ns, UTC]"
+
+
+def test_event_store_ingest_frame_matches_payloads(tmp_path) -> None:
+    from simulated_city.dashboard_data import EventStore, load_event_log_frame
+
+    p = tmp_path / "log.jsonl"
+    p.write_text(_line(10) + "\n" + _line(20) + "\n", encoding="utf-8")
+
+    store = EventStore()
+    assert store.ingest_frame(load_event_log_frame(str(p))) == 2
+    assert store.max_ts_ns == pd.Timestamp("2026-02-18T00:00:00Z").value
+    assert list(store.window()["fill_pct"]) == [10, 20]
+
+
+def test_lttb_and_minmax_keep_endpoints_and_budget() -> None:
+    import numpy as np
+
+    from simulated_city.dashboard_data import lttb_indices, minmax_indices
+
+    x = np.arange(1_000, dtype=np.int64) * 1_000_000_000
+    y = np.zeros(1_000)
+    y[437] = 100  # single spike
+
+    lttb = lttb_indices(x, y, 50)
+    assert len(lttb) == 50
+    assert lttb[0] == 0 and lttb[-1] == 999
+    assert 437 in lttb
+
+    mm = minmax_indices(y, 50)
+    assert len(mm) <= 50
+    assert mm[0] == 0 and mm[-1] == 999
+    assert 437 in mm
+    assert list(mm) == sorted(mm)
+
+
+def test_downsample_series_bounds_points_and_extends_to_end() -> None:
+    from simulated_city.dashboard_data import downsample_series
+
+    ts = pd.date_range("2026-02-18", periods=2_000, freq="15min", tz="UTC")
+    df = pd.concat(
+        [
+            pd.DataFrame({"ts": ts, "series": "a.left", "fill_pct": (pd.RangeIndex(2_000) % 101)}),
+            pd.DataFrame({"ts": ts[:3], "series": "b.left", "fill_pct": [0, 10, 20]}),
+        ],
+        ignore_index=True,
+    )
+
+    for method in ("minmax", "lttb"):
+        out = downsample_series(df, max_points_per_series=100, method=method)
+        counts = out.groupby("series").size()
+        assert counts["a.left"] <= 100
+        # Short series keep every point plus one at the right edge.
+        b = out[out["series"] == "b.left"]
+        assert list(b["fill_pct"]) == [0, 10, 20, 20]
+        assert b["ts"].iloc[-1] == ts[-1]
+        assert out.loc[out["series"] == "a.left", "fill_pct"].max() == 100
+
+
+def test_event_store_since_returns_rows_after_cursor() -> None:
+    from simulated_city.dashboard_data import EventStore
+
+    store = EventStore()
+    store.ingest_payloads([_payload("2026-02-18T00:00:00Z", "a", 0, "init")])
+    cursor = store.seq
+
+    store.ingest_payloads([_payload("2026-02-18T01:00:00Z", "a", 10), _payload("2026-02-18T01:00:00Z", "b", 20)])
+    new, cursor = store.since(cursor)
+    assert list(new["fill_pct"]) == [10, 20]
+    assert cursor == 3
+
+    new, cursor = store.since(cursor)
+    assert new.empty and cursor == 3
+
+
+def test_event_store_ingests_enqueued_payloads_in_batches(monkeypatch) -> None:
+    from simulated_city.dashboard_data import EventStore
+
+    store = EventStore()
+    store.ingest_batch_size = 3
+    batches = []
+    ingest = store.ingest_payloads
+    monkeypatch.setattr(store, "ingest_payloads", lambda payloads: batches.append(len(payloads)) or ingest(payloads))
+
+    for i in range(4):
+        store.enqueue_payload(_payload(f"2026-02-18T00:0{i}:00Z", "a", i * 10))
+    assert batches == [3]
+    # A read ingests whatever is still buffered.
+    assert list(store.window()["fill_pct"]) == [0, 10, 20, 30]
+    assert batches == [3, 1]
+
+
+def test_mqtt_ingest_feeds_one_store_for_many_readers(monkeypatch) -> None:
+    import threading
+
+    from helpers import MQTT_CFG
+    from simulated_city import dashboard_data
+
+    callbacks = []
+
+    def fake_client(_cfg, _topic, on_payload, *, client_id_suffix):
+        callbacks.append(on_payload)
+        return object()
+
+    monkeypatch.setattr(dashboard_data, "_start_mqtt_client", fake_client)
+    store, _client = dashboard_data.start_mqtt_ingest(MQTT_CFG, "base/#")
+    (on_payload,) = callbacks
+
+    def publish(location_id: str) -> None:
+        for i in range(200):
+            on_payload(_payload(f"2026-02-18T00:{i // 60:02d}:{i % 60:02d}Z", location_id, i % 100))
+
+    threads = [threading.Thread(target=publish, args=(f"loc{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    # Readers never drain anything, so they all see the same events.
+    while any(t.is_alive() for t in threads):
+        store.window(days=1)
+    for t in threads:
+        t.join()
+
+    first, _ = store.since(0)
+    second, _ = store.since(0)
+    assert len(first) == len(second) == 800
+
+
+def _log_line(ts: str, fill_pct: int) -> str:
+    return json.dumps({"topic": "t", "payload": _payload(ts, "a", fill_pct)}) + "\n"
+
+
+def test_indexed_jsonl_log_reads_time_range_and_persists_index(tmp_path) -> None:
+    from simulated_city.dashboard_data import IndexedJsonlLog
+
+    p = tmp_path / "log.jsonl"
+    p.write_text("".join(_log_line(f"2026-02-{day:02d}T00:00:00Z", day) for day in range(1, 21)), encoding="utf-8")
+
+    with IndexedJsonlLog(str(p), lines_per_block=3) as log:
+        assert log.line_count == 20
+        assert len(log.blocks) == 7
+        payloads = log.read_range("2026-02-10T00:00:00Z", "2026-02-13T00:00:00Z")
+        assert [x["fill_pct"] for x in payloads] == [10, 11, 12]
+        chunks = list(log.iter_chunks(start_ts="2026-02-15T00:00:00Z", chunk_lines=2))
+        assert [len(c) for c in chunks] == [2, 2, 2]
+
+    assert (tmp_path / "log.jsonl.idx").exists()
+
+    # Appended lines (and a trailing partial line) extend the saved index.
+    with open(p, "a", encoding="utf-8") as f:
+        f.write(_log_line("2026-02-21T00:00:00Z", 21) + _log_line("2026-02-22T00:00:00Z", 22)[:10])
+    with IndexedJsonlLog(str(p), lines_per_block=3) as log:
+        assert log.line_count == 21
+        assert [x["fill_pct"] for x in log.read_range("2026-02-20T00:00:00Z")] == [20, 21]
+
+    # A rewritten log (new run) is re-indexed from scratch.
+    p.write_text(_log_line("2026-03-01T00:00:00Z", 5), encoding="utf-8")
+    with IndexedJsonlLog(str(p), lines_per_block=3) as log:
+        assert log.line_count == 1
+        assert [x["fill_pct"] for x in log.read_range()] == [5]
+
+
+def test_read_jsonl_frame_matches_row_by_row_loader(tmp_path) -> None:
+    from simulated_city.dashboard_data import event_from_payload, events_to_frame, read_jsonl_all, read_jsonl_frame
+
+    p = tmp_path / "log.jsonl"
+    lines = []
+    for i in range(300):
+        lines.append(json.dumps({"topic": "t", "payload": _payload(f"2026-02-18T{i // 60:02d}:{i % 60:02d}:00Z", f"l{i % 7}", i % 100)}))
+        if i % 50 == 0:
+            lines.append("not json")
+            lines.append(json.dumps({"topic": "t", "payload": {"ts": "bad", "location_id": "x"}}))
+    # Trailing line without a newline is included, like read_jsonl_all.
+    p.write_text("\n".join(lines), encoding="utf-8")
+
+    events = []
+    for payload in read_jsonl_all(str(p)):
+        try:
+            events.append(event_from_payload(payload))
+        except Exception:
+            continue
+    expected = events_to_frame(events)
+
+    for workers in (1, 2):
+        df = read_jsonl_frame(str(p), workers=workers, chunk_bytes=2_000)
+        assert len(df) == 300
+        assert list(df["ts"]) == list(expected["ts"])
+        for column in ("series", "fill_pct", "timestep_index", "event"):
+            assert list(df[column]) == list(expected[column])
+
+
+def test_parse_ts_ns_many_matches_parse_ts() -> None:
+    from simulated_city.dashboard_data import NAT_NS, parse_ts, parse_ts_ns_many
+    from simulated_city.event_log import datetime_to_ns
+
+    values = [
+        "2026-02-18T18:26:17.155154Z",
+        "2026-02-18T18:26:17Z",  # isoformat() drops a zero fraction
+        "2024-02-29T00:00:00Z",
+        "1999-12-31T23:59:59.999999Z",
+        "2026-02-18T19:26:17+01:00",  # irregular: fallback path
+        "2026-02-18T18:26:17.5Z",
+    ]
+    expected = [datetime_to_ns(parse_ts(v)) for v in values]
+    assert parse_ts_ns_many(values).tolist() == expected
+
+    bad = ["2026-02-30T00:00:00Z", "2026-02-18T24:00:00Z", "garbage", None]
+    assert parse_ts_ns_many(bad, errors="coerce").tolist() == [NAT_NS] * 4
+    with pytest.raises(ValueError):
+        parse_ts_ns_many(bad[:1])
+
+
+def test_mqtt_ingest_decodes_timestamps_per_batch(monkeypatch) -> None:
+    from helpers import MQTT_CFG
+    from simulated_city import dashboard_data
+
+    callbacks = []
+    monkeypatch.setattr(
+        dashboard_data,
+        "_start_mqtt_client",
+        lambda _cfg, _topic, on_payload, *, client_id_suffix: callbacks.append(on_payload) or object(),
+    )
+    calls = []
+    parse_many = dashboard_data.parse_ts_ns_many
+    monkeypatch.setattr(
+        dashboard_data,
+        "parse_ts_ns_many",
+        lambda values, **kwargs: calls.append(len(values)) or parse_many(values, **kwargs),
+    )
+
+    store, _client = dashboard_data.start_mqtt_ingest(MQTT_CFG, "base/#")
+    (on_payload,) = callbacks
+    for i in range(50):
+        on_payload(_payload(f"2026-02-18T00:00:{i:02d}Z", "a", i))
+    assert calls == []
+
+    assert len(store.window()) == 50
+    assert calls == [50]
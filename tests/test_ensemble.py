@@ -0,0 +1,100 @@
+import csv
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import pytest
+
+from helpers import DAY_PROFILE, many_locations_cfg
+from simulated_city import ensemble
+from simulated_city.ensemble import EnsembleStats, _histogram_quantile, run_ensemble, write_csv
+
+
+def test_histogram_quantile() -> None:
+    counts = [0, 2, 0, 6, 2]
+    assert _histogram_quantile(counts, 0.1) == 1
+    assert _histogram_quantile(counts, 0.5) == 3
+    assert _histogram_quantile(counts, 0.9) == 4
+    assert _histogram_quantile([0, 0], 0.5) is None
+
+
+def test_ensemble_statistics_for_a_deterministic_fill() -> None:
+    # One bag of 50% per location and step: every location is full after 6 steps.
+    sim_cfg = many_locations_cfg(2, arrival_prob=1.0, bag_fill_delta_pct=50, timestep_minutes=30)
+    stats = run_ensemble(sim_cfg, replicates=20, steps=8, seed=1)
+
+    summary = stats.summary_rows()
+    assert len(summary) == 6
+    for row in summary:
+        assert row["p_reach_80"] == row["p_reach_100"] == 1.0
+        assert 1.0 <= row["t100_p50_h"] <= 3.0
+        assert row["t80_p50_h"] == row["t100_p50_h"]
+        assert row["p_all_full_end"] == 1.0
+
+    by_step = {}
+    for row in stats.timestep_rows():
+        by_step.setdefault(row["timestep_index"], []).append(row)
+    assert all(row["p_all_full"] == 0.0 for row in by_step[4])
+    assert all(row["p_all_full"] == 1.0 and row["fill_p10"] == 100 for row in by_step[5])
+    assert by_step[0][0]["hours"] == 0.5
+
+
+def test_unreached_thresholds_are_censored() -> None:
+    stats = run_ensemble(many_locations_cfg(arrival_prob=0.5), replicates=10, steps=5, seed=2)
+    row = stats.summary_rows()[0]
+    assert row["p_reach_80"] == 0.0
+    assert row["t80_p10_h"] is None
+
+
+def test_ensemble_is_independent_of_workers_and_stride_bounds_memory() -> None:
+    sim_cfg = many_locations_cfg(arrival_prob=0.7)
+    serial = run_ensemble(sim_cfg, replicates=12, steps=30, seed=3)
+    parallel = run_ensemble(sim_cfg, replicates=12, steps=30, seed=3, workers=2)
+    assert parallel.replicates == 12
+    assert parallel.summary_rows() == serial.summary_rows()
+    assert parallel.timestep_rows() == serial.timestep_rows()
+
+    strided = run_ensemble(sim_cfg, replicates=12, steps=30, seed=3, stride=10)
+    assert [r["timestep_index"] for r in strided.timestep_rows()[::9]] == [9, 19, 29]
+    assert len(strided.fill_counts) * 10 == len(serial.fill_counts)
+    assert strided.summary_rows() == serial.summary_rows()
+
+
+def test_replicates_share_the_start_time_of_arrival_profiles(monkeypatch) -> None:
+    # Closed until 08:00, so a run from midnight sees no arrivals for 32 steps.
+    profile = replace(DAY_PROFILE, profile_id="default")
+    sim_cfg = many_locations_cfg(
+        arrival_prob=1.0,
+        arrival_profiles=(profile,),
+        start_time=datetime(2026, 1, 5, tzinfo=timezone.utc),
+    )
+    stats = run_ensemble(sim_cfg, replicates=4, steps=34, seed=1)
+    fills = {row["timestep_index"]: row["fill_p90"] for row in stats.timestep_rows()}
+    assert fills[31] == 0 and fills[33] > 0
+
+    start_times = []
+    make_engine = ensemble.make_engine
+
+    def recording_make_engine(*args, **kwargs):
+        start_times.append(kwargs["start_ts"])
+        return make_engine(*args, **kwargs)
+
+    monkeypatch.setattr(ensemble, "make_engine", recording_make_engine)
+    run_ensemble(replace(sim_cfg, start_time=None), replicates=4, steps=2, seed=1)
+    assert len(start_times) == 4 and len(set(start_times)) == 1 and start_times[0] is not None
+
+
+def test_merge_rejects_different_ensembles() -> None:
+    a = EnsembleStats.for_config(many_locations_cfg(), steps=10)
+    with pytest.raises(ValueError):
+        a.merge(EnsembleStats.for_config(many_locations_cfg(), steps=11))
+
+
+def test_write_csv(tmp_path) -> None:
+    stats = run_ensemble(many_locations_cfg(1), replicates=3, steps=4, seed=4)
+    path = tmp_path / "summary.csv"
+    write_csv(str(path), stats.summary_rows())
+
+    with open(path, newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    assert [r["container"] for r in rows] == ["left", "center", "right"]
+    assert rows[0]["t100_p50_h"] == ""
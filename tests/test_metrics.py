@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import urllib.request
+
+import pytest
+
+from simulated_city.metrics import (
+    LatencyHistogram,
+    MetricsServer,
+    SimulationMetrics,
+    format_summary,
+    render_prometheus,
+)
+from simulated_city.rubbish_sim import EngineCounters
+
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _record(metrics: SimulationMetrics, step: int, *, events: int = 3) -> None:
+    metrics.record_step(
+        timestep_index=step,
+        sim_ts=START + timedelta(minutes=15 * step),
+        engine_s=1e-4,
+        publish_s=2e-5,
+        end_step_s=1e-6,
+        events=events,
+    )
+
+
+def test_latency_histogram_quantiles_use_bucket_bounds() -> None:
+    hist = LatencyHistogram(bounds=(0.001, 0.01, 0.1))
+    for _ in range(90):
+        hist.observe(0.0005)
+    for _ in range(9):
+        hist.observe(0.05)
+    hist.observe(2.0)  # overflow bucket
+
+    assert hist.count == 100
+    assert hist.counts == [90, 0, 9, 1]
+    assert hist.quantile(0.5) == 0.001
+    assert hist.quantile(0.95) == 0.1
+    assert hist.quantile(1.0) == 2.0
+    assert hist.to_dict()["mean_s"] == pytest.approx((90 * 0.0005 + 9 * 0.05 + 2.0) / 100)
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_simulation_metrics_write_only_after_interval(tmp_path) -> None:
+    path = tmp_path / "metrics.json"
+    metrics = SimulationMetrics(path=str(path), interval_s=3600.0)
+
+    _record(metrics, 0)
+    metrics.maybe_write()
+    first = path.read_text(encoding="utf-8")
+
+    _record(metrics, 1)
+    metrics.maybe_write()  # interval not elapsed yet
+    assert path.read_text(encoding="utf-8") == first
+
+    metrics.write()
+    assert '"steps": 2' in path.read_text(encoding="utf-8")
+    first_jsonl = metrics.add_publisher("jsonl")
+    assert metrics.add_publisher("jsonl") is not first_jsonl
+    assert set(metrics.publishers) == {"jsonl", "jsonl2"}
+    assert "engine_step" in format_summary(metrics.snapshot())
+
+
+def test_lag_is_measured_against_the_step_delay_schedule() -> None:
+    metrics = SimulationMetrics()
+    assert metrics.lag_s is None
+
+    metrics.step_interval_s = 10.0
+    metrics.start()
+    _record(metrics, 0)
+    # One step done almost instantly: about 10 s ahead of schedule.
+    assert metrics.lag_s == pytest.approx(-10.0, abs=1.0)
+
+
+def test_metrics_server_serves_prometheus_text() -> None:
+    metrics = SimulationMetrics()
+    metrics.engine_counters = EngineCounters(deposits=7, rejected_full=2, full_containers=1)
+    publisher = metrics.add_publisher("mqtt")
+    publisher.publish_status.observe(0.002)
+    publisher.extra["in_flight"] = 4
+    metrics.checkpointer = SimpleNamespace(written=3, skipped=5)
+    _record(metrics, 0, events=5)
+    _record(metrics, 1, events=5)
+
+    server = MetricsServer(metrics, port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            body = response.read().decode("utf-8")
+    finally:
+        server.close()
+
+    assert body.startswith("# HELP simcity_steps_total")
+    assert render_prometheus(metrics).endswith("\n")
+    lines = set(body.splitlines())
+    assert "# TYPE simcity_steps_total counter" in lines
+    assert "simcity_steps_total 2" in lines
+    assert "simcity_current_step 1" in lines
+    assert "simcity_arrivals_total 9" in lines
+    assert "simcity_full_containers 1" in lines
+    assert "simcity_events_published_total 10" in lines
+    assert f"simcity_sim_time_seconds {(START + timedelta(minutes=15)).timestamp()!r}" in lines
+    assert 'simcity_mqtt_in_flight{publisher="mqtt"} 4' in lines
+    assert "simcity_checkpoints_written_total 3" in lines
+    assert "simcity_checkpoints_skipped_total 5" in lines
+    assert 'simcity_stage_duration_seconds_bucket{stage="engine_step",le="0.0001"} 2' in lines
+    assert 'simcity_stage_duration_seconds_count{stage="engine_step"} 2' in lines
+    assert 'simcity_publisher_call_duration_seconds_bucket{publisher="mqtt",call="publish_status",le="+Inf"} 1' in lines
+    # No schedule configured, so no lag gauge.
+    assert not any(line.startswith("simcity_schedule_lag_seconds") for line in lines)
@@ -0,0 +1,87 @@
+import pytest
+
+from simulated_city.config import SimulationConfig
+from simulated_city.pacing import PacingScheduler, pacer_for_config
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(round(seconds, 9))
+        self.now += seconds
+
+
+def _run(pacer: PacingScheduler, clock: FakeClock, work_s: list[float]) -> list[float]:
+    """Run steps taking `work_s` each; return each step's start time relative to the start."""
+
+    pacer.start()
+    starts = []
+    for work in work_s:
+        starts.append(round(clock.now - 100.0, 9))
+        clock.now += work
+        pacer.wait()
+    return starts
+
+
+def test_pacer_absorbs_work_time_without_drift() -> None:
+    clock = FakeClock()
+    pacer = PacingScheduler(interval_s=1.0, clock=clock, sleep=clock.sleep)
+
+    starts = _run(pacer, clock, [0.3] * 5)
+
+    assert starts == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert clock.sleeps == [0.7] * 5
+    assert pacer.overruns == 0
+    assert pacer.achieved_steps_per_s == pytest.approx(pacer.target_steps_per_s)
+
+
+def test_pacer_rebases_after_overrun_by_default() -> None:
+    clock = FakeClock()
+    pacer = PacingScheduler(interval_s=1.0, clock=clock, sleep=clock.sleep)
+
+    starts = _run(pacer, clock, [0.2, 2.5, 0.2, 0.2])
+
+    # Step 1 ends 1.7 s late; later steps keep the 1 s pace from there.
+    assert starts == [0.0, 1.0, 3.5, 4.5]
+    assert (pacer.overruns, pacer.max_overrun_s) == (1, pytest.approx(1.5))
+
+
+def test_pacer_catch_up_runs_steps_back_to_back() -> None:
+    clock = FakeClock()
+    pacer = PacingScheduler(interval_s=1.0, catch_up=True, clock=clock, sleep=clock.sleep)
+
+    starts = _run(pacer, clock, [0.2, 2.5, 0.2, 0.2, 0.2])
+
+    # After the slow step the next one starts immediately; by step 4 the run
+    # is back on the original schedule.
+    assert starts == [0.0, 1.0, 3.5, 3.7, 4.0]
+    assert pacer.overruns == 2
+
+
+def test_pacer_for_config_prefers_speed_over_step_delay() -> None:
+    sim_cfg = SimulationConfig(timestep_minutes=15, step_delay_s=0.5)
+    assert pacer_for_config(sim_cfg).interval_s == 0.5
+    assert pacer_for_config(sim_cfg, speed=60.0).interval_s == 15.0
+    assert pacer_for_config(SimulationConfig(pacing_speed=900.0, pacing_catch_up=True)).catch_up is True
+    assert pacer_for_config(SimulationConfig()) is None
+    with pytest.raises(ValueError):
+        PacingScheduler(interval_s=0)
+
+
+def test_next_delay_returns_the_sleep_instead_of_sleeping() -> None:
+    clock = FakeClock()
+    pacer = PacingScheduler(interval_s=1.0, clock=clock, sleep=clock.sleep)
+
+    pacer.start()
+    clock.now += 0.25
+    assert pacer.next_delay() == pytest.approx(0.75)
+    clock.now += 0.75 + 1.5
+    assert pacer.next_delay() == 0.0
+    assert clock.sleeps == []
+    assert pacer.overruns == 1
@@ -0,0 +1,150 @@
+from dataclasses import replace
+from datetime import datetime, timezone
+import importlib.util
+import random
+
+import pytest
+
+from helpers import DAY_PROFILE, app_cfg, many_locations_cfg
+from simulated_city.arrival_profiles import ArrivalTable
+from simulated_city.checkpoint import config_digest
+from simulated_city.config import SimulationConfig, SimulationLocationConfig, load_config
+from simulated_city.rubbish_sim import (
+    ContainerState,
+    LocationState,
+    deposit_bags,
+    make_engine,
+    run_simulation,
+    sample_binomial,
+    sample_poisson,
+)
+
+
+def _sim_cfg(count: int = 8, **overrides) -> SimulationConfig:
+    locations = tuple(
+        SimulationLocationConfig(
+            location_id=f"loc{i}",
+            lat=55.0,
+            lon=12.0,
+            profile="day" if i % 2 else None,
+            arrival_scale=1.0 + 0.5 * (i % 3),
+        )
+        for i in range(count)
+    )
+    settings = {
+        "arrival_model": "poisson",
+        "arrival_rate": 2.5,
+        "bag_fill_delta_pct": 1,
+        "seed": 4,
+        "arrival_profiles": (DAY_PROFILE,),
+        "start_time": datetime(2026, 1, 5, tzinfo=timezone.utc),
+        **overrides,
+    }
+    return SimulationConfig(locations=locations, **settings)
+
+
+def _location(left: int, center: int, right: int) -> LocationState:
+    return LocationState(
+        location_id="a",
+        lat=55.0,
+        lon=12.0,
+        left=ContainerState(fill_pct=left),
+        center=ContainerState(fill_pct=center),
+        right=ContainerState(fill_pct=right),
+    )
+
+
+def test_samplers_have_the_expected_means() -> None:
+    rng = random.Random(1)
+    draws = [sample_poisson(rng.random(), 6.5) for _ in range(20_000)]
+    assert sum(draws) / len(draws) == pytest.approx(6.5, rel=0.03)
+    assert sample_poisson(0.999, 0.0) == 0
+
+    draws = [sample_binomial(rng.random(), 40, 0.25) for _ in range(20_000)]
+    assert sum(draws) / len(draws) == pytest.approx(10.0, rel=0.03)
+    assert {sample_binomial(u, 3, 0.5) for u in (0.0, 0.5, 0.999999)} <= {0, 1, 2, 3}
+
+
+def test_deposit_bags_follows_preference_and_fallback() -> None:
+    sim_cfg = SimulationConfig(locations=(), bag_fill_delta_pct=10)
+    rng = random.Random(2)
+
+    per_container = {"left": 0, "center": 0, "right": 0}
+    for _ in range(2_000):
+        _, results, rejected = deposit_bags(rng=rng, sim_cfg=sim_cfg, location=_location(0, 0, 0), bags=4)
+        assert rejected == 0 and len(results) == 4
+        for result in results:
+            per_container[result.container] += 1
+    assert per_container["center"] / 8_000 == pytest.approx(0.5, abs=0.03)
+    assert per_container["left"] / 8_000 == pytest.approx(0.25, abs=0.03)
+
+    # Left is full and center takes one more bag: the rest goes right.
+    updated, results, rejected = deposit_bags(rng=rng, sim_cfg=sim_cfg, location=_location(100, 95, 50), bags=30)
+    assert [r.container for r in results].count("left") == 0
+    assert (updated.left.fill_pct, updated.center.fill_pct, updated.right.fill_pct) == (100, 100, 100)
+    assert len(results) == 1 + 5 and rejected == 24
+    assert [(r.old_fill_pct, r.new_fill_pct) for r in results if r.container == "right"][-1] == (90, 100)
+
+
+ENGINES = [("python", 2)]
+if importlib.util.find_spec("numpy") is not None:
+    ENGINES.append(("numpy", None))
+
+
+@pytest.mark.parametrize(("engine", "workers"), ENGINES)
+def test_engines_match_the_reference_engine(tmp_path, capsys, engine, workers) -> None:
+    cfg = app_cfg(_sim_cfg())
+    reference = tmp_path / "python.jsonl"
+    run_simulation(cfg, steps=200, dry_run=True, log_file=str(reference))
+    log = tmp_path / "other.jsonl"
+    run_simulation(cfg, steps=200, dry_run=True, log_file=str(log), engine=engine, workers=workers)
+    assert log.read_text(encoding="utf-8") == reference.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("engine", ["python", "event"])
+def test_mean_arrivals_per_step_match_the_rate(engine) -> None:
+    locations = many_locations_cfg(50).locations
+    sim_cfg = replace(_sim_cfg(arrival_rate=1.5, arrival_profiles=()), locations=locations)
+    sim_engine = make_engine(engine, sim_cfg, seed=3)
+    for step in range(40):
+        sim_engine.step(step)
+    # 1.5 bags/step of 1% stay far below capacity, so every arrival is a deposit.
+    assert sim_engine.counters.rejected_full == 0
+    assert sim_engine.counters.deposits == pytest.approx(50 * 40 * 1.5, rel=0.05)
+
+
+def test_poisson_rates_are_not_capped_at_one() -> None:
+    table = ArrivalTable.for_config(_sim_cfg())
+    # loc3: "day" profile, scale 1.0; loc5: "day" profile, scale 2.0.
+    assert table.max_probs[3] == pytest.approx(3.75)
+    assert table.max_probs[5] == pytest.approx(7.5)
+    with pytest.raises(ValueError, match="shorter timestep"):
+        ArrivalTable.for_config(_sim_cfg(arrival_rate=100.0))
+
+    assert config_digest(_sim_cfg()) != config_digest(_sim_cfg(arrival_rate=2.0))
+
+
+def test_load_config_reads_arrival_model(tmp_path) -> None:
+    p = tmp_path / "config.yaml"
+    p.write_text(
+        """
+simulation:
+  arrival_model: poisson
+  arrival_rate: 3.5
+  locations:
+    - id: a
+      lat: 55.67
+      lon: 12.56
+""",
+        encoding="utf-8",
+    )
+    sim_cfg = load_config(p).simulation
+    assert (sim_cfg.arrival_model, sim_cfg.arrival_rate) == ("poisson", 3.5)
+
+    text = p.read_text(encoding="utf-8")
+    p.write_text(text.replace("poisson", "bernoulli"), encoding="utf-8")
+    with pytest.raises(ValueError, match="requires arrival_model: poisson"):
+        load_config(p)
+    p.write_text(text.replace("poisson", "geometric"), encoding="utf-8")
+    with pytest.raises(ValueError, match="arrival_model must be one of"):
+        load_config(p)
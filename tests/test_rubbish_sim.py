@@ -2,12 +2,16 @@ import random
 
 import pytest
 
+from helpers import MQTT_CFG, app_cfg, many_locations_cfg
 from simulated_city.config import SimulationConfig, SimulationLocationConfig
 from simulated_city.rubbish_sim import (
     ContainerState,
+    EventSkippingSimulationEngine,
     LocationState,
+    PythonSimulationEngine,
     boundaries_crossed,
     choose_container,
+    sample_steps_until_arrival,
     step_location,
 )
 
@@ -69,3 +73,368 @@ def test_step_location_deposits_when_arrival_prob_is_one() -> None:
     assert (
         updated.left.fill_pct + updated.center.fill_pct + updated.right.fill_pct
     ) == 2
+
+
+def test_numpy_engine_deposits_once_per_location_when_arrival_prob_is_one() -> None:
+    pytest.importorskip("numpy")
+    from simulated_city.vectorized_sim import NumpySimulationEngine
+
+    sim_cfg = many_locations_cfg(50, arrival_prob=1.0, publish_every_deposit=True)
+    engine = NumpySimulationEngine(sim_cfg, seed=7)
+
+    deposits = engine.step(0)
+    assert [d.location_index for d in deposits] == list(range(50))
+    assert all(d.old_fill_pct == 0 and d.new_fill_pct == 2 for d in deposits)
+    assert int(engine.fills.sum()) == 100
+
+
+def test_numpy_engine_falls_back_and_stops_when_all_full() -> None:
+    pytest.importorskip("numpy")
+    from simulated_city.vectorized_sim import NumpySimulationEngine
+
+    sim_cfg = many_locations_cfg(20, arrival_prob=1.0, bag_fill_delta_pct=50, publish_every_deposit=True)
+    engine = NumpySimulationEngine(sim_cfg, seed=3)
+
+    # 3 containers * 2 bags each fill a location completely; no more deposits after.
+    for step in range(6):
+        assert len(engine.step(step)) == 20
+    assert engine.fills.min() == 100
+    assert engine.step(6) == []
+    assert engine.location_state(0).center.is_full
+
+
+def test_engines_return_deposits_that_cross_no_boundary() -> None:
+    import importlib.util
+
+    from simulated_city.sharded_sim import ShardedSimulationEngine
+
+    # 2% bags: most deposits cross no 10% boundary, yet every engine returns them.
+    sim_cfg = many_locations_cfg(30, arrival_prob=0.5)
+    engines = [ShardedSimulationEngine(sim_cfg, seed=11, workers=1, chunk_steps=7)]
+    if importlib.util.find_spec("numpy") is not None:
+        from simulated_city.vectorized_sim import NumpySimulationEngine
+
+        engines.append(NumpySimulationEngine(sim_cfg, seed=11))
+
+    reference = _collect_events(PythonSimulationEngine(sim_cfg, seed=11), 200)
+    assert any(not boundaries_crossed(old, new, boundary_pct=10) for *_, old, new in reference)
+    for engine in engines:
+        assert _collect_events(engine, 200) == reference
+        engine.close()
+
+
+def test_sample_steps_until_arrival_edge_cases() -> None:
+    rng = random.Random(5)
+    assert sample_steps_until_arrival(rng, 0.0) is None
+    assert sample_steps_until_arrival(rng, 1.0) == 1
+
+    waits = [sample_steps_until_arrival(rng, 0.25) for _ in range(20_000)]
+    assert min(waits) >= 1
+    # Mean of a geometric distribution is 1 / p.
+    assert sum(waits) / len(waits) == pytest.approx(4.0, rel=0.05)
+
+
+def test_event_engine_arrival_prob_one_deposits_every_step_in_location_order() -> None:
+    sim_cfg = many_locations_cfg(5, arrival_prob=1.0, publish_every_deposit=True)
+    engine = EventSkippingSimulationEngine(sim_cfg, seed=1)
+
+    for step in range(3):
+        assert [d.location_index for d in engine.step(step)] == [0, 1, 2, 3, 4]
+    assert engine.location_state(0).left.fill_pct + engine.location_state(0).center.fill_pct + engine.location_state(
+        0
+    ).right.fill_pct == 6
+
+
+def test_event_engine_deposit_rate_matches_arrival_prob() -> None:
+    sim_cfg = many_locations_cfg(40, arrival_prob=0.25, publish_every_deposit=True)
+    engine = EventSkippingSimulationEngine(sim_cfg, seed=2)
+
+    total = sum(len(engine.step(step)) for step in range(400))
+    assert total == pytest.approx(0.25 * 40 * 400, rel=0.05)
+
+
+def test_sharded_engine_output_is_independent_of_worker_count() -> None:
+    from simulated_city.sharded_sim import ShardedSimulationEngine
+
+    sim_cfg = many_locations_cfg(23, arrival_prob=0.5, publish_every_deposit=True)
+
+    def run(workers: int) -> list[tuple]:
+        engine = ShardedSimulationEngine(sim_cfg, seed=99, workers=workers, block_size=5, chunk_steps=7)
+        try:
+            events = []
+            for step in range(30):
+                for d in engine.step(step):
+                    state = engine.location_state(d.location_index)
+                    assert getattr(state, d.container).fill_pct == d.new_fill_pct
+                    events.append((step, d.location_index, d.container, d.old_fill_pct, d.new_fill_pct))
+            return events
+        finally:
+            engine.close()
+
+    single = run(1)
+    assert single
+    assert run(3) == single
+
+    reference = PythonSimulationEngine(sim_cfg, seed=99)
+    assert [
+        (step, d.location_index, d.container, d.old_fill_pct, d.new_fill_pct)
+        for step in range(30)
+        for d in reference.step(step)
+    ] == single
+
+
+def test_sharded_engine_stops_at_max_steps() -> None:
+    from simulated_city.sharded_sim import ShardedSimulationEngine
+
+    sim_cfg = many_locations_cfg(12, arrival_prob=0.5)
+    engine = ShardedSimulationEngine(sim_cfg, seed=3, workers=1, block_size=5, chunk_steps=7, max_steps=10)
+    reference = PythonSimulationEngine(sim_cfg, seed=3)
+    for step in range(10):
+        engine.step(step)
+        reference.step(step)
+
+    # The second chunk covers only steps 7-9, so the state is complete.
+    assert engine.get_state() == reference.get_state()
+
+
+def _collect_events(engine, steps: int) -> list[tuple]:
+    events = []
+    for step in range(steps):
+        for d in engine.step(step):
+            location_id = engine.location_state(d.location_index).location_id
+            events.append((step, location_id, d.container, d.old_fill_pct, d.new_fill_pct))
+    return events
+
+
+def test_location_streams_are_stable_when_other_locations_change() -> None:
+    full = many_locations_cfg(6, arrival_prob=0.5, publish_every_deposit=True)
+    # Drop two locations and reverse the rest: remaining bins must not change.
+    edited = SimulationConfig(
+        arrival_prob=0.5,
+        publish_every_deposit=True,
+        locations=tuple(reversed(full.locations[1:5])),
+    )
+
+    kept = {loc.location_id for loc in edited.locations}
+    before = [e for e in _collect_events(PythonSimulationEngine(full, seed=4), 80) if e[1] in kept]
+    after = _collect_events(PythonSimulationEngine(edited, seed=4), 80)
+    assert sorted(before) == sorted(after)
+
+
+def test_numpy_engine_matches_python_engine_for_same_seed() -> None:
+    pytest.importorskip("numpy")
+    from simulated_city.vectorized_sim import NumpySimulationEngine
+
+    # Large deltas make containers fill up quickly, exercising the fallback.
+    sim_cfg = many_locations_cfg(25, arrival_prob=0.6, bag_fill_delta_pct=15)
+    python_events = _collect_events(PythonSimulationEngine(sim_cfg, seed=21), 60)
+    numpy_events = _collect_events(NumpySimulationEngine(sim_cfg, seed=21), 60)
+    assert python_events
+    assert numpy_events == python_events
+
+
+class _FakeInfo:
+    def __init__(self, *, ack: bool = True, fail: bool = False) -> None:
+        self.ack = ack
+        self.fail = fail
+        self.waited = False
+
+    def is_published(self) -> bool:
+        if self.fail:
+            raise RuntimeError("publish failed")
+        return self.ack and self.waited
+
+    def wait_for_publish(self, timeout: float | None = None) -> None:
+        self.waited = True
+        self.is_published()
+
+
+class _FakeClient:
+    def max_inflight_messages_set(self, inflight: int) -> None:
+        self.inflight = inflight
+
+
+class _FakeHandle:
+    def __init__(self, infos: list[_FakeInfo]) -> None:
+        self.client = _FakeClient()
+        self.infos = iter(infos)
+        self.topics: list[str] = []
+
+    def publish_json_nowait(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> _FakeInfo:
+        self.topics.append(topic)
+        return next(self.infos)
+
+
+def _publish_n(publisher, n: int) -> None:
+    from datetime import datetime, timezone
+
+    loc = LocationState(
+        location_id="a",
+        lat=55.0,
+        lon=12.0,
+        left=ContainerState(fill_pct=0),
+        center=ContainerState(fill_pct=0),
+        right=ContainerState(fill_pct=0),
+    )
+    for i in range(n):
+        publisher.publish_status(
+            ts=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            location=loc,
+            container="left",
+            fill_pct=10,
+            timestep_index=i,
+        )
+
+
+def test_windowed_mqtt_publisher_waits_only_when_window_is_full() -> None:
+    from simulated_city.rubbish_sim import WindowedMqttStatusPublisher
+
+    infos = [_FakeInfo() for _ in range(5)]
+    handle = _FakeHandle(infos)
+    publisher = WindowedMqttStatusPublisher(handle=handle, mqtt_cfg=MQTT_CFG, window=3)
+    assert handle.client.inflight == 3
+
+    _publish_n(publisher, 2)
+    assert not any(info.waited for info in infos)
+
+    _publish_n(publisher, 1)
+    assert all(info.waited for info in infos[:3])
+    assert publisher.acked == 3
+
+    _publish_n(publisher, 2)
+    publisher.close()
+    assert publisher.published == 5
+    assert publisher.acked == 5
+    assert publisher.unacked == 0
+    assert handle.topics[0] == "base/bins/a/left/status"
+
+
+def test_windowed_mqtt_publisher_reports_dropped_and_unacked_on_close() -> None:
+    from simulated_city.rubbish_sim import WindowedMqttStatusPublisher
+
+    handle = _FakeHandle([_FakeInfo(), _FakeInfo(fail=True), _FakeInfo(ack=False)])
+    publisher = WindowedMqttStatusPublisher(handle=handle, mqtt_cfg=MQTT_CFG, window=10, ack_timeout_s=0.01)
+
+    _publish_n(publisher, 3)
+    publisher.close()
+    assert (publisher.acked, publisher.dropped, publisher.unacked) == (1, 1, 1)
+
+
+def test_buffered_jsonl_publisher_flushes_by_count_and_on_close() -> None:
+    import io
+    import json
+
+    from simulated_city.rubbish_sim import BufferedJsonlFileStatusPublisher
+
+    fp = io.StringIO()
+    publisher = BufferedJsonlFileStatusPublisher(
+        mqtt_cfg=MQTT_CFG, fp=fp, flush_every_events=3, flush_interval_s=3600.0
+    )
+
+    _publish_n(publisher, 2)
+    assert fp.getvalue() == ""
+    _publish_n(publisher, 1)
+    assert len(fp.getvalue().splitlines()) == 3
+
+    _publish_n(publisher, 1)
+    publisher.close()
+    lines = [json.loads(line) for line in fp.getvalue().splitlines()]
+    assert len(lines) == 4
+    assert lines[0]["topic"] == "base/bins/a/left/status"
+    assert lines[3]["payload"]["timestep_index"] == 0
+    assert lines[3]["payload"]["fill_pct"] == 10
+
+
+def test_status_encoder_matches_make_status_payload() -> None:
+    import json
+    from datetime import datetime, timedelta, timezone
+
+    from simulated_city.mqtt import topic
+    from simulated_city.rubbish_sim import StatusEncoder, make_status_payload
+
+    encoder = StatusEncoder.for_mqtt(MQTT_CFG)
+    empty = ContainerState(fill_pct=0)
+    locations = [
+        LocationState(location_id="a", lat=55.6, lon=12.5, left=empty, center=empty, right=empty),
+        LocationState(location_id='b"ø', lat=-1.0, lon=1e-7, left=empty, center=empty, right=empty),
+    ]
+    start = datetime(2026, 2, 18, tzinfo=timezone.utc)
+
+    for step, ts in enumerate([start, start + timedelta(microseconds=250), start + timedelta(hours=1)]):
+        for loc in locations:
+            for container, event in (("left", "status"), ("right", "full")):
+                kwargs = dict(ts=ts, location=loc, container=container, fill_pct=step * 7, timestep_index=step)
+                expected_topic = topic(MQTT_CFG, f"bins/{loc.location_id}/{container}/status")
+                expected_payload = make_status_payload(**kwargs, event=event)
+
+                assert encoder.encode(**kwargs, event=event) == (expected_topic, expected_payload)
+                line = json.loads(encoder.jsonl_line(**kwargs, event=event))
+                assert line == {"topic": expected_topic, "payload": json.loads(expected_payload)}
+
+
+def test_engine_counters_agree_across_engines() -> None:
+    import importlib.util
+
+    from simulated_city.sharded_sim import ShardedSimulationEngine
+
+    # Big bags fill every location within the run, so arrivals get rejected.
+    sim_cfg = many_locations_cfg(12, arrival_prob=0.7, bag_fill_delta_pct=25)
+    engines = [
+        PythonSimulationEngine(sim_cfg, seed=5),
+        ShardedSimulationEngine(sim_cfg, seed=5, workers=1, block_size=5, chunk_steps=7),
+    ]
+    if importlib.util.find_spec("numpy") is not None:
+        from simulated_city.vectorized_sim import NumpySimulationEngine
+
+        engines.append(NumpySimulationEngine(sim_cfg, seed=5))
+    event_engine = EventSkippingSimulationEngine(sim_cfg, seed=5)
+
+    for engine in [*engines, event_engine]:
+        for step in range(40):
+            engine.step(step)
+        engine.close()
+
+    reference = engines[0].counters
+    assert reference.deposits == 12 * 12  # four bags fill each container
+    assert reference.rejected_full > 0
+    assert reference.arrivals == reference.deposits + reference.rejected_full
+    assert reference.full_containers == 12 * 3
+    for engine in engines[1:]:
+        assert engine.counters == reference
+
+    # The event engine draws its own random numbers: same totals, arrivals
+    # (mostly at full locations) only in expectation.
+    counters = event_engine.counters
+    assert (counters.deposits, counters.full_containers) == (reference.deposits, reference.full_containers)
+    assert counters.arrivals == pytest.approx(12 * 40 * 0.7, rel=0.1)
+
+
+def test_run_simulation_writes_metrics_file(tmp_path) -> None:
+    import json
+
+    from simulated_city.rubbish_sim import run_simulation
+
+    sim_cfg = many_locations_cfg(4, arrival_prob=0.5, publish_every_deposit=True)
+    cfg = app_cfg(sim_cfg)
+    log_file = tmp_path / "run.jsonl"
+    metrics_file = tmp_path / "metrics.json"
+
+    returned = run_simulation(
+        cfg,
+        steps=25,
+        dry_run=True,
+        log_file=str(log_file),
+        metrics_file=str(metrics_file),
+    )
+
+    snapshot = json.loads(metrics_file.read_text(encoding="utf-8"))
+    counters = snapshot["counters"]
+    assert returned is not None and returned.steps == counters["steps"] == 25
+    # Every deposit publishes one event, plus three init events per location.
+    assert counters["events_published"] == counters["deposits"] + 4 * 3
+    assert counters["events_published"] == len(log_file.read_text(encoding="utf-8").splitlines())
+    assert snapshot["stages"]["engine_step"]["count"] == 25
+    assert set(snapshot["publishers"]) == {"jsonl", "stdout"}
+    assert snapshot["publishers"]["jsonl"]["events"] == counters["events_published"]
+
+    assert run_simulation(cfg, steps=1, dry_run=True) is None